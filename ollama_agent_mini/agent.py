@@ -1,52 +1,77 @@
 import asyncio
-import aiohttp
-from bs4 import BeautifulSoup
-from duckduckgo_search import DDGS
-from googlesearch import search as google_search
+import os
+import time
+from typing import List
 
 from autogen_agentchat.agents import AssistantAgent
 from autogen_agentchat.teams import RoundRobinGroupChat
 from autogen_core.models import ModelInfo
 from autogen_ext.models.ollama import OllamaChatCompletionClient
-from autogen_agentchat.ui import Console
-from autogen_agentchat.conditions import TextMentionTermination
+
+from chat_context import SummarizingChatCompletionContext
+from content_extract import fetch_many_readable, fetch_readable
+from http_pool import close_http_session
+from llm_cache import with_cache
+from run_metrics import RunMetrics, stream_run
+from search_offload import SEARCH_DEADLINE_SECONDS, ddgs_text, google_urls
+from termination import HardDeadline, RunLimits, build_termination
+from tool_limits import bounded_tool
+
+# Las llamadas que el modelo pide en un mismo paso se ejecutan a la vez (AssistantAgent usa
+# asyncio.gather); bounded_tool limita cuántas corren juntas y cuánto puede tardar cada una.
 
 # --- Herramienta: búsqueda web ---
+@bounded_tool(timeout=15)
 async def web_search(query: str, max_results: int = 5) -> str:
     """Busca información en la web (DuckDuckGo con fallback a Google)."""
+    # Las librerías de búsqueda son síncronas: se ejecutan en un pool de hilos con plazo total
+    deadline = time.monotonic() + SEARCH_DEADLINE_SECONDS
     try:
-        with DDGS() as ddgs:
-            results = ddgs.text(query, max_results=max_results)
-            if results:
-                return "\n".join([f"- {r['title']}: {r['href']}" for r in results])
+        results = await ddgs_text(query, max_results=max_results, timeout=SEARCH_DEADLINE_SECONDS)
+        if results:
+            return "\n".join([f"- {r['title']}: {r['href']}" for r in results])
+    except asyncio.TimeoutError:
+        print("DuckDuckGo falló: tiempo agotado")
     except Exception as e:
         print(f"DuckDuckGo falló: {e}")
 
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return "No se pudieron obtener resultados de búsqueda (tiempo agotado)."
     try:
-        results = list(google_search(query, num_results=max_results))
+        results = await google_urls(query, max_results=max_results, timeout=remaining)
         if results:
             return "\n".join([f"- {url}" for url in results])
         else:
             return "No se encontraron resultados en Google."
+    except asyncio.TimeoutError:
+        print("Google falló: tiempo agotado")
+        return "No se pudieron obtener resultados de búsqueda (tiempo agotado)."
     except Exception as e:
         print(f"Google falló: {e}")
         return "No se pudieron obtener resultados de búsqueda."
     
 #--Herramienta para obtener el contenido en texto de una web segun la url --
-async def fetch_web_content(url: str) -> str:
-    """Obtiene el contenido en texto de una página web dada su URL."""
+@bounded_tool(timeout=25)
+async def fetch_web_content(url: str, query: str = "", max_tokens: int = 1500) -> str:
+    """Obtiene el contenido principal de una página web dada su URL.
+    Si se indica `query`, devuelve solo los pasajes más relevantes para esa consulta (hasta `max_tokens`)."""
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    soup = BeautifulSoup(html, "html.parser")
-                    return soup.get_text()
-                else:
-                    return f"Error al acceder a {url}: {response.status}"
+        # Descarga en streaming con tope de tamaño, sin menús/scripts, recortada al presupuesto
+        return await fetch_readable(url, query=query, max_tokens=max_tokens)
     except Exception as e:
         return f"Error al obtener contenido de {url}: {e}"
 
+#--Herramienta para obtener varias webs en paralelo en una sola llamada --
+@bounded_tool(timeout=30)
+async def fetch_many(urls: List[str], query: str = "", max_tokens_per_url: int = 800) -> str:
+    """Obtiene el contenido principal de varias páginas web a la vez (hasta 8 URLs).
+    Úsala en lugar de varias llamadas a fetch_web_content. `query` filtra los pasajes relevantes."""
+    results = await fetch_many_readable(urls, query=query, max_tokens_each=max_tokens_per_url)
+    if not results:
+        return "No se indicaron URLs."
+    return "\n\n".join(f"=== {i}. {url} ===\n{text}" for i, (url, text) in enumerate(results, 1))
+
 
 # --- Definir modelo Ollama ---
 model_info = ModelInfo(
@@ -57,69 +82,110 @@ model_info = ModelInfo(
     family="qwen3"
 )
 
-model_client = OllamaChatCompletionClient(
-    model="qwen3:0.6b",
+MODEL_NAME = "qwen3:0.6b"
+# Métricas por turno (TTFT, tokens/s, latencia de herramientas) en JSON lines
+METRICS_PATH = os.environ.get("AGENT_METRICS_PATH", "agent_metrics.jsonl")
+
+# Respuestas cacheadas en disco: repetir la misma tarea no vuelve a generar (LLM_CACHE=off para desactivar)
+model_client = with_cache(OllamaChatCompletionClient(
+    model=MODEL_NAME,
     model_info=model_info
-)
+))
 
-# Envolver la herramienta como Function
+# Cada agente ve una ventana acotada de la conversación: lo antiguo se resume con el modelo
+CONTEXT_TOKEN_BUDGET = 2048
 
 
 # --- Crear agentes especializados ---
-investigador = AssistantAgent(
-    name="investigador",
-    model_client=model_client,
-    # Pasa la función directamente aquí
-    tools=[web_search, fetch_web_content],
-    system_message=(
-        "Eres un investigador experto. "
-        "Tu tarea es buscar información confiable usando la función 'web_search'. "
-        "Si es necesario, también puedes usar 'fetch_web_content' para obtener información de páginas web."
-        "Devuelve únicamente datos y enlaces relevantes, sin interpretaciones largas."
-    ),
-    max_tool_iterations=3
-)
-
-redactor = AssistantAgent(
-    name="redactor",
-    model_client=model_client,
-    system_message=(
-        "Eres un redactor experto. "
-        "Recibes la información del investigador y la transformas en un texto claro, sencillo y bien explicado, "
-        "como si se lo contaras a alguien sin conocimientos técnicos."
+# Los agentes guardan el estado de la conversación: cada tarea necesita su propio equipo.
+# Varios equipos pueden compartir el mismo cliente (ver batch.py).
+def build_team(client=model_client, verbose: bool = True, limits: RunLimits = None):
+    """Crea un equipo nuevo sobre `client`; devuelve (team, contexts) con el contexto de cada agente.
+    `limits` fija rondas, tokens, plazo y convergencia de esta ejecución (por defecto, RunLimits.from_env())."""
+    limits = limits or RunLimits.from_env()
+    contexts = {name: SummarizingChatCompletionContext(client, name=name, token_budget=CONTEXT_TOKEN_BUDGET,
+                                                       verbose=verbose)
+                for name in ("investigador", "redactor", "verificador")}
+
+    investigador = AssistantAgent(
+        name="investigador",
+        model_client=client,
+        model_context=contexts["investigador"],
+        model_client_stream=True,
+        # Pasa la función directamente aquí
+        tools=[web_search, fetch_web_content, fetch_many],
+        system_message=(
+            "Eres un investigador experto. "
+            "Tu tarea es buscar información confiable usando la función 'web_search'. "
+            "Si es necesario, también puedes usar 'fetch_web_content' para obtener información de páginas web "
+            "(pasa la pregunta en 'query' para recibir solo los pasajes relevantes). "
+            "Para leer varias páginas usa 'fetch_many' con la lista de URLs en una sola llamada. "
+            "Puedes pedir varias herramientas a la vez (por ejemplo, varias búsquedas distintas): se ejecutan en paralelo. "
+            "Devuelve únicamente datos y enlaces relevantes, sin interpretaciones largas."
+        ),
+        max_tool_iterations=3
     )
-)
 
-verificador = AssistantAgent(
-    name="verificador",
-    model_client=model_client,
-    system_message=(
-        "Eres un verificador crítico. "
-        "Revisas la respuesta del redactor para detectar posibles errores, incoherencias o falta de claridad. "
-        "Tu respuesta debe ser la versión final, corregida y mejorada. "
-        "**Cuando la respuesta sea definitiva, finaliza tu mensaje con la palabra TERMINATE.**"
+    redactor = AssistantAgent(
+        name="redactor",
+        model_client=client,
+        model_context=contexts["redactor"],
+        model_client_stream=True,
+        system_message=(
+            "Eres un redactor experto. "
+            "Recibes la información del investigador y la transformas en un texto claro, sencillo y bien explicado, "
+            "como si se lo contaras a alguien sin conocimientos técnicos."
+        )
     )
-)
-# --- Team (RoundRobin = turno por turno) ---
-stop_condition = TextMentionTermination(text="TERMINATE")
 
-# Asigna la condición al crear el equipo
-team = RoundRobinGroupChat(
-    [investigador, redactor, verificador],
-    termination_condition=stop_condition
-)
+    verificador = AssistantAgent(
+        name="verificador",
+        model_client=client,
+        model_context=contexts["verificador"],
+        model_client_stream=True,
+        system_message=(
+            "Eres un verificador crítico. "
+            "Revisas la respuesta del redactor para detectar posibles errores, incoherencias o falta de claridad. "
+            "Tu respuesta debe ser la versión final, corregida y mejorada. "
+            "**Cuando la respuesta sea definitiva, finaliza tu mensaje con la palabra TERMINATE.**"
+        )
+    )
+    # --- Team (RoundRobin = turno por turno) ---
+    # TERMINATE o el primer presupuesto agotado: tokens, plazo o verificador sin cambios
+    stop_condition = build_termination(limits)
+
+    # Asigna la condición al crear el equipo; una ronda = un turno de cada agente
+    participants = [investigador, redactor, verificador]
+    team = RoundRobinGroupChat(
+        participants,
+        termination_condition=stop_condition,
+        max_turns=limits.max_rounds * len(participants) if limits.max_rounds else None
+    )
+    return team, contexts
 
 
 # --- Ejecución ---
 async def main():
     task = "¿Quién es David Montero Crespo de Uruguay?"
     
-    # Usa Console para imprimir la conversación en tiempo real
-    await Console(team.run_stream(task=task))
-
-    # Ya no necesitas las líneas de print, Console se encarga de todo.
+    limits = RunLimits.from_env()
+    team, contexts = build_team(limits=limits)
+    # Imprime los tokens en tiempo real y mide cada turno
+    metrics = RunMetrics(model=MODEL_NAME, task=task)
+    with HardDeadline(limits) as deadline:
+        try:
+            await stream_run(team.run_stream(task=task, cancellation_token=deadline.token), metrics)
+        except asyncio.CancelledError:
+            if not deadline.expired:
+                raise
+            print(f"\nEjecución cancelada: se superó el plazo de {deadline.seconds:.0f}s")
+    print(metrics.summary())
+    metrics.export_jsonl(METRICS_PATH)
+    for context in contexts.values():
+        print(context.report())
 
     await model_client.close()
+    await close_http_session()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,185 @@
+"""
+Ejecución por lotes del equipo de investigación.
+
+    python batch.py preguntas.jsonl [--output resultados.jsonl] [--concurrency 4]
+
+Cada línea de entrada es un objeto JSON con "task" (o "question"), opcionalmente "id" (por
+defecto, el número de línea) y límites propios ("max_rounds", "max_tokens", "deadline_seconds",
+"convergence_threshold") que sustituyen a los de la línea de comandos. Se ejecutan varios
+equipos a la vez sobre el mismo cliente de Ollama; la concurrencia debe coincidir con los
+slots paralelos del servidor (OLLAMA_NUM_PARALLEL), porque por encima de eso las peticiones
+solo esperan en cola.
+
+Cada resultado se añade a la salida en cuanto termina (flush + fsync). Al relanzar, las
+tareas con status "ok" en la salida se saltan y las fallidas se reintentan: la salida es el
+checkpoint. Al final se informa del rendimiento (tareas/hora, latencias, tokens).
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Set
+
+from agent import MODEL_NAME, build_team, model_client
+from http_pool import close_http_session
+from run_metrics import RunMetrics, stream_run
+from termination import HardDeadline, RunLimits
+
+DEFAULT_CONCURRENCY = int(os.environ.get("OLLAMA_NUM_PARALLEL", "") or 4)
+
+
+def read_tasks(path: Path) -> List[Dict[str, Any]]:
+    tasks = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"[batch] línea {number} ignorada: JSON inválido ({e})", file=sys.stderr)
+                continue
+            if isinstance(item, str):
+                item = {"task": item}
+            text = item.get("task") or item.get("question")
+            if not text:
+                print(f"[batch] línea {number} ignorada: falta 'task'", file=sys.stderr)
+                continue
+            limits = {k: item[k] for k in RunLimits.__slots__ if k in item}
+            tasks.append({"id": str(item.get("id", number)), "task": text, "limits": limits})
+    return tasks
+
+
+def completed_ids(path: Path) -> Set[str]:
+    """Ids con status "ok" en una salida anterior (las tareas con error se reintentan)."""
+    done: Set[str] = set()
+    if not path.exists():
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue                    # última línea cortada por una interrupción
+            if record.get("status") == "ok":
+                done.add(str(record.get("id")))
+    return done
+
+
+def final_answer(messages: List[Any]) -> str:
+    """Último texto del verificador (o del último agente que habló), sin la marca TERMINATE."""
+    texts = [m for m in messages if isinstance(getattr(m, "content", None), str) and m.source != "user"]
+    preferred = [m for m in texts if m.source == "verificador"] or texts
+    return preferred[-1].content.replace("TERMINATE", "").strip() if preferred else ""
+
+
+async def run_task(item: Dict[str, Any], defaults: RunLimits) -> Dict[str, Any]:
+    limits = defaults.override(**item["limits"])
+    team, _ = build_team(model_client, verbose=False, limits=limits)
+    metrics = RunMetrics(model=MODEL_NAME, task=item["task"])
+    record: Dict[str, Any] = {"id": item["id"], "task": item["task"], "model": MODEL_NAME,
+                              "limits": limits.to_dict()}
+    with HardDeadline(limits) as deadline:
+        try:
+            result = await stream_run(team.run_stream(task=item["task"], cancellation_token=deadline.token),
+                                      metrics, show=False)
+            record.update(status="ok", answer=final_answer(result.messages), stop_reason=result.stop_reason)
+        except asyncio.CancelledError:
+            if not deadline.expired:
+                raise
+            record.update(status="error", error=f"hard deadline of {deadline.seconds:.0f}s exceeded")
+        except Exception as e:
+            record.update(status="error", error=f"{type(e).__name__}: {e}")
+    turns = metrics.records()
+    record.update(
+        wall_s=round((metrics.finished or time.perf_counter()) - metrics.started, 3),
+        turns=len(turns),
+        prompt_tokens=sum(t["prompt_tokens"] for t in turns),
+        completion_tokens=sum(t["completion_tokens"] for t in turns),
+    )
+    return record
+
+
+async def run_batch(input_path: Path, output_path: Path, concurrency: int, limits: RunLimits) -> None:
+    tasks = read_tasks(input_path)
+    done = completed_ids(output_path)
+    pending = [t for t in tasks if t["id"] not in done]
+    print(f"[batch] {len(tasks)} tareas, {len(tasks) - len(pending)} ya completadas, "
+          f"{len(pending)} pendientes, {concurrency} equipos en paralelo")
+
+    queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+    for item in pending:
+        queue.put_nowait(item)
+    records: List[Dict[str, Any]] = []
+    started = time.perf_counter()
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        async def worker() -> None:
+            while True:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                record = await run_task(item, limits)
+                records.append(record)
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                os.fsync(out.fileno())
+                print(f"[batch] {len(records)}/{len(pending)} {record['id']}: {record['status']} "
+                      f"({record['wall_s']:.1f}s)")
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+    elapsed = time.perf_counter() - started
+    print(throughput_report(records, elapsed))
+
+
+def throughput_report(records: List[Dict[str, Any]], elapsed: float) -> str:
+    ok = [r for r in records if r["status"] == "ok"]
+    lines = [f"{'-' * 10} Lote ({MODEL_NAME}) {'-' * 10}",
+             f"Tareas ejecutadas: {len(records)}  ok: {len(ok)}  errores: {len(records) - len(ok)}",
+             f"Tiempo total: {elapsed:.1f} s   Rendimiento: {len(ok) / elapsed * 3600 if elapsed else 0:.1f} tareas/hora"]
+    if ok:
+        walls = sorted(r["wall_s"] for r in ok)
+        p95 = walls[min(len(walls) - 1, int(len(walls) * 0.95))]
+        tokens = sum(r["completion_tokens"] for r in ok)
+        lines.append(f"Latencia por tarea: media {statistics.mean(walls):.1f} s  p50 {statistics.median(walls):.1f} s  "
+                     f"p95 {p95:.1f} s")
+        lines.append(f"Tokens generados: {tokens}  ({tokens / elapsed:.1f} tok/s agregados)")
+    return "\n".join(lines)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Ejecuta preguntas de un JSONL con el equipo de investigación.")
+    parser.add_argument("input", type=Path, help="JSONL con una tarea por línea ({\"id\": ..., \"task\": ...})")
+    parser.add_argument("--output", type=Path, help="JSONL de resultados y checkpoint (por defecto <input>.results.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="equipos simultáneos; igual a OLLAMA_NUM_PARALLEL del servidor (por defecto %(default)s)")
+    defaults = RunLimits.from_env()
+    parser.add_argument("--max-rounds", type=int, default=defaults.max_rounds,
+                        help="rondas máximas por tarea, 0 = sin límite (por defecto %(default)s)")
+    parser.add_argument("--max-tokens", type=int, default=defaults.max_tokens,
+                        help="tokens totales por tarea, 0 = sin límite (por defecto %(default)s)")
+    parser.add_argument("--deadline", type=float, default=defaults.deadline_seconds,
+                        help="plazo en segundos por tarea, 0 = sin límite (por defecto %(default)s)")
+    parser.add_argument("--convergence", type=float, default=defaults.convergence_threshold,
+                        help="similitud entre respuestas del verificador para parar, 0 = desactivado "
+                             "(por defecto %(default)s)")
+    args = parser.parse_args()
+    output = args.output or args.input.with_suffix(".results.jsonl")
+    limits = RunLimits(max_rounds=args.max_rounds, max_tokens=args.max_tokens,
+                       deadline_seconds=args.deadline, convergence_threshold=args.convergence)
+    try:
+        await run_batch(args.input, output, args.concurrency, limits)
+    finally:
+        await model_client.close()
+        await close_http_session()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
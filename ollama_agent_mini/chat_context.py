@@ -0,0 +1,155 @@
+"""
+Contexto de conversación acotado para los agentes del equipo RoundRobin.
+
+Cada agente recibe por defecto la transcripción completa, que crece en cada ronda, y el
+modelo local tiene que procesarla entera antes de responder. SummarizingChatCompletionContext
+mantiene una ventana con presupuesto de tokens:
+
+1. La salida cruda de herramientas se recorta en cuanto la conversación avanzó después de
+   usarla (otro agente habló o el modelo respondió con texto): ya quedó condensada ahí.
+2. Si el contexto supera el presupuesto, los mensajes más antiguos se resumen con el propio
+   modelo en un único mensaje "Resumen de la conversación"; la tarea original se conserva.
+3. Cada llamada registra los tokens que tendría el prompt sin gestión y los que se envían.
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+from autogen_core.model_context import ChatCompletionContext
+from autogen_core.models import (
+    AssistantMessage,
+    ChatCompletionClient,
+    FunctionExecutionResultMessage,
+    LLMMessage,
+    SystemMessage,
+    UserMessage,
+)
+
+from content_extract import estimate_tokens
+
+DEFAULT_TOKEN_BUDGET = 2048
+KEEP_RECENT_RATIO = 0.5          # fracción del presupuesto que se conserva literal al resumir
+TOOL_OUTPUT_KEEP_CHARS = 300     # lo que queda de una salida de herramienta ya consumida
+SUMMARY_SOURCE = "resumen"
+SUMMARY_PROMPT = (
+    "Resume la conversación siguiente en español, en un máximo de 200 palabras. "
+    "Conserva los datos concretos, nombres, fechas, cifras y URLs encontrados, y lo que queda "
+    "pendiente. No añadas información nueva."
+)
+_THINK_RE = re.compile(r"<think>.*?</think>", re.DOTALL)
+
+
+def message_text(message: LLMMessage) -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    parts = []
+    for item in content:
+        # FunctionCall (name, arguments), FunctionExecutionResult (content) o imagen
+        text = getattr(item, "content", None)
+        if text is None and hasattr(item, "arguments"):
+            text = f"{item.name}({item.arguments})"
+        parts.append(text if isinstance(text, str) else "")
+    return "\n".join(parts)
+
+
+def message_tokens(message: LLMMessage) -> int:
+    return estimate_tokens(message_text(message)) + 4      # + rol y separadores
+
+
+def count_tokens(messages: List[LLMMessage]) -> int:
+    return sum(message_tokens(m) for m in messages)
+
+
+class SummarizingChatCompletionContext(ChatCompletionContext):
+    """Ventana de contexto con presupuesto de tokens que resume lo antiguo con `model_client`."""
+
+    def __init__(self, model_client: ChatCompletionClient, name: str = "",
+                 token_budget: int = DEFAULT_TOKEN_BUDGET, verbose: bool = True,
+                 initial_messages: Optional[List[LLMMessage]] = None) -> None:
+        super().__init__(initial_messages)
+        self._model_client = model_client
+        self._name = name
+        self._token_budget = token_budget
+        self._verbose = verbose
+        self._raw_tokens = count_tokens(self._messages)   # lo que ocuparía la transcripción completa
+        self.turns: List[Dict[str, Any]] = []
+
+    async def add_message(self, message: LLMMessage) -> None:
+        await super().add_message(message)
+        self._raw_tokens += message_tokens(message)
+
+    async def clear(self) -> None:
+        await super().clear()
+        self._raw_tokens = 0
+        self.turns = []
+
+    async def get_messages(self) -> List[LLMMessage]:
+        self._condense_tool_output()
+        summarized = 0
+        if count_tokens(self._messages) > self._token_budget:
+            summarized = await self._summarize_oldest()
+        sent = count_tokens(self._messages)
+        self.turns.append({"turn": len(self.turns) + 1, "raw_tokens": self._raw_tokens,
+                           "prompt_tokens": sent, "summarized_messages": summarized})
+        if self._verbose:
+            note = f", {summarized} mensajes resumidos" if summarized else ""
+            print(f"[contexto {self._name}] turno {len(self.turns)}: ~{self._raw_tokens} -> ~{sent} tokens{note}")
+        return list(self._messages)
+
+    def report(self) -> str:
+        """Tabla por turno: tokens de la transcripción completa frente a los enviados."""
+        lines = [f"Contexto de {self._name or 'agente'} (tokens estimados)", "  turno  completo  enviado"]
+        for t in self.turns:
+            lines.append(f"  {t['turn']:>5}  {t['raw_tokens']:>8}  {t['prompt_tokens']:>7}")
+        return "\n".join(lines)
+
+    # ------------------------------------------------------------------ #
+    def _condense_tool_output(self) -> None:
+        """Recorta los resultados de herramientas que ya fueron seguidos por texto de otro turno."""
+        consumed = False
+        for i in range(len(self._messages) - 1, -1, -1):
+            message = self._messages[i]
+            if isinstance(message, UserMessage) or (
+                    isinstance(message, AssistantMessage) and isinstance(message.content, str)):
+                consumed = True
+            elif isinstance(message, FunctionExecutionResultMessage) and consumed:
+                results = [r if len(r.content) <= TOOL_OUTPUT_KEEP_CHARS else r.model_copy(update={
+                    "content": f"{r.content[:TOOL_OUTPUT_KEEP_CHARS]}… "
+                               f"[~{estimate_tokens(r.content)} tokens de salida omitidos]"})
+                           for r in message.content]
+                self._messages[i] = FunctionExecutionResultMessage(content=results)
+
+    async def _summarize_oldest(self) -> int:
+        """Sustituye los mensajes antiguos por un resumen; devuelve cuántos se resumieron."""
+        # La tarea original (primer mensaje del usuario) se mantiene siempre
+        pinned = 1 if self._messages and isinstance(self._messages[0], UserMessage) \
+            and self._messages[0].source != SUMMARY_SOURCE else 0
+        keep_budget = int(self._token_budget * KEEP_RECENT_RATIO)
+        split, kept = len(self._messages), 0
+        while split - 1 > pinned and kept + message_tokens(self._messages[split - 1]) <= keep_budget:
+            split -= 1
+            kept += message_tokens(self._messages[split])
+        split = min(split, len(self._messages) - 1)       # el último mensaje nunca se resume
+        # Un resultado de herramienta no puede quedar separado de su llamada
+        while split > pinned and isinstance(self._messages[split], FunctionExecutionResultMessage):
+            split -= 1
+        older = self._messages[pinned:split]
+        if not older:
+            return 0
+
+        transcript = "\n\n".join(f"[{getattr(m, 'source', 'herramienta')}] {message_text(m)}" for m in older)
+        try:
+            result = await self._model_client.create([
+                SystemMessage(content=SUMMARY_PROMPT),
+                UserMessage(content=transcript, source="user"),
+            ])
+            summary = _THINK_RE.sub("", result.content if isinstance(result.content, str) else "").strip()
+        except Exception as e:
+            print(f"[contexto {self._name}] no se pudo resumir ({e}); se descartan los mensajes antiguos")
+            summary = ""
+        if not summary:
+            # Sin resumen: se conserva el comienzo de cada mensaje descartado
+            summary = "\n".join(f"- {message_text(m)[:200]}" for m in older if isinstance(m, UserMessage))
+        self._messages[pinned:split] = [
+            UserMessage(content=f"Resumen de la conversación anterior:\n{summary}", source=SUMMARY_SOURCE)]
+        return len(older)
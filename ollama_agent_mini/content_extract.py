@@ -0,0 +1,246 @@
+"""
+Extracción del contenido legible de una página y selección de pasajes para el LLM.
+
+1. Se descarga el HTML en streaming con un tope de bytes (http_pool.fetch_limited).
+2. Se eliminan scripts, estilos, navegación, pies, banners, etc. (por etiqueta y por
+   clases/ids típicos de "boilerplate") y se prefiere el contenedor <article>/<main>.
+3. Se conservan los bloques de texto (párrafos, listas, títulos...) con poca densidad de
+   enlaces, se agrupan en fragmentos y, si hay consulta, se puntúan con BM25.
+4. Se devuelven los mejores fragmentos en orden de aparición hasta el presupuesto de tokens.
+"""
+import asyncio
+import math
+import re
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from html_parser import Node, parse_html
+from http_pool import fetch_limited
+
+MAX_DOWNLOAD_BYTES = 2 * 1024 * 1024
+DEFAULT_MAX_TOKENS = 1500
+CHUNK_TOKENS = 180
+MIN_BLOCK_CHARS = 40             # bloques más cortos solo se guardan si son títulos
+MAX_LINK_DENSITY = 0.5           # proporción de texto dentro de enlaces (menús, listas de links)
+FETCH_MANY_MAX_URLS = 8
+FETCH_MANY_PER_HOST = 2          # descargas simultáneas contra un mismo host en fetch_many
+FETCH_MANY_DEADLINE = 20.0       # segundos para el lote completo
+
+# <form> no se incluye: en ASP.NET WebForms y similares envuelve la página entera
+BOILERPLATE_TAGS = "script, style, noscript, template, svg, canvas, iframe, button, nav, header, footer, aside"
+# Un nodo con clase/id de "boilerplate" solo se elimina si tiene menos de esta fracción del
+# texto de la página y no contiene el contenedor principal (evita borrar envoltorios como
+# <div class="layout has-sidebar"> que rodean el artículo)
+BOILERPLATE_MAX_SHARE = 0.3
+MAIN_SELECTOR = "article, main, [role=main]"
+_BOILERPLATE_RE = re.compile(
+    r"(^|[\s_-])(nav|navbar|menu|footer|header|sidebar|side-bar|cookie|consent|banner|advert|ads?|promo|"
+    r"share|social|related|recommend|breadcrumbs?|popup|modal|newsletter|subscribe|comments?|skip)($|[\s_-])",
+    re.IGNORECASE)
+BLOCK_SELECTOR = "h1, h2, h3, h4, p, li, pre, blockquote, td, dd, dt, figcaption"
+HEADINGS = {"h1", "h2", "h3", "h4"}
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+# Palabras vacías frecuentes (es/en) que no deben puntuar en la consulta
+_STOPWORDS = set(
+    "de la el en y a los las del se que un una por con para es al lo como su sus o u the of and to in "
+    "is for on with as by an be at or are from that this it who what quien quién qué cual cuál".split())
+
+
+def estimate_tokens(text: str) -> int:
+    """Aproximación barata (≈4 caracteres por token) suficiente para presupuestar."""
+    return len(text) // 4 + 1
+
+
+def _terms(text: str) -> List[str]:
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return [w for w in _WORD_RE.findall(text) if w not in _STOPWORDS and len(w) > 1]
+
+
+def _tag_of(node: Node) -> str:
+    raw = getattr(node, "_node", None)
+    tag = getattr(raw, "tag", None) or getattr(raw, "name", None) or ""
+    return tag.lower() if isinstance(tag, str) else ""
+
+
+def extract_blocks(html: bytes) -> Tuple[str, List[str]]:
+    """Devuelve (título, bloques de texto principales en orden de documento)."""
+    doc = parse_html(html)
+    title_node = doc.select_one("title")
+    title = title_node.text() if title_node else ""
+    doc.remove(BOILERPLATE_TAGS)
+    page_chars = len(doc.text())
+    for node in doc.select("[class], [id], [role]"):
+        marker = f"{node.attr('class')} {node.attr('id')}"
+        if _BOILERPLATE_RE.search(marker) or node.attr("role") in ("navigation", "banner", "contentinfo"):
+            if len(node.text()) < BOILERPLATE_MAX_SHARE * page_chars and not node.select(MAIN_SELECTOR):
+                node.drop()
+
+    # Contenedor principal si existe y tiene texto suficiente
+    root = doc
+    for css in ("article", "main", "[role=main]"):
+        candidates = [n for n in doc.select(css) if len(n.text()) > 500]
+        if candidates:
+            root = max(candidates, key=lambda n: len(n.text()))
+            break
+
+    blocks: List[str] = []
+    seen = set()
+    for node in root.select(BLOCK_SELECTOR):
+        text = node.text()
+        if not text or text in seen:
+            continue
+        is_heading = _tag_of(node) in HEADINGS
+        if not is_heading and len(text) < MIN_BLOCK_CHARS:
+            continue
+        link_chars = sum(len(a.text()) for a in node.select("a"))
+        if not is_heading and link_chars / len(text) > MAX_LINK_DENSITY:
+            continue
+        seen.add(text)
+        blocks.append(f"## {text}" if is_heading else text)
+
+    if not blocks:
+        # Página sin marcado de bloques (texto plano, divs): líneas del texto visible
+        blocks = [line for line in (l.strip() for l in root.raw_text().splitlines())
+                  if len(line) >= MIN_BLOCK_CHARS]
+    # Elimina repeticiones de bloques anidados (li que contiene p, etc.)
+    return title, [b for i, b in enumerate(blocks) if not any(b != o and b in o for o in blocks[max(0, i - 1):i + 2])]
+
+
+def chunk_blocks(blocks: List[str], chunk_tokens: int = CHUNK_TOKENS) -> List[str]:
+    """Agrupa bloques consecutivos en fragmentos de ~chunk_tokens; un título abre fragmento nuevo."""
+    chunks, current, size = [], [], 0
+    for block in blocks:
+        tokens = estimate_tokens(block)
+        if current and (size + tokens > chunk_tokens or block.startswith("## ")):
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        if tokens > chunk_tokens * 2:
+            # Bloque enorme (pre, párrafo gigante): se parte por frases
+            sentences = re.split(r"(?<=[.!?])\s+", block)
+            piece = ""
+            for sentence in sentences:
+                if piece and estimate_tokens(piece + sentence) > chunk_tokens:
+                    chunks.append(piece.strip())
+                    piece = ""
+                piece += sentence + " "
+            if piece.strip():
+                current, size = [piece.strip()], estimate_tokens(piece)
+            continue
+        current.append(block)
+        size += tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def select_passages(chunks: List[str], query: str = "", max_tokens: int = DEFAULT_MAX_TOKENS) -> List[int]:
+    """
+    Índices de los fragmentos a devolver. Con consulta: BM25 (k1=1.5, b=0.75) y los mejores
+    hasta el presupuesto; sin consulta (o sin coincidencias): los primeros en orden.
+    """
+    query_terms = set(_terms(query))
+    order = list(range(len(chunks)))
+    if query_terms and chunks:
+        docs = [Counter(_terms(c)) for c in chunks]
+        avg_len = sum(sum(d.values()) for d in docs) / len(docs) or 1.0
+        df = Counter(t for d in docs for t in query_terms if t in d)
+        n = len(docs)
+
+        def bm25(d: Counter) -> float:
+            length = sum(d.values())
+            score = 0.0
+            for t in query_terms:
+                if t in d:
+                    idf = math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5))
+                    tf = d[t]
+                    score += idf * tf * 2.5 / (tf + 1.5 * (0.25 + 0.75 * length / avg_len))
+            return score
+
+        scores = [bm25(d) for d in docs]
+        if any(scores):
+            order = sorted(order, key=lambda i: (-scores[i], i))
+            order = [i for i in order if scores[i] > 0] + [i for i in order if scores[i] == 0]
+    chosen, used = [], 0
+    for i in order:
+        tokens = estimate_tokens(chunks[i])
+        if used + tokens > max_tokens:
+            if not chosen:                      # al menos algo, recortado
+                chosen.append(i)
+            continue
+        chosen.append(i)
+        used += tokens
+    return sorted(chosen)
+
+
+def readable_text(html: bytes, query: str = "", max_tokens: int = DEFAULT_MAX_TOKENS) -> Tuple[str, str, int]:
+    """Devuelve (título, pasajes seleccionados, tokens estimados de la página completa)."""
+    title, blocks = extract_blocks(html)
+    chunks = chunk_blocks(blocks)
+    chosen = select_passages(chunks, query, max_tokens)
+    passages = []
+    previous = None
+    for i in chosen:
+        if previous is not None and i != previous + 1:
+            passages.append("[...]")
+        text = chunks[i]
+        if estimate_tokens(text) > max_tokens:
+            text = text[:max_tokens * 4] + " [...]"
+        passages.append(text)
+        previous = i
+    total_tokens = sum(estimate_tokens(c) for c in chunks)
+    return title, "\n\n".join(passages), total_tokens
+
+
+async def fetch_readable(url: str, query: str = "", max_tokens: int = DEFAULT_MAX_TOKENS,
+                         max_bytes: int = MAX_DOWNLOAD_BYTES) -> str:
+    """Descarga `url` y devuelve sus pasajes principales (o un mensaje de error) para el LLM."""
+    status, content_type, body, truncated = await fetch_limited(url, max_bytes)
+    if status != 200:
+        return f"Error al acceder a {url}: {status}"
+    if content_type and not any(t in content_type for t in ("html", "xml", "text")):
+        return f"Contenido no textual en {url} ({content_type}); no se extrajo texto."
+    title, text, total_tokens = readable_text(body, query, max_tokens)
+    if not text:
+        return f"No se encontró contenido legible en {url}."
+    header = f"Fuente: {url}\n"
+    if title:
+        header += f"Título: {title}\n"
+    header += f"(~{estimate_tokens(text)} de ~{total_tokens} tokens de contenido"
+    header += f"; descarga cortada en {max_bytes // 1024} KiB)" if truncated else ")"
+    return f"{header}\n\n{text}"
+
+
+async def fetch_many_readable(urls: List[str], query: str = "", max_tokens_each: int = 800,
+                              deadline: float = FETCH_MANY_DEADLINE,
+                              per_host: int = FETCH_MANY_PER_HOST) -> List[Tuple[str, str]]:
+    """
+    Descarga varias URLs a la vez (máximo `per_host` simultáneas por host) bajo un plazo global.
+    Devuelve [(url, texto o mensaje de error)] en el orden recibido, sin duplicados.
+    """
+    unique = list(dict.fromkeys(u.strip() for u in urls if u and u.strip()))[:FETCH_MANY_MAX_URLS]
+    host_limits: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(per_host))
+
+    async def one(url: str) -> str:
+        async with host_limits[urlsplit(url).netloc.lower()]:
+            try:
+                return await fetch_readable(url, query=query, max_tokens=max_tokens_each)
+            except Exception as e:
+                return f"Error al obtener contenido de {url}: {e}"
+
+    tasks = {url: asyncio.ensure_future(one(url)) for url in unique}
+    started = time.monotonic()
+    if tasks:
+        await asyncio.wait(tasks.values(), timeout=deadline)
+    results = []
+    for url, task in tasks.items():
+        if task.done():
+            results.append((url, task.result()))
+        else:
+            task.cancel()
+            results.append((url, f"Tiempo agotado ({time.monotonic() - started:.0f}s) al obtener {url}"))
+    return results
+
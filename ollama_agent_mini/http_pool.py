@@ -0,0 +1,177 @@
+"""
+Conexiones HTTP compartidas para las herramientas asíncronas del agente.
+
+Una única aiohttp.ClientSession por event loop (un TCPConnector con keep-alive, límite
+global y por host, y caché de DNS) en lugar de abrir una sesión nueva por URL. Las
+peticiones GET se reintentan con backoff exponencial ante errores de conexión y
+respuestas 429/5xx. aiohttp descomprime gzip/deflate, y brotli si está instalado.
+"""
+import asyncio
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+CONNECTION_LIMIT = 64           # conexiones abiertas en total
+CONNECTION_LIMIT_PER_HOST = 8   # conexiones simultáneas contra un mismo host
+DNS_CACHE_SECONDS = 300
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=20, connect=10)
+RETRIES = 2
+RETRY_BACKOFF = 0.3             # 0.3 s, 0.6 s, ...
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/124.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Encoding": ACCEPT_ENCODING,
+}
+
+_sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Sesión compartida del event loop actual; se crea en el primer uso."""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(limit=CONNECTION_LIMIT, limit_per_host=CONNECTION_LIMIT_PER_HOST,
+                                         ttl_dns_cache=DNS_CACHE_SECONDS)
+        session = aiohttp.ClientSession(connector=connector, timeout=REQUEST_TIMEOUT,
+                                        headers=DEFAULT_HEADERS)
+        _sessions[loop] = session
+    return session
+
+
+async def close_http_session() -> None:
+    """Cierra la sesión del loop actual (llamar al terminar la ejecución)."""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+async def get_with_retry(url: str, **kwargs) -> aiohttp.ClientResponse:
+    """
+    GET con reintentos. Devuelve la respuesta abierta (usar con `async with`).
+    Tras agotar los reintentos devuelve la última respuesta 429/5xx o relanza el error de conexión.
+    """
+    session = get_http_session()
+    for attempt in range(RETRIES + 1):
+        last = attempt == RETRIES
+        try:
+            response = await session.get(url, **kwargs)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if last:
+                raise
+        else:
+            if response.status not in RETRY_STATUSES or last:
+                return response
+            retry_after = response.headers.get("Retry-After", "")
+            response.release()
+            if retry_after.isdigit():
+                await asyncio.sleep(min(float(retry_after), 10.0))
+                continue
+        await asyncio.sleep(RETRY_BACKOFF * (2 ** attempt))
+    raise RuntimeError("unreachable")
+
+
+async def fetch_text(url: str, **kwargs) -> Tuple[int, str]:
+    """Descarga una URL y devuelve (status, texto)."""
+    async with await get_with_retry(url, **kwargs) as response:
+        return response.status, await response.text(errors="replace")
+
+
+async def fetch_limited(url: str, max_bytes: int, chunk_bytes: int = 64 * 1024,
+                        **kwargs) -> Tuple[int, str, bytes, bool]:
+    """
+    Descarga el cuerpo en streaming y corta la descarga al superar `max_bytes`.
+    Devuelve (status, content_type, cuerpo, truncado). Si la respuesta no es 200 no lee el cuerpo.
+    """
+    async with await get_with_retry(url, **kwargs) as response:
+        content_type = response.headers.get("Content-Type", "")
+        if response.status != 200:
+            return response.status, content_type, b"", False
+        parts = []
+        received = 0
+        truncated = False
+        async for chunk in response.content.iter_chunked(chunk_bytes):
+            parts.append(chunk)
+            received += len(chunk)
+            if received >= max_bytes:
+                truncated = True
+                break
+        body = b"".join(parts)[:max_bytes]
+        if truncated:
+            response.close()            # no devolver al pool una conexión con cuerpo pendiente
+        return response.status, content_type, body, truncated
+
+
+if __name__ == "__main__":
+    # Benchmark contra un servidor local: ClientSession nueva por URL vs sesión compartida
+    import statistics
+    import threading
+    import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    body = b"<html><body>" + b"<p>contenido</p>" * 500 + b"</body></html>"
+    hits = {"n": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            hits["n"] += 1
+            if self.path.startswith("/flaky") and hits["n"] % 2:
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    async def per_url_session(url):
+        async with aiohttp.ClientSession() as session:
+            async with session.get(url) as response:
+                return await response.text()
+
+    async def shared_session(url):
+        return (await fetch_text(url))[1]
+
+    async def bench(fetch, n=200):
+        await fetch(base + "/page")
+        samples = []
+        for _ in range(n):
+            t0 = time.perf_counter()
+            await fetch(base + "/page")
+            samples.append(time.perf_counter() - t0)
+        return statistics.median(samples) * 1000
+
+    async def main():
+        cold = await bench(per_url_session)
+        pooled = await bench(shared_session)
+        print(f"ClientSession per URL: {cold:.3f} ms   shared session: {pooled:.3f} ms   "
+              f"({cold / pooled:.1f}x, median of 200)")
+        t0 = time.perf_counter()
+        await asyncio.gather(*(shared_session(f"{base}/page?{i}") for i in range(50)))
+        print(f"50 concurrent fetches (limit {CONNECTION_LIMIT_PER_HOST}/host): {time.perf_counter() - t0:.3f}s")
+        status, _ = await fetch_text(base + "/flaky")
+        print(f"flaky endpoint after retry: {status}")
+        await close_http_session()
+
+    asyncio.run(main())
+    server.shutdown()
@@ -0,0 +1,148 @@
+"""
+Caché de respuestas del modelo para los scripts de Ollama.
+
+Reutiliza ChatCompletionCache de autogen_ext (que ya calcula la clave con los mensajes, las
+herramientas, json_output y extra_create_args, y cubre create y create_stream) con un
+almacén propio: LRU en memoria respaldado por una tabla SQLite en disco con límite de
+entradas. Las claves llevan como prefijo un hash de la configuración del cliente (modelo,
+opciones como temperature o num_ctx, formato...) para que dos modelos no compartan respuestas.
+
+LLM_CACHE controla el uso: "on" (por defecto), "off" (sin caché) o "refresh" (ignora lo
+guardado y lo reescribe con respuestas nuevas).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+from autogen_core import CacheStore
+from autogen_core.models import ChatCompletionClient, CreateResult
+from autogen_ext.models.cache import CHAT_CACHE_VALUE_TYPE, ChatCompletionCache
+
+MEMORY_ENTRIES = 256
+DISK_ENTRIES = 5000
+DEFAULT_DB_PATH = os.environ.get(
+    "LLM_CACHE_DB", str(Path.home() / ".cache" / "ibm_agent" / "llm_cache.sqlite3"))
+CACHE_MODES = ("on", "off", "refresh")
+# Claves de configuración que no cambian la respuesta del modelo
+_CONNECTION_KEYS = {"host", "timeout", "headers", "follow_redirects", "verify", "cert", "proxy", "proxies"}
+
+
+def cache_mode() -> str:
+    mode = os.environ.get("LLM_CACHE", "on").strip().lower()
+    return mode if mode in CACHE_MODES else "on"
+
+
+def client_namespace(client: ChatCompletionClient) -> str:
+    """Hash corto de la configuración del cliente que afecta a la respuesta."""
+    try:
+        config = client.dump_component().config
+    except Exception:
+        config = {"model": getattr(client, "_model_name", type(client).__name__)}
+    relevant = {k: v for k, v in config.items() if k not in _CONNECTION_KEYS}
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _dump(value: CHAT_CACHE_VALUE_TYPE) -> str:
+    if isinstance(value, CreateResult):
+        return value.model_dump_json()
+    # Resultado de create_stream: fragmentos de texto y el CreateResult final
+    return json.dumps([v if isinstance(v, str) else v.model_dump(mode="json") for v in value], ensure_ascii=False)
+
+
+class SQLiteCacheStore(CacheStore[CHAT_CACHE_VALUE_TYPE]):
+    """LRU en memoria + SQLite con expulsión de las entradas menos usadas. Thread-safe."""
+
+    def __init__(self, db_path: Optional[str] = DEFAULT_DB_PATH, namespace: str = "",
+                 max_entries: int = DISK_ENTRIES, memory_entries: int = MEMORY_ENTRIES,
+                 refresh: bool = False) -> None:
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            try:
+                Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS completions ("
+                    " key TEXT PRIMARY KEY, last_used REAL NOT NULL, payload TEXT NOT NULL)")
+                self._db.execute("CREATE INDEX IF NOT EXISTS completions_lru ON completions (last_used)")
+            except (sqlite3.Error, OSError) as e:
+                # Directorio no creable o base inaccesible: la caché sigue solo en memoria
+                print(f"[llm_cache] disk cache disabled: {e}")
+                if self._db is not None:
+                    self._db.close()
+                self._db = None
+
+    def get(self, key: str, default: Optional[CHAT_CACHE_VALUE_TYPE] = None) -> Any:
+        # ChatCompletionCache reconstruye los CreateResult a partir del JSON devuelto
+        key = f"{self.namespace}:{key}"
+        with self._lock:
+            if self.refresh:
+                self.misses += 1
+                return default
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+            elif self._db is not None:
+                try:
+                    row = self._db.execute("SELECT payload FROM completions WHERE key = ?", (key,)).fetchone()
+                    if row:
+                        payload = row[0]
+                        self._db.execute("UPDATE completions SET last_used = ? WHERE key = ?", (time.time(), key))
+                        self._remember(key, payload)
+                except sqlite3.Error:
+                    payload = None
+            if payload is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return payload
+
+    def set(self, key: str, value: CHAT_CACHE_VALUE_TYPE) -> None:
+        key = f"{self.namespace}:{key}"
+        payload = _dump(value)
+        with self._lock:
+            self._remember(key, payload)
+            if self._db is not None:
+                try:
+                    self._db.execute("INSERT OR REPLACE INTO completions (key, last_used, payload) VALUES (?, ?, ?)",
+                                     (key, time.time(), payload))
+                    self._db.execute(
+                        "DELETE FROM completions WHERE key IN (SELECT key FROM completions"
+                        " ORDER BY last_used DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+                except sqlite3.Error as e:
+                    print(f"[llm_cache] disk cache write failed: {e}")
+
+    def _remember(self, key: str, payload: str) -> None:
+        self._memory[key] = payload
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> str:
+        return (f"hits={self.hits} misses={self.misses} mode={'refresh' if self.refresh else 'on'}"
+                f"{' +sqlite' if self._db is not None else ''}")
+
+
+def with_cache(client: ChatCompletionClient, db_path: Optional[str] = DEFAULT_DB_PATH,
+               mode: Optional[str] = None) -> ChatCompletionClient:
+    """Envuelve `client` con la caché (o lo devuelve tal cual si el modo es "off")."""
+    mode = mode or cache_mode()
+    if mode == "off":
+        return client
+    store = SQLiteCacheStore(db_path, namespace=client_namespace(client), refresh=mode == "refresh")
+    return ChatCompletionCache(client, store)
+
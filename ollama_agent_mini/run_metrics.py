@@ -0,0 +1,207 @@
+"""
+Ejecución en streaming con métricas de latencia por turno de agente.
+
+stream_run() sustituye a Console: consume run_stream() de un agente o equipo, imprime los
+tokens del modelo a medida que llegan (los agentes deben crearse con model_client_stream=True)
+y registra en RunMetrics, para cada turno:
+
+- ttft_s: tiempo hasta el primer token (o la primera llamada a herramienta) del turno
+- wall_s: duración total del turno
+- completion_tokens / prompt_tokens: uso informado por el modelo
+- tokens_per_s: tokens generados / tiempo de modelo (duración del turno menos herramientas)
+- tools: latencia de cada llamada a herramienta (de la petición al resultado)
+
+Los turnos se pueden exportar como JSON lines para comparar modelos (qwen3:0.6b vs llama3.2).
+"""
+import json
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from autogen_agentchat.base import Response, TaskResult
+from autogen_agentchat.messages import (
+    BaseChatMessage,
+    ModelClientStreamingChunkEvent,
+    ThoughtEvent,
+    ToolCallExecutionEvent,
+    ToolCallRequestEvent,
+    UserInputRequestedEvent,
+)
+
+USER_SOURCE = "user"
+
+
+class TurnMetrics:
+    """Métricas de un turno (un agente respondiendo una vez)."""
+
+    __slots__ = ("agent", "turn", "started", "first_output", "finished", "prompt_tokens",
+                 "completion_tokens", "chunks", "tools", "tool_time", "_pending_tools", "_batch_started")
+
+    def __init__(self, agent: str, turn: int, started: float):
+        self.agent = agent
+        self.turn = turn
+        self.started = started
+        self.first_output: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.chunks = 0
+        self.tools: List[Dict[str, Any]] = []
+        self.tool_time = 0.0                # tiempo de pared en herramientas (lotes concurrentes)
+        self._pending_tools: List[Any] = []
+        self._batch_started: Optional[float] = None
+
+    def mark_output(self, now: float) -> None:
+        if self.first_output is None:
+            self.first_output = now
+
+    def add_usage(self, message: Any) -> None:
+        usage = getattr(message, "models_usage", None)
+        if usage is not None:
+            self.prompt_tokens += usage.prompt_tokens
+            self.completion_tokens += usage.completion_tokens
+
+    def tool_requested(self, call_id: str, name: str, now: float) -> None:
+        if self._batch_started is None:
+            self._batch_started = now
+        self._pending_tools.append((call_id, name, now))
+
+    def tool_finished(self, call_id: str, is_error: bool, now: float) -> None:
+        # Ollama no asigna ids a las llamadas (pueden repetirse): se empareja por id y en orden
+        index = next((i for i, p in enumerate(self._pending_tools) if p[0] == call_id), 0)
+        _, name, requested = self._pending_tools.pop(index) if self._pending_tools else ("", "?", now)
+        self.tools.append({"name": name, "latency_s": round(now - requested, 3), "error": is_error})
+        if not self._pending_tools and self._batch_started is not None:
+            self.tool_time += now - self._batch_started
+            self._batch_started = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        finished = self.finished if self.finished is not None else time.perf_counter()
+        wall = finished - self.started
+        model_time = max(wall - self.tool_time, 1e-6)
+        return {
+            "agent": self.agent,
+            "turn": self.turn,
+            "ttft_s": round(self.first_output - self.started, 3) if self.first_output is not None else None,
+            "wall_s": round(wall, 3),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_per_s": round(self.completion_tokens / model_time, 2) if self.completion_tokens else None,
+            "stream_chunks": self.chunks,
+            "tools": self.tools,
+        }
+
+
+class RunMetrics:
+    """Turnos de una ejecución, con etiqueta de modelo y tarea para la exportación."""
+
+    def __init__(self, model: str = "", task: str = ""):
+        self.model = model
+        self.task = task
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.turns: List[TurnMetrics] = []
+        self.stop_reason: Optional[str] = None
+
+    def records(self) -> List[Dict[str, Any]]:
+        return [dict(turn.to_dict(), model=self.model, task=self.task) for turn in self.turns]
+
+    def export_jsonl(self, path: str) -> None:
+        """Añade un registro JSON por turno al fichero (se acumulan ejecuciones)."""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            for record in self.records():
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def summary(self) -> str:
+        total = (self.finished or time.perf_counter()) - self.started
+        lines = [f"{'-' * 10} Métricas ({self.model or 'modelo'}) {'-' * 10}",
+                 f"{'turno':>5}  {'agente':<14} {'TTFT s':>7} {'total s':>8} {'tok/s':>6} "
+                 f"{'prompt':>7} {'gen':>5}  herramientas"]
+        for r in (turn.to_dict() for turn in self.turns):
+            tools = ", ".join(f"{t['name']} {t['latency_s']:.2f}s" for t in r["tools"]) or "-"
+            ttft = f"{r['ttft_s']:.2f}" if r["ttft_s"] is not None else "-"
+            tps = f"{r['tokens_per_s']:.1f}" if r["tokens_per_s"] is not None else "-"
+            lines.append(f"{r['turn']:>5}  {r['agent']:<14} {ttft:>7} {r['wall_s']:>8.2f} {tps:>6} "
+                         f"{r['prompt_tokens']:>7} {r['completion_tokens']:>5}  {tools}")
+        lines.append(f"Tiempo total: {total:.2f} s   Fin: {self.stop_reason or '-'}")
+        return "\n".join(lines)
+
+
+async def stream_run(stream: AsyncIterator[Any], metrics: Optional[RunMetrics] = None,
+                     show: bool = True) -> Any:
+    """
+    Consume `stream` (run_stream / on_messages_stream) mostrando los tokens en vivo y
+    registrando métricas en `metrics`. Devuelve el TaskResult (o Response) final.
+    """
+    metrics = metrics if metrics is not None else RunMetrics()
+    current: Optional[TurnMetrics] = None
+    boundary = time.perf_counter()          # fin del turno anterior = inicio del siguiente
+    streaming = False
+    last = None
+
+    def out(text: str = "", end: str = "\n") -> None:
+        if show:
+            print(text, end=end, flush=True)
+
+    async for message in stream:
+        now = time.perf_counter()
+        if isinstance(message, (TaskResult, Response)):
+            last = message
+            if isinstance(message, Response):
+                # on_messages_stream de un solo agente: el mensaje final viene dentro de Response
+                message = message.chat_message
+            else:
+                metrics.stop_reason = message.stop_reason
+                continue
+        if isinstance(message, UserInputRequestedEvent):
+            continue
+
+        source = message.source
+        if source == USER_SOURCE:
+            out(f"{'-' * 10} {source} {'-' * 10}\n{message.to_text()}")
+            boundary = now
+            continue
+        if current is None or current.agent != source or current.finished is not None:
+            current = TurnMetrics(source, len(metrics.turns) + 1, boundary)
+            metrics.turns.append(current)
+            out(f"{'-' * 10} {source} {'-' * 10}")
+
+        if isinstance(message, (ModelClientStreamingChunkEvent, ThoughtEvent)):
+            current.mark_output(now)
+            if isinstance(message, ModelClientStreamingChunkEvent):
+                current.chunks += 1
+            out(message.content, end="")
+            streaming = True
+            continue
+        if streaming:
+            out()
+            streaming = False
+
+        if isinstance(message, ToolCallRequestEvent):
+            current.mark_output(now)
+            current.add_usage(message)
+            for call in message.content:
+                current.tool_requested(call.id, call.name, now)
+                out(f"[herramienta] {call.name}({call.arguments})")
+        elif isinstance(message, ToolCallExecutionEvent):
+            for result in message.content:
+                current.tool_finished(result.call_id, result.is_error, now)
+            out("[resultado] " + " | ".join(f"{r.name}: {len(r.content)} caracteres" for r in message.content))
+        elif isinstance(message, BaseChatMessage):
+            # Mensaje final del turno; si no hubo streaming (o es el resumen de herramientas) se imprime
+            current.mark_output(now)
+            current.add_usage(message)
+            if not current.chunks or message.__class__.__name__ == "ToolCallSummaryMessage":
+                out(message.to_text())
+            current.finished = now
+            boundary = now
+            turn = current.to_dict()
+            stats = [f"{turn['wall_s']:.2f}s"]
+            if turn["ttft_s"] is not None:
+                stats.insert(0, f"TTFT {turn['ttft_s']:.2f}s")
+            if turn["tokens_per_s"] is not None:
+                stats.append(f"{turn['tokens_per_s']:.1f} tok/s")
+            out(f"[{' · '.join(stats)}]")
+    metrics.finished = time.perf_counter()
+    return last
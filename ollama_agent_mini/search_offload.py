@@ -0,0 +1,78 @@
+"""
+Búsquedas web sin bloquear el event loop.
+
+duckduckgo_search y googlesearch son síncronos: llamados dentro de una corrutina congelan
+todo el equipo (y el streaming por consola) mientras dura la petición. Aquí se ejecutan en
+un pool de hilos acotado:
+
+- un semáforo por event loop reserva un hilo del pool y solo se libera cuando el hilo termina
+  de verdad, así que las búsquedas abandonadas no acumulan trabajo en cola;
+- cada búsqueda tiene un plazo total (deadline) compartido entre DuckDuckGo y Google;
+- si la tarea que espera se cancela o vence el plazo, vuelve de inmediato; el hilo acaba
+  en segundo plano, limitado por el timeout de red de la propia librería.
+"""
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+from duckduckgo_search import DDGS
+from googlesearch import search as google_search
+
+SEARCH_THREADS = 8
+SEARCH_DEADLINE_SECONDS = 12.0
+REQUEST_TIMEOUT_SECONDS = 8     # timeout de red dentro de cada librería
+
+_POOL = ThreadPoolExecutor(max_workers=SEARCH_THREADS, thread_name_prefix="web_search")
+_slots: Dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
+
+
+def _loop_slots() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    slots = _slots.get(loop)
+    if slots is None:
+        slots = _slots[loop] = asyncio.Semaphore(SEARCH_THREADS)
+    return slots
+
+
+async def run_blocking(fn: Callable[..., Any], *args: Any, timeout: float, **kwargs: Any) -> Any:
+    """Ejecuta `fn` en el pool de búsquedas; lanza asyncio.TimeoutError si no acaba en `timeout`."""
+    deadline = time.monotonic() + timeout
+    slots = _loop_slots()
+    await asyncio.wait_for(slots.acquire(), timeout)
+    loop = asyncio.get_running_loop()
+    try:
+        future = loop.run_in_executor(_POOL, functools.partial(fn, *args, **kwargs))
+    except BaseException:
+        slots.release()
+        raise
+
+    def done(f: "asyncio.Future[Any]") -> None:
+        slots.release()
+        if not f.cancelled():
+            f.exception()           # evita avisos de excepción no recuperada si nadie espera ya
+
+    future.add_done_callback(done)
+    # shield: cancelar la espera no cancela el hilo (no se puede), solo deja de esperarlo
+    return await asyncio.wait_for(asyncio.shield(future), max(deadline - time.monotonic(), 0.0))
+
+
+def _ddgs_text(query: str, max_results: int) -> List[Dict[str, str]]:
+    with DDGS(timeout=REQUEST_TIMEOUT_SECONDS) as ddgs:
+        return list(ddgs.text(query, max_results=max_results) or [])
+
+
+def _google_urls(query: str, max_results: int) -> List[str]:
+    return list(google_search(query, num_results=max_results, timeout=REQUEST_TIMEOUT_SECONDS))
+
+
+async def ddgs_text(query: str, max_results: int = 5,
+                    timeout: float = SEARCH_DEADLINE_SECONDS) -> List[Dict[str, str]]:
+    """DDGS().text(...) en el pool: lista de dicts con title, href y body."""
+    return await run_blocking(_ddgs_text, query, max_results, timeout=timeout)
+
+
+async def google_urls(query: str, max_results: int = 5, timeout: float = SEARCH_DEADLINE_SECONDS) -> List[str]:
+    """googlesearch.search(...) en el pool: lista de URLs."""
+    return await run_blocking(_google_urls, query, max_results, timeout=timeout)
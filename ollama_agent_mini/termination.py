@@ -0,0 +1,146 @@
+"""
+Condiciones de parada y presupuestos por ejecución del equipo RoundRobin.
+
+Los modelos pequeños (qwen3:0.6b) a menudo no escriben nunca TERMINATE. La condición del
+equipo combina (con |, la primera que se cumpla):
+
+- TextMentionTermination("TERMINATE"): el final normal
+- TokenUsageTermination: tokens totales (prompt + generados) de la ejecución
+- TimeoutTermination: plazo de reloj, evaluado tras cada mensaje
+- ConvergenceTermination: el verificador ya no cambia su respuesta entre rondas
+- rondas máximas: max_turns del equipo (una ronda = un turno de cada agente)
+
+TimeoutTermination solo se evalúa cuando llega un mensaje; HardDeadline cancela además la
+ejecución si un turno se cuelga más allá del plazo (con un margen de gracia).
+"""
+import asyncio
+import difflib
+import os
+import re
+from typing import Any, Dict, Optional, Sequence
+
+from autogen_agentchat.base import TerminatedException, TerminationCondition
+from autogen_agentchat.conditions import TextMentionTermination, TimeoutTermination, TokenUsageTermination
+from autogen_agentchat.messages import BaseAgentEvent, BaseChatMessage, StopMessage
+from autogen_core import CancellationToken
+
+HARD_DEADLINE_GRACE_SECONDS = 30.0
+_SPACE_RE = re.compile(r"\s+")
+
+
+class RunLimits:
+    """Presupuesto de una ejecución; 0 o None desactiva cada límite."""
+
+    __slots__ = ("max_rounds", "max_tokens", "deadline_seconds", "convergence_threshold")
+
+    def __init__(self, max_rounds: Optional[int] = 4, max_tokens: Optional[int] = 60000,
+                 deadline_seconds: Optional[float] = 600.0, convergence_threshold: Optional[float] = 0.9):
+        self.max_rounds = max_rounds
+        self.max_tokens = max_tokens
+        self.deadline_seconds = deadline_seconds
+        self.convergence_threshold = convergence_threshold
+
+    @classmethod
+    def from_env(cls) -> "RunLimits":
+        """Valores por defecto sobrescritos por AGENT_MAX_ROUNDS, AGENT_MAX_TOKENS,
+        AGENT_DEADLINE_SECONDS y AGENT_CONVERGENCE_THRESHOLD."""
+        env = {
+            "max_rounds": ("AGENT_MAX_ROUNDS", int),
+            "max_tokens": ("AGENT_MAX_TOKENS", int),
+            "deadline_seconds": ("AGENT_DEADLINE_SECONDS", float),
+            "convergence_threshold": ("AGENT_CONVERGENCE_THRESHOLD", float),
+        }
+        values = {name: convert(os.environ[var]) for name, (var, convert) in env.items()
+                  if os.environ.get(var, "").strip()}
+        return cls(**values)
+
+    def override(self, **values: Any) -> "RunLimits":
+        """Copia con los campos indicados cambiados (ignora claves desconocidas y valores None)."""
+        merged = self.to_dict()
+        merged.update({k: v for k, v in values.items() if k in merged and v is not None})
+        return RunLimits(**merged)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _normalize(text: str) -> str:
+    return _SPACE_RE.sub(" ", text.replace("TERMINATE", "")).strip().casefold()
+
+
+class ConvergenceTermination(TerminationCondition):
+    """
+    Para cuando dos respuestas consecutivas de `source` son casi iguales (similitud por
+    palabras >= `threshold`): el equipo ya no progresa y otra ronda solo gasta tokens.
+    """
+
+    def __init__(self, source: str = "verificador", threshold: float = 0.9) -> None:
+        self._source = source
+        self._threshold = threshold
+        self._last: Optional[str] = None
+        self._terminated = False
+
+    @property
+    def terminated(self) -> bool:
+        return self._terminated
+
+    async def __call__(self, messages: Sequence[BaseAgentEvent | BaseChatMessage]) -> StopMessage | None:
+        if self._terminated:
+            raise TerminatedException("Termination condition has already been reached")
+        for message in messages:
+            if not isinstance(message, BaseChatMessage) or message.source != self._source:
+                continue
+            text = _normalize(message.to_text())
+            if not text:
+                continue
+            if self._last is not None:
+                similarity = difflib.SequenceMatcher(None, self._last.split(), text.split(),
+                                                     autojunk=False).ratio()
+                if similarity >= self._threshold:
+                    self._terminated = True
+                    return StopMessage(
+                        content=f"No progress: {self._source} output converged (similarity {similarity:.2f})",
+                        source="ConvergenceTermination")
+            self._last = text
+        return None
+
+    async def reset(self) -> None:
+        self._last = None
+        self._terminated = False
+
+
+def build_termination(limits: RunLimits) -> TerminationCondition:
+    """Condición combinada para `limits` (las rondas se aplican con max_turns del equipo)."""
+    condition: TerminationCondition = TextMentionTermination(text="TERMINATE")
+    if limits.max_tokens:
+        condition = condition | TokenUsageTermination(max_total_token=limits.max_tokens)
+    if limits.deadline_seconds:
+        condition = condition | TimeoutTermination(timeout_seconds=limits.deadline_seconds)
+    if limits.convergence_threshold:
+        condition = condition | ConvergenceTermination(threshold=limits.convergence_threshold)
+    return condition
+
+
+class HardDeadline:
+    """
+    Token de cancelación que se dispara `grace` segundos después del plazo de `limits`.
+    Uso: with HardDeadline(limits) as deadline: team.run_stream(..., cancellation_token=deadline.token)
+    """
+
+    def __init__(self, limits: RunLimits, grace: float = HARD_DEADLINE_GRACE_SECONDS):
+        self.token = CancellationToken()
+        self.seconds = limits.deadline_seconds + grace if limits.deadline_seconds else None
+        self._handle: Optional[asyncio.TimerHandle] = None
+
+    def __enter__(self) -> "HardDeadline":
+        if self.seconds:
+            self._handle = asyncio.get_running_loop().call_later(self.seconds, self.token.cancel)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+
+    @property
+    def expired(self) -> bool:
+        return self.token.is_cancelled()
@@ -0,0 +1,53 @@
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from content_extract import chunk_blocks, estimate_tokens, extract_blocks, readable_text, select_passages
+
+PARAGRAPHS = "".join(f"<p>Paragraph {i} of the real content, long enough to count as a text block.</p>"
+                     for i in range(5))
+
+
+def demo_page() -> bytes:
+    nav = "".join(f"<li><a href='/s{i}'>Sección {i}</a></li>" for i in range(60))
+    filler = "".join(f"<p>Párrafo de relleno número {i} sobre temas variados del sitio, sin relación con la "
+                     f"consulta.</p>" for i in range(120))
+    return (f"<html><head><title>Demo</title><script>var tracking = {'x' * 5000!r};</script></head><body>"
+            f"<nav><ul>{nav}</ul></nav><div class='cookie-banner'><p>Aceptamos cookies para mejorar tu "
+            f"experiencia en el sitio.</p></div><main><article><h1>Qué es Microsoft AutoGen</h1>{filler}"
+            "<p>Microsoft AutoGen es un framework para construir aplicaciones con varios agentes de IA que "
+            f"conversan entre sí.</p>{filler}</article></main><footer><p>Copyright y enlaces legales del sitio "
+            "web de ejemplo.</p></footer></body></html>").encode()
+
+
+def test_boilerplate_is_removed_and_query_passage_selected():
+    title, text, total = readable_text(demo_page(), "Microsoft AutoGen agentes", max_tokens=300)
+    assert title == "Demo"
+    assert "Microsoft AutoGen es un framework" in text
+    assert "cookies" not in text and "Sección" not in text and "Copyright" not in text
+    assert estimate_tokens(text) <= 300 < total
+
+
+def test_page_wrapped_in_form_keeps_its_content():
+    _, text, _ = readable_text(f'<form id="aspnetForm"><div>{PARAGRAPHS}</div></form>'.encode())
+    assert text.count("Paragraph") == 5
+
+
+def test_wrapper_with_boilerplate_class_around_article_is_kept():
+    html = (f'<div class="layout has-sidebar"><div class="sidebar"><p>Sidebar links and other things '
+            f'nobody reads at all.</p></div><article>{PARAGRAPHS}</article></div>').encode()
+    _, blocks = extract_blocks(html)
+    assert len(blocks) == 5 and all(b.startswith("Paragraph") for b in blocks)
+
+
+def test_large_boilerplate_named_wrapper_without_article_is_kept():
+    _, text, _ = readable_text(f'<div id="page" class="site-header-wrapper">{PARAGRAPHS}</div>'.encode())
+    assert text.count("Paragraph") == 5
+
+
+def test_select_passages_respects_budget_and_document_order():
+    chunks = chunk_blocks([f"block {i} " + "word " * 60 for i in range(10)] + ["the needle is here " * 5])
+    chosen = select_passages(chunks, "needle", max_tokens=200)
+    assert chosen == sorted(chosen)
+    assert len(chunks) - 1 in chosen
+    assert sum(estimate_tokens(chunks[i]) for i in chosen) <= 200
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("autogen_ext.models.ollama")
+
+from autogen_core.models import ModelInfo, UserMessage
+from autogen_ext.models.ollama import OllamaChatCompletionClient
+
+from llm_cache import SQLiteCacheStore, with_cache
+
+MODEL_INFO = ModelInfo(vision=False, function_calling=True, json_output=True, structured_output=True,
+                       family="unknown")
+
+
+class FakeOllama(BaseHTTPRequestHandler):
+    """Servidor /api/chat mínimo que cuenta las peticiones recibidas."""
+
+    protocol_version = "HTTP/1.1"
+    calls = 0
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        type(self).calls += 1
+        text = f"respuesta {self.calls} de {request['model']}"
+        base = {"model": request["model"], "created_at": "2024-01-01T00:00:00Z"}
+        if request.get("stream"):
+            lines = [dict(base, message={"role": "assistant", "content": word + " "}, done=False)
+                     for word in text.split()]
+            lines.append(dict(base, message={"role": "assistant", "content": ""}, done=True,
+                              done_reason="stop", prompt_eval_count=12, eval_count=len(lines)))
+            body = "".join(json.dumps(line) + "\n" for line in lines).encode()
+            content_type = "application/x-ndjson"
+        else:
+            body = json.dumps(dict(base, message={"role": "assistant", "content": text}, done=True,
+                                   done_reason="stop", prompt_eval_count=12, eval_count=4)).encode()
+            content_type = "application/json"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def ollama():
+    FakeOllama.calls = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllama)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def run(host, db_path, model="llama3.2", mode="on", options=None):
+    """create + create_stream con el cliente envuelto; devuelve (cached, stream_cached, llamadas)."""
+
+    async def go():
+        client = with_cache(OllamaChatCompletionClient(model=model, host=host, model_info=MODEL_INFO,
+                                                       options=options or {}), db_path, mode)
+        messages = [UserMessage(content="¿Qué es AutoGen?", source="user")]
+        try:
+            result = await client.create(messages)
+            streamed = [chunk async for chunk in
+                        client.create_stream(messages + [UserMessage(content="más", source="user")])]
+        finally:
+            await client.close()
+        return result, streamed[-1]
+
+    before = FakeOllama.calls
+    result, last_chunk = asyncio.run(go())
+    return result.cached, last_chunk.cached, FakeOllama.calls - before
+
+
+def test_second_run_is_served_from_disk(ollama, tmp_path):
+    db = str(tmp_path / "llm.sqlite3")
+    assert run(ollama, db) == (False, False, 2)
+    assert run(ollama, db) == (True, True, 0)
+
+
+@pytest.mark.parametrize("kwargs", [
+    dict(model="qwen3:0.6b"),
+    dict(options={"temperature": 0.1}),
+    dict(mode="off"),
+    dict(mode="refresh"),
+], ids=["other-model", "other-options", "off", "refresh"])
+def test_cache_is_bypassed(ollama, tmp_path, kwargs):
+    db = str(tmp_path / "llm.sqlite3")
+    run(ollama, db)
+    assert run(ollama, db, **kwargs) == (False, False, 2)
+
+
+def test_refresh_rewrites_the_entry(ollama, tmp_path):
+    db = str(tmp_path / "llm.sqlite3")
+    run(ollama, db)
+    run(ollama, db, mode="refresh")
+    assert run(ollama, db) == (True, True, 0)
+
+
+def test_unwritable_db_path_uses_memory_only(ollama, capsys):
+    store = SQLiteCacheStore("/proc/nope/x.sqlite3")
+    assert "disk cache disabled" in capsys.readouterr().out
+    assert "sqlite" not in store.stats()
+
+    store.set("k", ["a", "b"])
+    assert json.loads(store.get("k")) == ["a", "b"]
+    # El cliente sigue funcionando (sin persistencia entre ejecuciones)
+    assert run(ollama, "/proc/nope/x.sqlite3") == (False, False, 2)
@@ -0,0 +1,51 @@
+"""
+Límites para la ejecución concurrente de herramientas.
+
+Cuando el modelo pide varias herramientas en un mismo paso, AssistantAgent las ejecuta con
+asyncio.gather (los resultados vuelven en el orden de las llamadas). Este decorador añade
+lo que falta para que una ronda dure lo que la llamada más lenta y no más:
+
+- concurrencia acotada por grupo (un semáforo por event loop y grupo)
+- tiempo máximo por herramienta: al agotarse se cancela y se devuelve un mensaje de error
+  como resultado, en lugar de bloquear la ronda entera
+
+functools.wraps conserva nombre, docstring y firma, así que FunctionTool genera el mismo
+esquema para el modelo que con la función original.
+"""
+import asyncio
+import functools
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+TOOL_CONCURRENCY = 4            # herramientas ejecutándose a la vez por grupo
+DEFAULT_TOOL_TIMEOUT = 30.0
+
+_semaphores: Dict[Tuple[asyncio.AbstractEventLoop, str], asyncio.Semaphore] = {}
+
+
+def _semaphore(group: str, limit: int) -> asyncio.Semaphore:
+    key = (asyncio.get_running_loop(), group)
+    semaphore = _semaphores.get(key)
+    if semaphore is None:
+        semaphore = _semaphores[key] = asyncio.Semaphore(limit)
+    return semaphore
+
+
+def bounded_tool(timeout: float = DEFAULT_TOOL_TIMEOUT, group: str = "tools",
+                 limit: int = TOOL_CONCURRENCY) -> Callable[[Callable[..., Awaitable[str]]], Callable[..., Awaitable[str]]]:
+    """Decora una herramienta async con límite de concurrencia (por `group`) y tiempo máximo."""
+
+    def decorate(fn: Callable[..., Awaitable[str]]) -> Callable[..., Awaitable[str]]:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> str:
+            async with _semaphore(group, limit):
+                started = time.perf_counter()
+                try:
+                    return await asyncio.wait_for(fn(*args, **kwargs), timeout)
+                except asyncio.TimeoutError:
+                    return (f"Error: {fn.__name__} superó el tiempo máximo de {timeout:g}s "
+                            f"({time.perf_counter() - started:.1f}s) y se canceló.")
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# Ruta absoluta: read_file/read_files cambian el directorio de trabajo al importarse
+TOOLS_DIR = Path(__file__).resolve().parent.parent / "tools"
+sys.path.insert(0, str(TOOLS_DIR))
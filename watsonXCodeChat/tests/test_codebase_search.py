@@ -0,0 +1,76 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("ibm_watsonx_orchestrate")
+
+import codebase_search as cs
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.setattr(cs, "WORKSPACE", tmp_path)
+    monkeypatch.setattr(cs, "INDEX_DIR", tmp_path / ".codebase_index")
+    monkeypatch.setattr(cs, "SEMANTIC_DIR", tmp_path / ".codebase_index" / "semantic")
+    for pkg in ("billing", "auth"):
+        (tmp_path / pkg).mkdir()
+        for i in range(3):
+            (tmp_path / pkg / f"{pkg}_{i}.py").write_text(
+                f"def {pkg}_handler_{i}(request):\n    return '{pkg} {i}'\n")
+    return tmp_path
+
+
+def snapshot(root):
+    return {str(p): (p.stat().st_mtime_ns, p.stat().st_size) for p in sorted(root.rglob("*.py"))}
+
+
+def leftovers(root):
+    return [p.name for p in root.rglob("*.tmp")]
+
+
+def test_sync_embeds_within_budget_targets_first(workspace):
+    store = cs._ChunkStore(cs._HashingEmbedder())
+    n_files, _, pending = store.sync(snapshot(workspace), roots=[workspace / "billing"], budget=0)
+    assert (n_files, pending) == (1, 5)
+    assert all("/billing/" in p for p in store.files)
+
+    store.sync(snapshot(workspace), roots=[workspace / "billing"], budget=0)
+    store.sync(snapshot(workspace), roots=[workspace / "billing"], budget=0)
+    assert len(store.files) == 3 and all("/billing/" in p for p in store.files)
+    assert store.sync(snapshot(workspace))[2] == 0
+    assert store.search("auth handler", [workspace / "auth"], 3)
+
+
+def test_store_is_reloaded_from_disk(workspace):
+    cs._ChunkStore(cs._HashingEmbedder()).sync(snapshot(workspace))
+    reloaded = cs._ChunkStore(cs._HashingEmbedder())
+    assert len(reloaded.files) == 6
+    assert reloaded.sync(snapshot(workspace)) == (0, 0, 0)
+    assert leftovers(workspace) == []
+
+
+def test_interrupted_update_discards_store(workspace, monkeypatch):
+    store = cs._ChunkStore(cs._HashingEmbedder())
+    store.sync(snapshot(workspace))
+    (workspace / "auth" / "auth_0.py").write_text("def renamed():\n    pass\n")
+
+    def crash():
+        raise KeyboardInterrupt
+    monkeypatch.setattr(store, "_save", crash)
+    with pytest.raises(KeyboardInterrupt):
+        store.sync(snapshot(workspace))
+
+    # Los vectores ya se tocaron pero meta.json no: el almacén en disco no debe usarse
+    reloaded = cs._ChunkStore(cs._HashingEmbedder())
+    assert reloaded.files == {}
+    assert reloaded.sync(snapshot(workspace))[0] == 6
+    assert len(cs._ChunkStore(cs._HashingEmbedder()).files) == 6
+
+
+def test_trigram_index_round_trip(workspace):
+    snap = snapshot(workspace)
+    built = cs._TrigramIndex.build(snap)
+    loaded = cs._TrigramIndex.load()
+    assert loaded.files == built.files
+    ids = loaded.candidates(cs._query_trigrams("auth_handler_2"))
+    assert {loaded.files[i][0] for i in ids} == {str(workspace / "auth" / "auth_2.py")}
+    assert leftovers(workspace) == []
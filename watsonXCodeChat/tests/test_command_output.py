@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from command_output import MAX_SUMMARY_LINES, OutputCapture, format_result, run_captured
+
+NOISY_BUILD = ("python3 -c \"\n"
+               "import sys\n"
+               "for i in range(50000): print('[INFO] Compiling module', i % 7)\n"
+               "[print('[INFO] .') for _ in range(3000)]\n"
+               "print('src/Main.java:12: error: cannot find symbol', file=sys.stderr)\n"
+               "print('[ERROR] Failed to execute goal compile')\n"
+               "print('[INFO] BUILD FAILURE')\n\"")
+
+
+def _capture(text: str, budget: int) -> OutputCapture:
+    capture = OutputCapture(budget)
+    capture.feed(text.encode())
+    capture.close()
+    return capture
+
+
+def test_noisy_build_fits_budget_and_keeps_errors(tmp_path):
+    budget = 4096
+    rc, timed_out, _, out, err = run_captured(NOISY_BUILD, tmp_path, timeout=30, budget=budget)
+    report = format_result("build", rc, timed_out, 0.0, out, err, budget)
+    assert (rc, timed_out) == (0, False)
+    assert out.total_bytes > 100 * budget
+    assert len(report.encode()) < budget + 512            # cabecera de estado fuera del presupuesto
+    assert "previous line repeated 2999 more times" in report
+    assert "src/Main.java:12: error: cannot find symbol" in report
+    assert "[ERROR] Failed to execute goal compile" in report
+    assert report.split("\nErrors:\n", 1)[0].endswith("[INFO] BUILD FAILURE")      # final de stdout
+
+
+def test_timeout_kills_process_and_keeps_partial_output(tmp_path):
+    started = time.monotonic()
+    rc, timed_out, elapsed, out, _ = run_captured("echo start; sleep 10", tmp_path, timeout=1)
+    assert timed_out
+    assert time.monotonic() - started < 5
+    assert out.render() == "start"
+    assert "timed out after" in format_result("sleep", rc, timed_out, elapsed, out, OutputCapture())
+
+
+def test_repeated_lines_are_collapsed():
+    capture = _capture("same\n" * 100 + "other\n", 1000)
+    assert capture.render().splitlines() == ["same", "... [previous line repeated 99 more times]", "other"]
+
+
+def test_summary_is_charged_to_budget():
+    long_error = "src/App.java:1: error: " + "x" * 1900
+    lines = [f"{long_error} {i}" for i in range(MAX_SUMMARY_LINES)]
+    out = _capture("\n".join(lines) + "\n", 256)
+    err = _capture("\n".join(f"E   assert {i}" for i in range(MAX_SUMMARY_LINES)) + "\n", 256)
+    budget = 8192
+    report = format_result("cmd", 1, False, 0.0, out, err, budget)
+    summary = report.split("Summary of errors/warnings:\n", 1)[1]
+    assert len(summary.encode()) <= budget // 4 + 100
+    assert "more error/warning lines]" in summary
+    assert "E   assert 0" in summary                           # stderr conserva su parte del resumen
+    assert len(report.encode()) < budget + 512
+
+
+def test_summary_of_small_output_is_complete():
+    err = _capture("Traceback (most recent call last)\nValueError: bad\n", 1000)
+    report = format_result("cmd", 1, False, 0.0, OutputCapture(), err)
+    assert report.endswith("Summary of errors/warnings:\nTraceback (most recent call last)\nValueError: bad")
+
+
+def test_run_terminal_cmd_caps_timeout(monkeypatch):
+    pytest.importorskip("ibm_watsonx_orchestrate")
+    import run_terminal_cmd as module
+    seen = []
+
+    def fake_run_captured(command, cwd, timeout, budget):
+        seen.append(timeout)
+        return 0, False, 0.0, OutputCapture(), OutputCapture()
+
+    monkeypatch.setattr(module, "run_captured", fake_run_captured)
+    module.run_terminal_cmd.fn("true", require_user_approval=False, timeout=86400, session="")
+    module.run_terminal_cmd.fn("true", require_user_approval=False, timeout=-5, session="")
+    assert seen == [module.MAX_TIMEOUT_SECONDS, 0.0]
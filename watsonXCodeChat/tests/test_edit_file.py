@@ -0,0 +1,116 @@
+import pytest
+
+pytest.importorskip("ibm_watsonx_orchestrate")
+
+from edit_file import EditError, _parse_unified_diff, apply_marker_edit, apply_patch_edit
+
+ORIGINAL = ["def a():", "    pass", "", "def b():", "    x = 1", "", "def c():", "    pass"]
+
+
+def test_marker_edit_replaces_between_anchors():
+    code_edit = "# ... existing code ...\ndef b():\n    x = 2\n\ndef c():\n# ... existing code ..."
+    lines, blocks = apply_marker_edit(ORIGINAL, code_edit)
+    assert blocks == 1
+    assert lines == ["def a():", "    pass", "", "def b():", "    x = 2", "", "def c():", "    pass"]
+
+
+def test_marker_edit_inserts_at_top_without_leading_marker():
+    lines, _ = apply_marker_edit(ORIGINAL, "import os\n# ... existing code ...")
+    assert lines == ["import os"] + ORIGINAL
+
+
+def test_marker_edit_rejects_block_ending_on_changed_line():
+    # Sin cola anclada el bloque se insertaría tras "def b():" y quedaría "x = 1" duplicado
+    code_edit = "# ... existing code ...\ndef b():\n    x = 2\n# ... existing code ..."
+    with pytest.raises(EditError, match="could not anchor the end of edit block 1"):
+        apply_marker_edit(ORIGINAL, code_edit)
+
+
+def test_marker_edit_rejects_ambiguous_head():
+    code_edit = "# ... existing code ...\n    pass\n    return 1\n# ... existing code ..."
+    with pytest.raises(EditError, match="ambiguous"):
+        apply_marker_edit(ORIGINAL, code_edit)
+
+
+def test_diff_pure_insertion_goes_after_the_header_line():
+    original = ["one", "two", "three", "four", "five", "six"]
+    hunks = _parse_unified_diff("@@ -5,0 +6,1 @@\n+inserted")
+    lines, report, ok = apply_patch_edit(original, hunks)
+    assert ok, report
+    assert lines == ["one", "two", "three", "four", "five", "inserted", "six"]
+
+
+def test_diff_insertion_at_start_of_file():
+    hunks = _parse_unified_diff("@@ -0,0 +1,1 @@\n+first")
+    lines, _, ok = apply_patch_edit(["a", "b"], hunks)
+    assert ok
+    assert lines == ["first", "a", "b"]
+
+
+def test_diff_hunk_with_context_applies_with_offset():
+    original = ["x", "a", "b", "c"]
+    hunks = _parse_unified_diff("@@ -1,3 +1,3 @@\n a\n-b\n+B\n c")
+    lines, report, ok = apply_patch_edit(original, hunks)
+    assert ok
+    assert lines == ["x", "a", "B", "c"]
+    assert "offset +1" in report[0]
+
+
+def test_marker_edit_rejects_far_single_line_tail():
+    # "return None" es una línea cambiada de a(); su única coincidencia está en b()
+    original = ["def a():", "    x = 1", "    return x", "", "def b():", "    y = 2", "    z = 3",
+                "    return None", "", "def c():", "    pass"]
+    code_edit = "# ... existing code ...\ndef a():\n    x = 1\n    return None\n# ... existing code ..."
+    with pytest.raises(EditError, match="could not anchor the end of edit block 1"):
+        apply_marker_edit(original, code_edit)
+
+
+def test_marker_edit_accepts_near_single_line_tail():
+    original = ["def a():", "    x = 1", "    return x", "", "def b():", "    return x"]
+    code_edit = "# ... existing code ...\ndef a():\n    x = 5\n    return x\n# ... existing code ..."
+    lines, _ = apply_marker_edit(original, code_edit)
+    assert lines == ["def a():", "    x = 5", "    return x", "", "def b():", "    return x"]
+
+
+def test_markerless_snippet_shorter_than_file_is_rejected():
+    with pytest.raises(EditError, match="no '... existing code ...' markers"):
+        apply_marker_edit(ORIGINAL, "def b():\n    x = 2")
+
+
+def test_markerless_full_file_replaces_content():
+    new = ["def a():", "    return 1", "", "def b():", "    x = 2", "", "def c():", "    pass"]
+    assert apply_marker_edit(ORIGINAL, "\n".join(new)) == (new, 1)
+
+
+@pytest.mark.parametrize("marker", ["# ... existing code ...", "    // ... Existing Code ...",
+                                    "foo()  # ... existing code ...", "<!-- existing code -->"])
+def test_marker_recognized_anywhere_on_the_line(marker):
+    code_edit = f"{marker}\ndef b():\n    x = 2\n\ndef c():\n{marker}"
+    lines, _ = apply_marker_edit(ORIGINAL, code_edit)
+    assert lines == ["def a():", "    pass", "", "def b():", "    x = 2", "", "def c():", "    pass"]
+
+
+def test_diff_lines_that_look_like_file_headers_inside_a_hunk():
+    original = ["select 1;", "-- comment", "select 2;"]
+    code_edit = ("--- a/q.sql\n+++ b/q.sql\n"
+                 "@@ -1,3 +1,3 @@\n select 1;\n--- comment\n+++ counter\n select 2;\n")
+    lines, report, ok = apply_patch_edit(original, _parse_unified_diff(code_edit))
+    assert ok, report
+    assert lines == ["select 1;", "++ counter", "select 2;"]
+
+
+def test_diff_headers_between_hunks_of_the_same_file_are_skipped():
+    original = [f"line {i}" for i in range(1, 21)]
+    code_edit = ("diff --git a/f.txt b/f.txt\nindex 1..2 100644\n--- a/f.txt\n+++ b/f.txt\n"
+                 "@@ -2,1 +2,1 @@\n-line 2\n+LINE 2\n"
+                 "--- a/f.txt\n+++ b/f.txt\n"
+                 "@@ -15,1 +15,1 @@\n-line 15\n+LINE 15\n")
+    hunks = _parse_unified_diff(code_edit)
+    assert [(h.old, h.new) for h in hunks] == [(["line 2"], ["LINE 2"]), (["line 15"], ["LINE 15"])]
+
+
+def test_diff_touching_several_files_is_rejected():
+    code_edit = ("--- a/one.py\n+++ b/one.py\n@@ -1 +1 @@\n-a\n+b\n"
+                 "--- a/two.py\n+++ b/two.py\n@@ -1 +1 @@\n-c\n+d\n")
+    with pytest.raises(EditError, match="changes 2 files"):
+        _parse_unified_diff(code_edit)
@@ -0,0 +1,117 @@
+import re
+import shutil
+
+import pytest
+
+pytest.importorskip("ibm_watsonx_orchestrate")
+
+import grep_search
+import workspace_catalog
+from grep_search import _RipgrepFailed, iter_grep_matches
+
+requires_rg = pytest.mark.skipif(shutil.which("rg") is None, reason="rg not found in PATH")
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    files = {
+        ".gitignore": "build/\n*.log\n!keep.log\n",
+        "src/app.py": "import os\n\ndef main():\n    # TODO: parse args\n    return os.getcwd()\n",
+        "src/util.py": "def helper():\n    return 'Main'\n",
+        "src/.gitignore": "generated.py\n",
+        "src/generated.py": "def main():\n    pass\n",
+        "build/out.py": "def main():\n    pass\n",
+        "debug.log": "def main() in a log\n",
+        "keep.log": "def main() kept\n",
+        "docs/notes.md": "main entry point\n",
+        ".git/HEAD": "def main()\n",
+    }
+    for rel, text in files.items():
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+    (tmp_path / "src" / "blob.bin").write_bytes(b"def main()\0\x01\x02")
+
+    monkeypatch.setattr(grep_search, "WORKSPACE", tmp_path)
+    monkeypatch.setattr(workspace_catalog, "_CATALOG",
+                        [workspace_catalog.WorkspaceCatalog(root=tmp_path, use_inotify=False)])
+    return tmp_path
+
+
+def search(query, engine, **kwargs):
+    return [(r["file"], r["line_number"], r["match"])
+            for r in iter_grep_matches(query, max_results=10 ** 6, engine=engine, **kwargs)]
+
+
+def test_python_engine_skips_ignored_vcs_and_binary_files(workspace):
+    assert search(r"def main", "python") == [("keep.log", 1, "def main"), ("src/app.py", 3, "def main")]
+
+
+def test_python_engine_filters_and_case(workspace):
+    assert search("main", "python", case_sensitive=False, include_pattern="*.py") == [
+        ("src/app.py", 3, "main"), ("src/util.py", 2, "Main")]
+    assert [f for f, _, _ in search("main", "python", exclude_pattern="src")] == ["docs/notes.md", "keep.log"]
+
+
+def test_max_results_stops_early(workspace):
+    assert len(list(iter_grep_matches("e", max_results=3, engine="python"))) == 3
+
+
+def test_invalid_regex_is_reported_not_raised(workspace):
+    with pytest.raises(re.error):
+        next(iter_grep_matches("def ("))
+    results = grep_search.grep_search.fn("def (")
+    assert len(results) == 1 and results[0]["error"].startswith("Patrón regex inválido")
+
+
+@requires_rg
+@pytest.mark.parametrize("query", ["def ", "main", "TODO|FIXME", r"\bdef\s+\w+", r"os\.\w+\(\)"])
+@pytest.mark.parametrize("case_sensitive", [True, False])
+def test_ripgrep_matches_python_engine(workspace, query, case_sensitive):
+    assert search(query, "rg", case_sensitive=case_sensitive) == search(query, "python",
+                                                                        case_sensitive=case_sensitive)
+
+
+@requires_rg
+def test_ripgrep_respects_gitignore_and_binary_files(workspace):
+    files = {f for f, _, _ in search("def main", "rg")}
+    assert files == {"keep.log", "src/app.py"}
+
+
+@requires_rg
+def test_ripgrep_respects_include_and_exclude(workspace):
+    kwargs = dict(include_pattern="*.py", exclude_pattern="src/util.py", case_sensitive=False)
+    assert search("main", "rg", **kwargs) == search("main", "python", **kwargs)
+
+
+@requires_rg
+def test_pattern_rejected_by_ripgrep_falls_back_to_python(workspace):
+    # Los lookahead son válidos en Python pero no en el motor regex de rg
+    query = r"def (?=main)\w+"
+    with pytest.raises(_RipgrepFailed):
+        search(query, "rg")
+    assert search(query, "auto") == search(query, "python") == [("keep.log", 1, "def main"),
+                                                                 ("src/app.py", 3, "def main")]
+
+
+def test_parallel_engine_reuses_one_pool(workspace, monkeypatch):
+    expected = search("main", "python", case_sensitive=False)
+    monkeypatch.setattr(grep_search, "PARALLEL_MIN_FILES", 2)
+    monkeypatch.setattr(grep_search, "PARALLEL_BATCH_FILES", 1)
+    assert search("main", "python", case_sensitive=False) == expected
+    pool = grep_search._get_pool()
+    assert len(list(iter_grep_matches("e", max_results=2, engine="python"))) == 2
+    assert search("main", "python", case_sensitive=False) == expected
+    assert grep_search._get_pool() is pool
+
+
+@requires_rg
+def test_ripgrep_capped_results_are_in_path_order(workspace):
+    for i in range(20):
+        (workspace / "pkg" / f"m{i:02d}").mkdir(parents=True)
+        (workspace / "pkg" / f"m{i:02d}" / "mod.py").write_text("def main():\n    main()\n")
+    capped = [(r["file"], r["line_number"], r["match"])
+              for r in iter_grep_matches("main", max_results=10, engine="rg")]
+    assert len(capped) == 10
+    assert capped == sorted(capped, key=lambda r: (r[0].split("/"), r[1]))
+    assert search("main", "rg") == search("main", "python")
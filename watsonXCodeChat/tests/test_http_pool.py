@@ -0,0 +1,48 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import http_pool
+
+
+@pytest.fixture
+def throttled_server():
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(time.monotonic())
+            if len(hits) == 1:
+                self.send_response(429)
+                self.send_header("Retry-After", "3600")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/", hits
+    server.shutdown()
+
+
+def test_retry_after_is_capped(throttled_server, monkeypatch):
+    url, hits = throttled_server
+    monkeypatch.setattr(http_pool, "RETRY_MAX_WAIT", 0.2)
+    started = time.monotonic()
+    response = http_pool._build_session().get(url, timeout=5)
+    assert response.status_code == 200
+    assert len(hits) == 2
+    assert time.monotonic() - started < 3
+
+
+def test_backoff_is_capped():
+    retry = http_pool._CappedRetry(total=10, backoff_factor=100)
+    for _ in range(5):
+        retry = retry.increment(method="GET", url="/", error=ConnectionError())
+    assert retry.get_backoff_time() == http_pool.RETRY_MAX_WAIT
@@ -0,0 +1,57 @@
+import mmap
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("ibm_watsonx_orchestrate")
+
+from read_file import MAX_ENTIRE_FILE_BYTES, WORKSPACE, _get_line_index, _head_tail_view, read_file, read_line_span
+
+
+@pytest.fixture
+def workspace_dir():
+    # La herramienta solo lee dentro del WORKSPACE
+    with tempfile.TemporaryDirectory(dir=WORKSPACE) as tmp:
+        yield Path(tmp)
+
+
+def view(path, budget):
+    st = os.stat(path)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return _head_tail_view(mm, _get_line_index(path, mm, st), budget)
+
+
+def test_head_tail_view_keeps_whole_lines(tmp_path):
+    path = tmp_path / "lines.txt"
+    path.write_text("".join(f"línea {i}\n" for i in range(100)), encoding="utf-8")
+    text, omitted = view(path, 60)
+    lines = text.splitlines()
+    assert lines[0] == "línea 0" and lines[-1] == "línea 99"
+    assert f"... {omitted} lines" in text
+    assert len([l for l in lines if l.startswith("línea")]) + omitted == 100
+
+
+@pytest.mark.parametrize("budget", [10, 11, 12, 13])
+def test_head_tail_view_does_not_split_multibyte_characters(tmp_path, budget):
+    path = tmp_path / "one_line.txt"
+    path.write_text("é€😀" * 20, encoding="utf-8")      # una sola línea: el corte cae dentro de caracteres
+    text, _ = view(path, budget)
+    head, _, tail = text.partition(" not shown ...\n")
+    assert set(head.split("...")[0]) <= set("é€😀")
+    assert tail and set(tail) <= set("é€😀")
+
+
+def test_read_entire_large_file_with_long_multibyte_line(workspace_dir):
+    path = workspace_dir / "big.txt"
+    path.write_text("ñ" * (MAX_ENTIRE_FILE_BYTES + 1001), encoding="utf-8")
+    output = read_file.fn(str(path), True, 1, 1)
+    assert "showing head and tail" in output
+    assert not output.startswith("Error")
+
+
+def test_read_line_span_clamps_to_file(tmp_path):
+    path = tmp_path / "lines.txt"
+    path.write_text("a\nb\nc\n", encoding="utf-8")
+    assert read_line_span(path, 2, 10) == ("b\nc\n", 1, 3, 3)
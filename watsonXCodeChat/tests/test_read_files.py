@@ -0,0 +1,75 @@
+import tempfile
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("ibm_watsonx_orchestrate")
+
+import read_file
+from read_file import WORKSPACE
+from read_files import _merge_ranges, read_files
+
+
+@pytest.fixture
+def workspace_dir():
+    with tempfile.TemporaryDirectory(dir=WORKSPACE) as tmp:
+        path = Path(tmp)
+        (path / "a.txt").write_text("".join(f"a{i}\n" for i in range(1, 11)), encoding="utf-8")
+        (path / "b.txt").write_text("b1\nb2\n", encoding="utf-8")
+        yield path
+
+
+def test_merge_ranges():
+    assert _merge_ranges([(15, 30), (1, 20), (31, 40), (50, 60)]) == [(1, 40), (50, 60)]
+
+
+def test_overlapping_ranges_are_read_once(workspace_dir):
+    a = str(workspace_dir / "a.txt")
+    output = read_files.fn([
+        {"target_file": a, "start_line_one_indexed": 2, "end_line_one_indexed_inclusive": 4},
+        {"target_file": a, "start_line_one_indexed": 4, "end_line_one_indexed_inclusive": 5},
+        {"target_file": str(workspace_dir / "b.txt")},
+    ])
+    assert output.startswith("Read 2 range(s) from 2 file(s)")
+    assert f"File: {a} (lines 2-5 of 10)\na2\na3\na4\na5\n" in output
+    assert "b1\nb2\n" in output
+
+
+def test_bad_items_do_not_fail_the_batch(workspace_dir):
+    a = str(workspace_dir / "a.txt")
+    output = read_files.fn([
+        {"target_file": a, "start_line_one_indexed": "first"},
+        "not-an-object",
+        {"target_file": "/etc/passwd"},
+        {"target_file": str(workspace_dir / "missing.txt")},
+        {"target_file": str(workspace_dir / "b.txt"), "end_line_one_indexed_inclusive": "1"},
+    ])
+    assert output.startswith("Read 1 range(s) from 1 file(s)")
+    assert f"File: {a}\nError: invalid literal for int()" in output
+    assert "File: not-an-object\nError: expected an object with 'target_file'" in output
+    assert "File: /etc/passwd\nError: " in output
+    assert "missing.txt\nError: File not found" in output
+    assert "(lines 1-1 of 2)\nb1\n" in output
+
+
+def test_byte_budget_truncates_on_line_boundary(workspace_dir):
+    output = read_files.fn([{"target_file": str(workspace_dir / "a.txt")}], max_total_bytes=10)
+    assert "a1\na2\na3\n... truncated after 3 lines" in output
+    assert "output capped at 10 bytes" in output
+
+
+def test_whole_file_read_is_bounded_by_the_budget(workspace_dir, monkeypatch):
+    big = workspace_dir / "big.txt"
+    big.write_text("".join(f"line {i:06d}\n" for i in range(100_000)), encoding="utf-8")   # ~1.2 MB
+    decoded = []
+    real_decode = read_file._decode
+    monkeypatch.setattr(read_file, "_decode", lambda data: decoded.append(len(data)) or real_decode(data))
+
+    output = read_files.fn([{"target_file": str(big)}, {"target_file": str(workspace_dir / "b.txt")}],
+                           max_total_bytes=1200)
+    assert max(decoded) <= 1200
+    assert f"File: {big} (lines 1-100 of 100000)\n" in output
+    assert "... truncated after 100 lines: byte budget exhausted ..." in output
+    # b.txt no llega a mostrarse: el resumen cuenta solo los archivos emitidos
+    assert output.startswith("Read 1 range(s) from 1 file(s); output capped at 1200 bytes")
+    assert "b1" not in output
@@ -0,0 +1,21 @@
+from search_cache import SearchCache
+
+
+def test_disk_layer_survives_a_new_instance(tmp_path):
+    db = tmp_path / "cache" / "web_search.sqlite3"
+    key = SearchCache.make_key("  Python   ASYNCIO ", 5)
+    SearchCache(db_path=str(db)).put(key, [{"url": "https://a.example"}])
+
+    results, source = SearchCache(db_path=str(db)).get(SearchCache.make_key("python asyncio", 5))
+    assert source == "disk"
+    assert results == [{"url": "https://a.example"}]
+
+
+def test_unwritable_db_path_falls_back_to_memory(capsys):
+    cache = SearchCache(db_path="/proc/nope/x.sqlite3")
+    assert "disk cache disabled" in capsys.readouterr().out
+
+    key = cache.make_key("q", 5)
+    assert cache.get(key) == (None, "miss")
+    cache.put(key, [{"url": "https://a.example"}])
+    assert cache.get(key) == ([{"url": "https://a.example"}], "memory")
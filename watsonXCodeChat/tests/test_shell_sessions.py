@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from shell_sessions import SessionError, SessionManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = SessionManager(max_sessions=2, idle_timeout=60)
+    yield manager
+    for name in list(manager.names()):
+        manager.close(name)
+
+
+def test_state_persists_between_commands(manager, tmp_path):
+    session = manager.acquire("t", cwd=tmp_path)
+    session.run("cd /tmp && export GREETING=hola", timeout=5)
+    rc, timed_out, _, out, _ = session.run("pwd; echo $GREETING", timeout=5)
+    assert (rc, timed_out) == (0, False)
+    assert out.render(1000).splitlines() == ["/tmp", "hola"]
+
+
+def test_malformed_command_returns_at_once_and_keeps_session(manager, tmp_path):
+    session = manager.acquire("t", cwd=tmp_path)
+    started = time.monotonic()
+    rc, timed_out, _, _, err = session.run('echo "abc', timeout=10)
+    assert time.monotonic() - started < 2
+    assert not timed_out
+    assert rc != 0
+    assert "unexpected EOF" in err.render(1000)
+
+    assert session.alive
+    rc, _, _, out, _ = session.run("echo ok", timeout=5)
+    assert rc == 0
+    assert out.render(1000) == "ok"
+
+
+def test_session_evicted_before_lock_is_respawned(tmp_path):
+    manager = SessionManager(max_sessions=1, idle_timeout=60)
+    original = manager.acquire
+    raced = []
+
+    def racing_acquire(name, cwd):
+        session = original(name, cwd)
+        if not raced:
+            raced.append(name)
+            original("other", cwd)      # otra llamada expulsa la sesión antes de que run() tome su lock
+        return session
+
+    manager.acquire = racing_acquire
+    try:
+        rc, timed_out, _, out, _ = manager.run("t", "echo ok", 5, cwd=tmp_path)
+        assert (rc, timed_out) == (0, False)
+        assert out.render(1000) == "ok"
+        assert manager.names() == ["t"]
+    finally:
+        for name in manager.names():
+            manager.close(name)
+
+
+def test_session_in_use_is_not_evicted(tmp_path):
+    manager = SessionManager(max_sessions=1, idle_timeout=0)
+    session = manager.acquire("t", cwd=tmp_path)
+    with session.lock:
+        time.sleep(0.01)
+        with pytest.raises(SessionError):
+            manager.acquire("other", cwd=tmp_path)
+        assert session.alive
+    manager.close("t")
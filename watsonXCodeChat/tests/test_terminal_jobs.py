@@ -0,0 +1,58 @@
+import time
+
+import pytest
+
+from terminal_jobs import JobManager, RingBuffer
+
+
+@pytest.fixture
+def manager():
+    manager = JobManager()
+    yield manager
+    for job in manager.jobs():
+        job.kill(grace=0.5)
+
+
+def test_large_output_does_not_block_the_job(manager, tmp_path):
+    # Escribe mucho más de lo que cabe en el pipe (64 KiB) y en el buffer circular
+    job = manager.start("python3 -c \"for i in range(200000): print('line', i)\"", cwd=tmp_path)
+    assert job.wait(timeout=30)
+    assert job.status == "exited (0)"
+    assert job.stdout.dropped_bytes > 0
+    assert job.stdout.tail_lines(1) == ["line 199999"]
+
+
+def test_kill_running_job(manager, tmp_path):
+    job = manager.start("sleep 60", cwd=tmp_path)
+    started = time.monotonic()
+    assert job.kill(grace=1.0)
+    assert time.monotonic() - started < 3
+    assert job.status == "killed"
+    assert not job.group_alive()
+
+
+def test_kill_reaches_children_after_shell_exits(manager, tmp_path):
+    pid_file = tmp_path / "child.pid"
+    job = manager.start(f"sleep 60 & echo $! > {pid_file}", cwd=tmp_path)
+    assert job.wait(timeout=5)
+    assert job.returncode == 0
+    assert job.group_alive()                    # el shell salió pero `sleep` sigue en el grupo
+
+    assert job.kill(grace=1.0)
+    assert not job.group_alive()
+    assert job.status == "killed"
+
+
+def test_kill_finished_job_reports_false(manager, tmp_path):
+    job = manager.start("true", cwd=tmp_path)
+    assert job.wait(timeout=5)
+    assert not job.kill(grace=0.5)
+    assert job.status == "exited (0)"
+
+
+def test_ring_buffer_keeps_last_bytes():
+    buffer = RingBuffer(capacity=10)
+    buffer.write(b"0123456789")
+    buffer.write(b"abc")
+    assert buffer.getvalue() == b"3456789abc"
+    assert (buffer.total_bytes, buffer.dropped_bytes) == (13, 3)
@@ -0,0 +1,188 @@
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("ibm_watsonx_orchestrate")
+
+import search_cache
+import web_search
+from search_cache import SearchCache
+
+GOOGLE_FIXTURE = Path(__file__).resolve().parents[2] / "google.html"
+
+
+def site(n, host="www.example.com", snippet=None):
+    return {"title": f"Page {n}", "url": f"https://{host}/{n}/?utm_source=x", "snippet": snippet or f"snippet {n}"}
+
+
+class FakeEngines:
+    """Sustituye DuckDuckGo, Bing y Google por funciones locales que registran las llamadas."""
+
+    def __init__(self, monkeypatch):
+        self.monkeypatch = monkeypatch
+        self.calls = []
+        self.set()
+
+    def engine(self, name, results, delay):
+        def search(query, headers, max_results, timeout):
+            self.calls.append((name, query))
+            time.sleep(min(delay, timeout))
+            if isinstance(results, Exception):
+                raise results
+            return results[:max_results]
+        return search
+
+    def set(self, duckduckgo=(), bing=(), google=(), delays=None):
+        delays = dict(dict(duckduckgo=0.0, bing=0.0, google=0.0), **(delays or {}))
+        self.monkeypatch.setattr(web_search, "PRIMARY_ENGINES", [
+            ("duckduckgo", self.engine("duckduckgo", duckduckgo, delays["duckduckgo"])),
+            ("bing", self.engine("bing", bing, delays["bing"]))])
+        self.monkeypatch.setattr(web_search, "_search_google_simple",
+                                 self.engine("google", google, delays["google"]))
+
+    def names(self):
+        return sorted(name for name, _ in self.calls)
+
+
+@pytest.fixture
+def engines(monkeypatch):
+    return FakeEngines(monkeypatch)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    db = str(tmp_path / "cache.sqlite3")
+    monkeypatch.setattr(search_cache, "_cache", SearchCache(db_path=db))
+    return db
+
+
+def run_tool(query, **kwargs):
+    return web_search.web_search.fn(query, **kwargs)
+
+
+def test_parse_google_fixture():
+    results = web_search._parse_google(GOOGLE_FIXTURE.read_bytes(), 10)
+    assert results
+    assert all(r["url"].startswith("http") and r["title"] for r in results)
+
+
+def test_parse_duckduckgo_unwraps_redirect_links():
+    html = (b'<div class="result"><a class="result__a" href="//duckduckgo.com/l/?uddg=https%3A%2F%2Fa.example%2Fx">'
+            b'A</a><a class="result__snippet">about a</a></div>')
+    assert web_search._parse_duckduckgo(html, 5) == [{"title": "A", "url": "https://a.example/x",
+                                                      "snippet": "about a"}]
+
+
+def test_canonical_url_ignores_tracking_and_www():
+    assert (web_search._canonical_url("https://www.Example.com/a/?utm_source=x&b=1&gclid=2")
+            == web_search._canonical_url("http://example.com/a?b=1"))
+
+
+def test_duplicates_across_engines_are_merged(engines):
+    engines.set(duckduckgo=[site(1), site(2, snippet="short")],
+                bing=[site(2, host="example.com", snippet="a longer snippet"), site(3)])
+    results, complete = web_search._search_engines("query", 5)
+    assert complete
+    assert [r["title"] for r in results] == ["Page 1", "Page 2", "Page 3"]
+    assert sorted(results[1]["engines"]) == ["bing", "duckduckgo"]
+    assert results[1]["snippet"] == "a longer snippet"
+    assert engines.names() == ["bing", "duckduckgo"]      # Google no hace falta
+
+
+def test_returns_once_enough_unique_results(engines):
+    engines.set(duckduckgo=[site(i) for i in range(5)], bing=[site(i) for i in range(5, 10)],
+                delays=dict(duckduckgo=3.0))
+    started = time.monotonic()
+    results, _ = web_search._search_engines("query", 5)
+    assert time.monotonic() - started < 1.0
+    assert [r["engines"] for r in results] == [["bing"]] * 5
+
+
+def test_google_is_the_fallback(engines):
+    engines.set(duckduckgo=[], bing=RuntimeError("blocked"), google=[site(9)])
+    results, complete = web_search._search_engines("query", 5)
+    assert [r["title"] for r in results] == ["Page 9"]
+    assert not complete
+    assert engines.names() == ["bing", "duckduckgo", "google"]
+
+
+def test_normalized_queries_hit_the_memory_cache(engines, cache):
+    engines.set(duckduckgo=[site(1)])
+    first = run_tool("Python  asyncio")
+    second = run_tool("  python ASYNCIO ")
+    assert "Page 1" in first and "Page 1" in second
+    assert first.splitlines()[-1].startswith("Cache: miss")
+    assert second.splitlines()[-1].startswith("Cache: memory")
+    assert len(engines.calls) == 2                         # DuckDuckGo + Bing, una sola vez
+
+    assert run_tool("python asyncio", use_cache=False).splitlines()[-1].startswith("Cache: bypass")
+    assert len(engines.calls) == 4
+
+
+def test_empty_results_are_cached(engines, cache):
+    run_tool("nothing here")
+    assert run_tool("Nothing Here").splitlines()[-1].startswith("Cache: memory")
+    assert engines.names() == ["bing", "duckduckgo", "google"]
+
+
+@pytest.mark.parametrize("failure", ["error", "timeout"])
+def test_failed_searches_are_not_negative_cached(engines, cache, monkeypatch, failure):
+    if failure == "error":
+        engines.set(duckduckgo=RuntimeError("rate limited"), bing=RuntimeError("rate limited"),
+                    google=RuntimeError("429"))
+    else:
+        monkeypatch.setattr(web_search, "SEARCH_DEADLINE_SECONDS", 0.3)
+        engines.set(delays=dict(duckduckgo=1.0, bing=1.0))
+    output = run_tool("python asyncio")
+    assert output.startswith("No search results found")
+    assert output.splitlines()[-1].startswith("Cache: not cached")
+
+    engines.set(bing=[site(1)])
+    output = run_tool("python asyncio")
+    assert "Page 1" in output and output.splitlines()[-1].startswith("Cache: miss")
+
+
+def test_disk_layer_survives_a_new_process(engines, cache, monkeypatch):
+    engines.set(bing=[site(1)])
+    run_tool("python asyncio")
+    monkeypatch.setattr(search_cache, "_cache", SearchCache(db_path=cache))
+    engines.calls.clear()
+    output = run_tool("python asyncio")
+    assert "Page 1" in output and output.splitlines()[-1].startswith("Cache: disk")
+    assert engines.calls == []
+
+
+def test_unwritable_disk_layer_falls_back_to_memory(engines, monkeypatch):
+    monkeypatch.setattr(search_cache, "_cache", SearchCache(db_path="/proc/nope/x.sqlite3"))
+    engines.set(bing=[site(1)])
+    assert "Page 1" in run_tool("python asyncio")
+    output = run_tool("python asyncio")
+    assert output.splitlines()[-1].startswith("Cache: memory")
+    assert "sqlite" not in output.splitlines()[-1]
+
+
+def test_abandoned_searches_do_not_starve_new_ones(monkeypatch):
+    # Búsquedas previas abandonadas con motores colgados no deben retrasar las siguientes
+    release = threading.Event()
+
+    def engine(name):
+        def search(query, headers, max_results, timeout):
+            if query == "stuck":
+                release.wait(5)
+                return []
+            return [site(f"{name}-{query}")]
+        return search
+
+    monkeypatch.setattr(web_search, "PRIMARY_ENGINES", [("duckduckgo", engine("ddg")), ("bing", engine("bing"))])
+    monkeypatch.setattr(web_search, "_search_google_simple", engine("google"))
+    try:
+        for _ in range(6):
+            assert web_search._search_engines("stuck", 5, deadline=0.1) == ([], False)
+        started = time.monotonic()
+        results, complete = web_search._search_engines("fresh", 2, deadline=2.0)
+        assert time.monotonic() - started < 0.5
+        assert complete and len(results) == 2
+    finally:
+        release.set()
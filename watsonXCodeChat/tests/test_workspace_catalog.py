@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from workspace_catalog import KIND_FILE, WorkspaceCatalog
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text("print(1)\n")
+    catalog = WorkspaceCatalog(root=tmp_path, use_inotify=False)
+    catalog.refresh()
+    return catalog
+
+
+def files(catalog):
+    return {rel: size for rel, kind, size, _ in catalog.iter_entries() if kind == KIND_FILE}
+
+
+def test_invalidate_sees_own_writes_before_rescan_interval(catalog, tmp_path):
+    app = tmp_path / "src" / "app.py"
+    app.write_text("print('changed')\n")
+    (tmp_path / "src" / "new.py").write_text("x = 1\n")
+    assert files(catalog) == {"src/app.py": 9}                # snapshot aún vigente
+
+    catalog.invalidate(app)
+    catalog.invalidate(tmp_path / "src" / "new.py")
+    assert files(catalog) == {"src/app.py": 17, "src/new.py": 6}
+    assert catalog.last_refresh_kind == "invalidated (1 dir(s))"
+
+
+def test_invalidate_discovers_new_directories(catalog, tmp_path):
+    (tmp_path / "pkg" / "sub").mkdir(parents=True)
+    (tmp_path / "pkg" / "sub" / "mod.py").write_text("")
+    catalog.invalidate(tmp_path / "pkg" / "sub" / "mod.py")
+    assert "pkg/sub/mod.py" in files(catalog)
+
+
+def test_invalidate_after_delete_and_outside_paths(catalog, tmp_path):
+    os.remove(tmp_path / "src" / "app.py")
+    catalog.invalidate(tmp_path / "src" / "app.py")
+    catalog.invalidate("/somewhere/else.py")                  # fuera del workspace: se ignora
+    assert files(catalog) == {}
+
+
+def test_invalidate_without_path_forces_full_rescan(catalog, tmp_path):
+    (tmp_path / "src" / "app.py").write_text("print('a longer line')\n")
+    catalog.invalidate()
+    assert files(catalog) == {"src/app.py": 23}
+    assert catalog.last_refresh_kind.startswith("mtime rescan")
+
+
+def test_mtime_rescan_replaces_nodes(catalog, tmp_path):
+    before = catalog._dirs["src"]
+    sizes = list(before.sizes)
+    (tmp_path / "src" / "app.py").write_text("print(22)\n")
+    catalog.invalidate()
+    catalog.refresh()
+    assert list(before.sizes) == sizes                        # el snapshot antiguo no cambia
+    assert catalog._dirs["src"] is not before
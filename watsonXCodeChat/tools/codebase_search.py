@@ -1,10 +1,25 @@
+import ast
 import concurrent.futures as cf
+import json
+import mmap
+import os
 import re
+import tempfile
+import time
+import zlib
+from array import array
+from bisect import bisect_left
 from pathlib import Path
-from typing import List, Optional, Sequence
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+try:                                 # requerido solo por el modo semántico
+    import numpy as np
+except ImportError:                  # pragma: no cover - depende del entorno
+    np = None
 
 # Importa el decorador de herramientas desde el ADK de watsonx Orchestrate
 from ibm_watsonx_orchestrate.agent_builder.tools import tool
+from workspace_catalog import get_catalog
 
 # --------------------------------------------------------------------------- #
 # Configuración interna
@@ -14,10 +29,45 @@ DEFAULT_EXTS: Sequence[str] = (".py", ".js", ".ts", ".java",
 MAX_RESULTS: int = 50                                       # tope de paths devueltos
 CASE_SENSITIVE: bool = False                                # búsqueda case-insensitive
 
+WORKSPACE = Path(r"/home/testagent/workspace").resolve()
+INDEX_DIR: Path = WORKSPACE / ".codebase_index"             # índice persistente de trigramas
+INDEX_VERSION: int = 1
+MAX_INDEXED_BYTES: int = 1 << 20                            # ficheros mayores: siempre candidatos
+REBUILD_MIN_CHANGES: int = 256                              # cambios tolerados sin reconstruir...
+REBUILD_RATIO: float = 0.05                                 # ...o este % del total indexado
+PARALLEL_BUILD_THRESHOLD: int = 2000                        # a partir de aquí se usa ProcessPool
+
+SEMANTIC_DIR: Path = INDEX_DIR / "semantic"                 # almacén de vectores por chunk
+SEMANTIC_DIM: int = 1024                                    # dimensión del hashing TF-IDF
+SEMANTIC_TOP_K: int = 10                                    # snippets devueltos en modo semántico
+MAX_CHUNK_LINES: int = 80                                   # tamaño máximo de un chunk
+MIN_CHUNK_LINES: int = 4                                    # chunks menores se fusionan
+SNIPPET_LINES: int = 12                                     # líneas mostradas por snippet
+SEMANTIC_SYNC_BUDGET: float = 5.0                           # segundos de embedding por llamada
+EMBED_MODEL_ENV: str = "CODEBASE_EMBED_MODEL"               # modelo local opcional (sentence-transformers)
+
 
 # --------------------------------------------------------------------------- #
 # Implementación auxiliar
 # --------------------------------------------------------------------------- #
+def _replace_with(target: Path, write) -> None:
+    """
+    Llama a `write(f)` sobre un temporal único (mkstemp) del mismo directorio y lo renombra
+    sobre `target`; dos procesos que guardan a la vez nunca comparten el temporal.
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{target.name}.", suffix=".tmp", dir=target.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
 def _iter_code_files(roots: Sequence[Path], exts: Sequence[str]) -> list[Path]:
     """Recorre recursivamente los directorios dados devolviendo paths con extensiones deseadas."""
     paths: list[Path] = []
@@ -39,14 +89,570 @@ def _file_contains(pattern: re.Pattern[str], path: Path) -> Optional[Path]:
     return None
 
 
+def _scan_code_files(exts: Sequence[str]) -> Dict[str, Tuple[int, int]]:
+    """
+    {path_absoluto: (mtime_ns, size)} de los ficheros de código del WORKSPACE,
+    leído del catálogo compartido (sin recorrer de nuevo el árbol).
+    """
+    return {path: (mtime, size)
+            for path, size, mtime in get_catalog().iter_files(WORKSPACE)
+            if os.path.splitext(path)[1].lower() in exts}
+
+
+def _trigram_key(gram: bytes) -> int:
+    """Codifica 3 bytes como entero de 24 bits."""
+    return (gram[0] << 16) | (gram[1] << 8) | gram[2]
+
+
+def _file_trigrams(path: str) -> Optional[array]:
+    """
+    Trigramas (en minúsculas ASCII) de un fichero, ordenados.
+    Devuelve None si el fichero no se indexa (demasiado grande o ilegible).
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read(MAX_INDEXED_BYTES + 1)
+    except OSError:
+        return None
+    if len(data) > MAX_INDEXED_BYTES:
+        return None
+    data = data.lower()
+    grams = {data[i:i + 3] for i in range(len(data) - 2)}
+    return array("I", sorted(_trigram_key(g) for g in grams))
+
+
+def _query_trigrams(query: str) -> Set[int]:
+    """
+    Trigramas que cualquier coincidencia de la query debe contener.
+    Solo se usan trigramas ASCII: el plegado de mayúsculas Unicode del regex
+    no coincide con bytes.lower(), así que los no-ASCII no restringen.
+    """
+    data = query.encode("utf-8").lower()
+    grams: Set[int] = set()
+    for i in range(len(data) - 2):
+        g = data[i:i + 3]
+        if max(g) < 0x80:
+            grams.add(_trigram_key(g))
+    return grams
+
+
+class _TrigramIndex:
+    """
+    Índice invertido de trigramas persistido en INDEX_DIR:
+      • meta.json      → versión, extensiones y tabla de ficheros [path, mtime_ns, size]
+      • postings.bin   → claves ordenadas | offsets | posting lists (uint32)
+    Las posting lists se leen bajo demanda a través de mmap.
+    """
+
+    def __init__(self, files: List[Tuple[str, int, int]], unindexed: List[int],
+                 keys: array, offsets: array, postings: memoryview, mm: Optional[mmap.mmap] = None):
+        self.files = files
+        self.unindexed = unindexed
+        self.by_path = {p: (i, m, s) for i, (p, m, s) in enumerate(files)}
+        self.keys = keys
+        self.offsets = offsets
+        self.postings = postings
+        self._mm = mm
+
+    # ---------------------------- construcción ----------------------------- #
+    @classmethod
+    def build(cls, snapshot: Dict[str, Tuple[int, int]]) -> "_TrigramIndex":
+        files = sorted((p, m, s) for p, (m, s) in snapshot.items())
+        paths = [p for p, _, _ in files]
+
+        if len(paths) >= PARALLEL_BUILD_THRESHOLD:
+            with cf.ProcessPoolExecutor() as pool:
+                per_file = list(pool.map(_file_trigrams, paths, chunksize=64))
+        else:
+            per_file = [_file_trigrams(p) for p in paths]
+
+        lists: Dict[int, array] = {}
+        unindexed: List[int] = []
+        for file_id, grams in enumerate(per_file):
+            if grams is None:
+                unindexed.append(file_id)
+                continue
+            for key in grams:
+                plist = lists.get(key)
+                if plist is None:
+                    plist = lists[key] = array("I")
+                plist.append(file_id)
+
+        keys = array("I", sorted(lists))
+        offsets = array("Q", [0])
+        postings = array("I")
+        for key in keys:
+            postings.extend(lists[key])
+            offsets.append(len(postings))
+        index = cls(files, unindexed, keys, offsets, memoryview(postings))
+        index._save(postings)
+        return index
+
+    def _save(self, postings: array) -> None:
+        """Escritura atómica (temporal + replace) para no dejar nunca un índice a medias."""
+        INDEX_DIR.mkdir(parents=True, exist_ok=True)
+
+        def write_postings(f) -> None:
+            f.write(array("Q", [len(self.keys), len(postings)]).tobytes())
+            f.write(array("Q", self.keys).tobytes())  # alineado a 8 bytes
+            self.offsets.tofile(f)
+            postings.tofile(f)
+
+        meta = json.dumps({
+            "version": INDEX_VERSION,
+            "exts": list(DEFAULT_EXTS),
+            "max_indexed_bytes": MAX_INDEXED_BYTES,
+            "files": self.files,
+            "unindexed": self.unindexed,
+        }).encode("utf-8")
+        _replace_with(INDEX_DIR / "postings.bin", write_postings)
+        _replace_with(INDEX_DIR / "meta.json", lambda f: f.write(meta))
+
+    # ------------------------------- carga --------------------------------- #
+    @classmethod
+    def load(cls) -> Optional["_TrigramIndex"]:
+        try:
+            meta = json.loads((INDEX_DIR / "meta.json").read_text(encoding="utf-8"))
+            if (meta.get("version") != INDEX_VERSION
+                    or meta.get("exts") != list(DEFAULT_EXTS)
+                    or meta.get("max_indexed_bytes") != MAX_INDEXED_BYTES):
+                return None
+            with open(INDEX_DIR / "postings.bin", "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        view = memoryview(mm)
+        n_keys, n_postings = view[:16].cast("Q")
+        pos = 16
+        keys = array("I", view[pos:pos + 8 * n_keys].cast("Q"))
+        pos += 8 * n_keys
+        offsets = array("Q")
+        offsets.frombytes(view[pos:pos + 8 * (n_keys + 1)])
+        pos += 8 * (n_keys + 1)
+        postings = view[pos:pos + 4 * n_postings].cast("I")
+        files = [tuple(f) for f in meta["files"]]
+        return cls(files, meta["unindexed"], keys, offsets, postings, mm)
+
+    # ------------------------------ consulta ------------------------------- #
+    def _posting(self, key: int) -> Sequence[int]:
+        i = bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return ()
+        return self.postings[self.offsets[i]:self.offsets[i + 1]]
+
+    def candidates(self, grams: Set[int]) -> Set[int]:
+        """Intersección de posting lists (empezando por la más corta) + ficheros no indexados."""
+        if not grams:
+            return set(range(len(self.files)))
+        lists = sorted((self._posting(g) for g in grams), key=len)
+        result = set(lists[0])
+        for plist in lists[1:]:
+            if not result:
+                break
+            result.intersection_update(plist)
+        result.update(self.unindexed)
+        return result
+
+
+_INDEX_CACHE: Dict[str, object] = {}
+
+
+def _get_index(snapshot: Dict[str, Tuple[int, int]]) -> Tuple[_TrigramIndex, Set[str], str]:
+    """
+    Devuelve (índice, paths_modificados_o_nuevos, nota_para_cabecera).
+    Reutiliza el índice en memoria o en disco; lo reconstruye si falta o si
+    el número de ficheros cambiados supera el umbral.
+    """
+    t0 = time.perf_counter()
+    index: Optional[_TrigramIndex] = None
+    try:
+        stamp = (INDEX_DIR / "postings.bin").stat().st_mtime_ns
+    except OSError:
+        stamp = None
+    if stamp is not None and _INDEX_CACHE.get("stamp") == stamp:
+        index = _INDEX_CACHE["index"]  # type: ignore[assignment]
+    elif stamp is not None:
+        index = _TrigramIndex.load()
+
+    changed: Set[str] = set()
+    if index is not None:
+        for path, (mtime, size) in snapshot.items():
+            entry = index.by_path.get(path)
+            if entry is None or entry[1] != mtime or entry[2] != size:
+                changed.add(path)
+        deleted = sum(1 for p in index.by_path if p not in snapshot)
+        if len(changed) + deleted > max(REBUILD_MIN_CHANGES, REBUILD_RATIO * len(index.files)):
+            index = None
+
+    if index is None:
+        index = _TrigramIndex.build(snapshot)
+        changed = set()
+        note = f"built in {time.perf_counter() - t0:.2f}s ({len(index.files)} files)"
+    else:
+        note = f"loaded in {time.perf_counter() - t0:.3f}s ({len(index.files)} files, {len(changed)} changed)"
+
+    try:
+        _INDEX_CACHE.update(stamp=(INDEX_DIR / "postings.bin").stat().st_mtime_ns, index=index)
+    except OSError:
+        pass
+    return index, changed, note
+
+
+def _within(path: str, roots: Sequence[Path]) -> bool:
+    return any(path == str(r) or path.startswith(str(r) + os.sep) for r in roots)
+
+
+# --------------------------------------------------------------------------- #
+# Búsqueda semántica por chunks
+# --------------------------------------------------------------------------- #
+_IDENT_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_SUBTOKEN_RE = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+")
+_DEF_LINE_RE = re.compile(
+    r"^\s*(?:export\s+)?(?:(?:public|private|protected|static|final|abstract|async|virtual|inline)\s+)*"
+    r"(?:def|class|function|interface|enum|struct|fn|func|[\w<>\[\],]+\s+\w+\s*\([^;]*$)"
+)
+_STOPWORDS = frozenset({"the", "and", "for", "self", "return", "import", "from", "if", "else",
+                        "in", "is", "of", "to", "none", "true", "false", "this", "new", "var",
+                        "let", "const", "int", "void", "str"})
+
+
+def _tokenize(text: str) -> List[str]:
+    """Identificadores en minúsculas más sus sub-tokens camelCase/snake_case."""
+    tokens: List[str] = []
+    for ident in _IDENT_RE.findall(text):
+        parts = [p.lower() for p in _SUBTOKEN_RE.findall(ident)]
+        if len(parts) > 1:
+            tokens.append(ident.lower())
+        tokens.extend(parts)
+    return [t for t in tokens if len(t) > 1 and t not in _STOPWORDS]
+
+
+def _chunk_bounds(path: str, lines: List[str]) -> List[Tuple[int, int]]:
+    """
+    Rangos (inicio, fin) 1-indexados de chunks del tamaño de una función/clase.
+    Python se trocea con ast; el resto de lenguajes con una heurística de líneas
+    de definición. Los chunks mayores que MAX_CHUNK_LINES se parten en ventanas.
+    """
+    starts: Set[int] = {1}
+    if path.endswith(".py"):
+        try:
+            tree = ast.parse("".join(lines))
+        except (SyntaxError, ValueError):
+            tree = None
+        if tree is not None:
+            for node in tree.body:
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    first = min([node.lineno] + [d.lineno for d in node.decorator_list])
+                    starts.add(first)
+                    if isinstance(node, ast.ClassDef) and node.end_lineno - first >= MAX_CHUNK_LINES:
+                        for sub in node.body:
+                            if isinstance(sub, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                                starts.add(min([sub.lineno] + [d.lineno for d in sub.decorator_list]))
+                    if node.end_lineno < len(lines):
+                        starts.add(node.end_lineno + 1)
+    if len(starts) == 1:
+        starts.update(i for i, line in enumerate(lines, 1) if _DEF_LINE_RE.match(line))
+
+    bounds: List[Tuple[int, int]] = []
+    ordered = sorted(s for s in starts if s <= len(lines))
+    for start, nxt in zip(ordered, ordered[1:] + [len(lines) + 1]):
+        for s in range(start, nxt, MAX_CHUNK_LINES):
+            e = min(s + MAX_CHUNK_LINES, nxt) - 1
+            while s <= e and not lines[s - 1].strip():
+                s += 1
+            while e >= s and not lines[e - 1].strip():
+                e -= 1
+            if s > e:
+                continue
+            # Los fragmentos sueltos (imports, constantes) se pegan al chunk anterior
+            if bounds and e - s < MIN_CHUNK_LINES and s - bounds[-1][1] <= 3:
+                bounds[-1] = (bounds[-1][0], e)
+            else:
+                bounds.append((s, e))
+    return bounds
+
+
+class _HashingEmbedder:
+    """
+    Vectores TF (sublineales, normalizados) proyectados con feature hashing.
+    El IDF se aplica en la consulta (peso idf² en la query), así el almacén
+    solo necesita mantener las frecuencias de documento al actualizarse.
+    """
+    name = f"hashing-tfidf-{SEMANTIC_DIM}"
+    dim = SEMANTIC_DIM
+    uses_idf = True
+
+    @staticmethod
+    def features(text: str) -> Dict[int, float]:
+        counts: Dict[int, float] = {}
+        for tok in _tokenize(text):
+            h = zlib.crc32(tok.encode("utf-8"))
+            slot = h % SEMANTIC_DIM
+            counts[slot] = counts.get(slot, 0.0) + (1.0 if h & 0x80000000 else -1.0)
+        return counts
+
+    def encode(self, texts: List[str]) -> "np.ndarray":
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for slot, tf in self.features(text).items():
+                out[row, slot] = np.sign(tf) * (1.0 + np.log(abs(tf))) if tf else 0.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.where(norms == 0, 1.0, norms)
+
+
+class _ModelEmbedder:
+    """Modelo local de sentence-transformers en CPU (opcional, vía CODEBASE_EMBED_MODEL)."""
+    uses_idf = False
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self._model = SentenceTransformer(model_name, device="cpu")
+        self.name = f"st-{model_name}"
+        self.dim = self._model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str]) -> "np.ndarray":
+        return self._model.encode(texts, batch_size=32, normalize_embeddings=True,
+                                  convert_to_numpy=True).astype(np.float32)
+
+
+_EMBEDDER: List[object] = []
+
+
+def _get_embedder():
+    if not _EMBEDDER:
+        embedder: object = _HashingEmbedder()
+        model_name = os.environ.get(EMBED_MODEL_ENV)
+        if model_name:
+            try:
+                embedder = _ModelEmbedder(model_name)
+            except Exception as e:
+                print(f"[codebase_search] Embedding model unavailable ({e}); using TF-IDF hashing")
+        _EMBEDDER.append(embedder)
+    return _EMBEDDER[0]
+
+
+class _ChunkStore:
+    """
+    Almacén de vectores por chunk persistido en SEMANTIC_DIR:
+      • vectors.npy → matriz float16 (capacidad × dim) abierta con memmap
+      • df.npy      → frecuencias de documento por feature (solo hashing)
+      • meta.json   → chunks [path, inicio, fin], ficheros {path: [mtime_ns, size, filas]}
+    Las filas de chunks borrados se ponen a cero y se reutilizan.
+    Los vectores se modifican en sitio, así que mientras una actualización está en curso existe
+    el marcador `updating`: si el proceso muere antes de guardar meta.json, el almacén
+    en disco no se usa (vectores y metadatos podrían no corresponderse) y se reconstruye.
+    """
+
+    def __init__(self, embedder):
+        self.embedder = embedder
+        self.chunks: List[Optional[List]] = []
+        self.files: Dict[str, List] = {}
+        self.free: List[int] = []
+        self.df = np.zeros(embedder.dim, dtype=np.int64)
+        self.vectors = None
+        self._load()
+
+    # ----------------------------- persistencia ---------------------------- #
+    def _load(self) -> None:
+        if (SEMANTIC_DIR / "updating").exists():
+            return
+        try:
+            meta = json.loads((SEMANTIC_DIR / "meta.json").read_text(encoding="utf-8"))
+            if (meta.get("embedder") != self.embedder.name
+                    or meta.get("chunk_lines") != [MIN_CHUNK_LINES, MAX_CHUNK_LINES]):
+                return
+            self.vectors = np.load(SEMANTIC_DIR / "vectors.npy", mmap_mode="r+")
+            self.df = np.load(SEMANTIC_DIR / "df.npy")
+        except (OSError, ValueError):
+            self.vectors = None
+            return
+        self.chunks = meta["chunks"]
+        self.files = meta["files"]
+        self.free = meta["free"]
+
+    def _begin_update(self) -> None:
+        SEMANTIC_DIR.mkdir(parents=True, exist_ok=True)
+        (SEMANTIC_DIR / "updating").touch()
+
+    def _save(self) -> None:
+        """Vectores a disco, después df y meta.json (atómicos) y por último se quita el marcador."""
+        if self.vectors is not None:
+            self.vectors.flush()
+        meta = json.dumps({
+            "embedder": self.embedder.name,
+            "chunk_lines": [MIN_CHUNK_LINES, MAX_CHUNK_LINES],
+            "chunks": self.chunks,
+            "files": self.files,
+            "free": self.free,
+        }).encode("utf-8")
+        _replace_with(SEMANTIC_DIR / "df.npy", lambda f: np.save(f, self.df))
+        _replace_with(SEMANTIC_DIR / "meta.json", lambda f: f.write(meta))
+        (SEMANTIC_DIR / "updating").unlink(missing_ok=True)
+
+    def _ensure_capacity(self, rows: int) -> None:
+        capacity = 0 if self.vectors is None else self.vectors.shape[0]
+        if rows <= capacity:
+            return
+        new_capacity = max(rows, capacity * 2, 1024)
+        fd, tmp = tempfile.mkstemp(prefix=".vectors.npy.", suffix=".tmp", dir=SEMANTIC_DIR)
+        os.close(fd)
+        try:
+            grown = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float16,
+                                              shape=(new_capacity, self.embedder.dim))
+            if capacity:
+                grown[:capacity] = self.vectors
+            grown.flush()
+            del grown
+            os.replace(tmp, SEMANTIC_DIR / "vectors.npy")
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        self.vectors = np.load(SEMANTIC_DIR / "vectors.npy", mmap_mode="r+")
+
+    # ----------------------------- actualización --------------------------- #
+    def _drop_file(self, path: str) -> None:
+        entry = self.files.pop(path, None)
+        if not entry:
+            return
+        for row in entry[2]:
+            if self.embedder.uses_idf:
+                self.df[np.nonzero(self.vectors[row])[0]] -= 1
+            self.vectors[row] = 0
+            self.chunks[row] = None
+            self.free.append(row)
+
+    def _add_file(self, path: str, mtime: int, size: int) -> int:
+        try:
+            with open(path, encoding="utf-8", errors="ignore") as f:
+                lines = f.readlines()
+        except OSError:
+            return 0
+        bounds = _chunk_bounds(path, lines)
+        rel = os.path.relpath(path, WORKSPACE)
+        texts = [rel + "\n" + "".join(lines[s - 1:e]) for s, e in bounds]
+        vectors = self.embedder.encode(texts) if texts else None
+
+        rows: List[int] = []
+        for (s, e), vec in zip(bounds, vectors if vectors is not None else []):
+            if self.free:
+                row = self.free.pop()
+            else:
+                row = len(self.chunks)
+                self.chunks.append(None)
+                self._ensure_capacity(len(self.chunks))
+            self.vectors[row] = vec
+            self.chunks[row] = [path, s, e]
+            if self.embedder.uses_idf:
+                self.df[np.nonzero(vec)[0]] += 1
+            rows.append(row)
+        self.files[path] = [mtime, size, rows]
+        return len(rows)
+
+    def sync(self, snapshot: Dict[str, Tuple[int, int]], roots: Sequence[Path] = (),
+             budget: Optional[float] = None) -> Tuple[int, int, int]:
+        """
+        Re-embebe solo los ficheros nuevos o cuyo mtime/size cambió, primero los de `roots`,
+        hasta agotar `budget` segundos (al menos uno por llamada); el resto queda para las siguientes.
+        Devuelve (ficheros, chunks, ficheros pendientes).
+        """
+        stale = [p for p, entry in self.files.items()
+                 if p not in snapshot or tuple(snapshot[p]) != (entry[0], entry[1])]
+        fresh = [p for p, stat in snapshot.items()
+                 if p not in self.files or tuple(stat) != tuple(self.files[p][:2])]
+        if not stale and not fresh:
+            return 0, 0, 0
+        fresh.sort(key=lambda p: (not _within(p, roots), p))
+        deadline = None if budget is None else time.perf_counter() + budget
+        self._begin_update()
+        for path in stale:
+            self._drop_file(path)
+        n_files = n_chunks = 0
+        for path in fresh:
+            if n_files and deadline is not None and time.perf_counter() >= deadline:
+                break
+            n_chunks += self._add_file(path, *snapshot[path])
+            n_files += 1
+        self._save()
+        return n_files, n_chunks, len(fresh) - n_files
+
+    # -------------------------------- consulta ----------------------------- #
+    def search(self, query: str, roots: Sequence[Path], top_k: int) -> List[Tuple[float, str, int, int]]:
+        n = len(self.chunks)
+        if n == 0 or self.vectors is None:
+            return []
+        q = self.embedder.encode([query])[0]
+        if self.embedder.uses_idf:
+            live = n - len(self.free)
+            idf = np.log((live + 1.0) / (self.df + 1.0)) + 1.0
+            q = q * idf * idf
+            q /= (np.linalg.norm(q) or 1.0)
+
+        scores = np.empty(n, dtype=np.float32)
+        block = 65536
+        for s in range(0, n, block):
+            e = min(s + block, n)
+            scores[s:e] = self.vectors[s:e].astype(np.float32) @ q
+
+        order = np.argsort(-scores, kind="stable")
+        results: List[Tuple[float, str, int, int]] = []
+        for row in order:
+            if scores[row] <= 0:
+                break
+            chunk = self.chunks[row]
+            if chunk is None or not _within(chunk[0], roots):
+                continue
+            results.append((float(scores[row]), chunk[0], chunk[1], chunk[2]))
+            if len(results) >= top_k:
+                break
+        return results
+
+
+_STORE: List[_ChunkStore] = []
+
+
+def _semantic_search(query: str, roots: Sequence[Path], exts: Sequence[str]) -> Tuple[str, str]:
+    """Devuelve (nota_para_cabecera, cuerpo) con los top-k snippets y su score."""
+    t0 = time.perf_counter()
+    embedder = _get_embedder()
+    if not _STORE or _STORE[0].embedder is not embedder:
+        _STORE[:] = [_ChunkStore(embedder)]
+    store = _STORE[0]
+    n_files, n_chunks, pending = store.sync(_scan_code_files(exts), roots, SEMANTIC_SYNC_BUDGET)
+    t_query = time.perf_counter()
+    hits = store.search(query, roots, SEMANTIC_TOP_K)
+    note = (f"semantic ({embedder.name}), {len(store.files)} files / "
+            f"{len(store.chunks) - len(store.free)} chunks, re-embedded {n_files} file(s) "
+            f"({n_chunks} chunks) in {t_query - t0:.2f}s; query {time.perf_counter() - t_query:.3f}s")
+    if pending:
+        note += (f"; index still building: {pending} file(s) not embedded yet, they are added on "
+                 f"the next calls (use search_mode=\"exact\" for a complete literal search)")
+
+    parts: List[str] = []
+    for rank, (score, path, start, end) in enumerate(hits, 1):
+        try:
+            with open(path, encoding="utf-8", errors="ignore") as f:
+                lines = f.readlines()[start - 1:min(end, start - 1 + SNIPPET_LINES)]
+        except OSError:
+            lines = []
+        more = "    ...\n" if end - start + 1 > SNIPPET_LINES else ""
+        parts.append(f"{rank}. {path}:{start}-{end} (score {score:.3f})\n"
+                     + "".join("    " + line.rstrip("\n") + "\n" for line in lines) + more)
+    return note, "\n".join(parts)
+
+
 # --------------------------------------------------------------------------- #
-# Firma requerida por el agente                                                 
+# Firma requerida por el agente
 # --------------------------------------------------------------------------- #
 @tool
 def codebase_search(
     query: str,
     target_directories: Optional[List[str]] = None,
     explanation: str = "",
+    search_mode: str = "semantic",
 ) -> str:
     """
     Find snippets of code from the codebase most relevant to the search query.
@@ -61,23 +667,54 @@ def codebase_search(
         Optional list of directories to constrain the search to.
     explanation : str
         One-sentence explanation of why this invocation is being made.
+    search_mode : str
+        "semantic" (default) returns the top-ranked code chunks with scores; on a
+        large workspace the index is built a few seconds per call, so the first
+        calls rank only the part indexed so far (the header says how much is left);
+        "exact" returns the files containing the query literally.
 
     Returns
     -------
     str
-        Human-readable summary of matching files (limited to MAX_RESULTS).
+        Human-readable summary of the ranked snippets or matching files.
     """
     # Preparar raíces de búsqueda
     roots = [Path(d).expanduser().resolve() for d in (target_directories or ["."])]
+    exts = tuple(e.lower() for e in DEFAULT_EXTS)
+    in_workspace = all(r == WORKSPACE or WORKSPACE in r.parents for r in roots)
+
+    t0 = time.perf_counter()
+    if search_mode != "exact" and np is not None and in_workspace:
+        index_note, body = _semantic_search(query, roots, exts)
+        header = (
+            f"Search completed for query: '{query}'. "
+            f"{explanation or 'Semantic code search triggered.'}\n"
+            f"Index: {index_note}; total {time.perf_counter() - t0:.3f}s\n"
+            f"Results: {body.count(' (score ')} snippet(s) ranked.\n"
+        )
+        return header + (body or "No relevant code found.")
 
     # Compilar patrón (regExp) a partir de la query literal
     flags = 0 if CASE_SENSITIVE else re.IGNORECASE
     pattern = re.compile(re.escape(query), flags)
 
-    # 1. Recolectar paths candidatos
-    all_files = _iter_code_files(roots, tuple(e.lower() for e in DEFAULT_EXTS))
+    if in_workspace:
+        # 1. Candidatos a partir del índice de trigramas (sin abrir ficheros)
+        snapshot = _scan_code_files(exts)
+        index, changed, index_note = _get_index(snapshot)
+        t_query = time.perf_counter()
+        ids = index.candidates(_query_trigrams(query))
+        candidates = {index.files[i][0] for i in ids} | changed
+        candidates = sorted(p for p in candidates if p in snapshot and _within(p, roots))
+        index_note += (f"; query {time.perf_counter() - t_query:.3f}s, "
+                       f"{len(candidates)}/{len(snapshot)} candidate file(s)")
+        all_files = [Path(p) for p in candidates]
+    else:
+        # Fuera del workspace no hay índice: recorrido completo
+        all_files = sorted(_iter_code_files(roots, exts))
+        index_note = "not used (target outside workspace)"
 
-    # 2. Buscar en paralelo
+    # 2. Verificar candidatos en paralelo
     matches: list[str] = []
     with cf.ThreadPoolExecutor() as pool:
         for path in pool.map(lambda p: _file_contains(pattern, p), all_files):
@@ -89,9 +726,9 @@ def codebase_search(
     # 3. Formatear salida
     header = (
         f"Search completed for query: '{query}'. "
-        f"{explanation or 'Semantic code search triggered.'}\n"
+        f"{explanation or 'Exact code search triggered.'}\n"
+        f"Index: {index_note}; total {time.perf_counter() - t0:.3f}s\n"
         f"Results: {len(matches)} file(s) matched.\n"
     )
     body = "\n".join(matches)
     return header + (body or "No relevant files found.")
-
@@ -1,100 +1,579 @@
+import os
+import re
+import shutil
+import tempfile
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
 # Importa el decorador de herramientas desde el ADK de watsonx Orchestrate
 from ibm_watsonx_orchestrate.agent_builder.tools import tool
+from workspace_catalog import get_catalog
+
+# Marcador "// ... existing code ...": como en la versión original, cualquier línea que
+# contenga "existing code" (en cualquier sintaxis de comentario y posición)
+_MARKER_RE = re.compile(r"existing code", re.IGNORECASE)
+# Un ancla empatada se acepta aunque haya otra igual más lejos si la región reemplazada
+# no supera este múltiplo del tamaño del bloque
+NEAREST_TAIL_SLACK = 2
+# Un code_edit sin marcadores reemplaza el archivo completo; se rechaza si tiene menos de esta
+# fracción de las líneas del original (probablemente es solo la función cambiada)
+MARKERLESS_MIN_RATIO = 0.5
+
+
+class EditError(ValueError):
+    """La edición no se puede aplicar sin adivinar; el archivo no se modifica."""
+
+
+def _is_marker(line: str) -> bool:
+    return bool(_MARKER_RE.search(line))
+
+
+def _parse_blocks(code_edit: str) -> Tuple[List[List[str]], bool, bool]:
+    """
+    Divide code_edit en bloques de líneas separados por marcadores.
+    Devuelve (bloques, empieza_con_marcador, termina_con_marcador).
+    Las líneas en blanco pegadas a un marcador forman parte del código existente.
+    """
+    lines = code_edit.split('\n')
+    blocks: List[List[str]] = []
+    current: List[str] = []
+    leading = trailing = False
+    for line in lines:
+        if _is_marker(line):
+            if not blocks and not any(l.strip() for l in current):
+                leading = True
+            if any(l.strip() for l in current):
+                blocks.append(current)
+            current = []
+            trailing = True
+        else:
+            current.append(line)
+            if line.strip():
+                trailing = False
+    if any(l.strip() for l in current):
+        blocks.append(current)
+
+    trimmed = []
+    for i, block in enumerate(blocks):
+        start, end = 0, len(block)
+        if i > 0 or leading:
+            while start < end and not block[start].strip():
+                start += 1
+        if i < len(blocks) - 1 or trailing:
+            while end > start and not block[end - 1].strip():
+                end -= 1
+        trimmed.append(block[start:end])
+    return trimmed, leading, trailing
+
+
+class _AnchorIndex:
+    """Índice hash de líneas (sin espacios) del original → posiciones ordenadas."""
+
+    def __init__(self, lines: List[str]):
+        self.stripped = [l.strip() for l in lines]
+        self.positions: Dict[str, List[int]] = {}
+        for pos, key in enumerate(self.stripped):
+            if key:
+                self.positions.setdefault(key, []).append(pos)
+
+    def candidates(self, key: str, lo: int, hi: int) -> List[int]:
+        plist = self.positions.get(key, ())
+        return plist[bisect_left(plist, lo):bisect_left(plist, hi)] if plist else []
+
+    def forward(self, pos: int, block: List[str], i: int, hi: int) -> int:
+        """Líneas consecutivas iguales entre original[pos:] y block[i:]."""
+        n = 0
+        while pos + n < hi and i + n < len(block) and self.stripped[pos + n] == block[i + n]:
+            n += 1
+        return n
+
+    def backward(self, pos: int, block: List[str], j: int, lo: int, jlo: int) -> int:
+        """Líneas consecutivas iguales hacia atrás entre original[..pos] y block[..j]."""
+        n = 0
+        while pos - n >= lo and j - n >= jlo and self.stripped[pos - n] == block[j - n]:
+            n += 1
+        return n
+
+
+def _describe(line: str) -> str:
+    return line.strip()[:60]
+
+
+def apply_marker_edit(original_lines: List[str], code_edit: str) -> Tuple[List[str], int]:
+    """
+    Aplica un code_edit con marcadores "... existing code ..." sobre las líneas originales.
+    Cada bloque se ancla por su contexto inicial (cabeza) y final (cola); la región del
+    original entre ambas anclas se sustituye por el bloque. Devuelve (líneas_nuevas, bloques).
+    Lanza EditError si un bloque no se puede ubicar o su ubicación es ambigua.
+    """
+    blocks, leading, trailing = _parse_blocks(code_edit)
+    if not blocks:
+        raise EditError("code_edit does not contain any code outside the '... existing code ...' markers")
+    if not leading and not trailing and len(blocks) == 1:
+        # Sin marcadores: el bloque es el archivo completo
+        if len(blocks[0]) < MARKERLESS_MIN_RATIO * len(original_lines):
+            raise EditError(
+                f"code_edit has no '... existing code ...' markers, so it would replace the whole file, but it "
+                f"has {len(blocks[0])} lines and the file has {len(original_lines)}; mark the unchanged regions "
+                f"with '... existing code ...' or send the complete file")
+        return list(blocks[0]), 1
+
+    index = _AnchorIndex(original_lines)
+    n = len(original_lines)
+    keyed = [[l.strip() for l in block] for block in blocks]
+
+    # 1. Cabezas: primer tramo del bloque presente en el original, en orden creciente
+    heads: List[Tuple[int, int, int]] = []          # (pos_original, idx_en_bloque, longitud)
+    cursor = 0
+    for b, block in enumerate(keyed):
+        found: Optional[Tuple[int, int, int]] = None
+        for i, key in enumerate(block):
+            if not key:
+                continue
+            cands = index.candidates(key, cursor, n)
+            if not cands:
+                continue
+            scored = [(index.forward(c, block, i, n), c) for c in cands]
+            best = max(length for length, _ in scored)
+            winners = [c for length, c in scored if length == best]
+            if len(winners) > 1:
+                lines_txt = ", ".join(str(c + 1) for c in winners[:5])
+                raise EditError(
+                    f"edit block {b + 1} is ambiguous: '{_describe(block[i])}' (with {best} line(s) of context) "
+                    f"matches lines {lines_txt}; include more unchanged lines around the change")
+            found = (winners[0], i, best)
+            break
+        if found is None:
+            if b == 0 and not leading:
+                found = (0, 0, 0)
+            else:
+                raise EditError(
+                    f"could not locate edit block {b + 1}: none of its lines exist in the file after line {cursor}; "
+                    f"include at least one unchanged line next to the change")
+        heads.append(found)
+        cursor = found[0] + found[2]
+
+    # 2. Colas: último tramo del bloque presente entre su cabeza y la cabeza siguiente
+    regions: List[Tuple[int, int]] = []
+    for b, block in enumerate(keyed):
+        h_pos, h_idx, h_len = heads[b]
+        if b == 0 and not leading:
+            # Sin marcador inicial el bloque empieza en la línea 1; no se borra código implícitamente
+            if h_pos > h_idx:
+                raise EditError(
+                    f"edit block 1 is anchored at line {h_pos + 1} but is not preceded by a "
+                    f"'... existing code ...' marker; add the marker to keep the lines above it")
+            start = 0
+        else:
+            start = h_pos
+        lo = h_pos + h_len
+        hi = heads[b + 1][0] if b + 1 < len(keyed) else n
+        if b == len(keyed) - 1 and not trailing:
+            regions.append((start, n))
+            continue
+
+        # Sin cabeza (inserción al principio del archivo) o sin líneas tras ella no hace falta cola
+        end: Optional[int] = lo if not h_len or not any(block[h_idx + h_len:]) else None
+        for j in range(len(block) - 1, h_idx + h_len - 1, -1):
+            key = block[j]
+            if not key:
+                continue
+            cands = index.candidates(key, lo, hi)
+            if not cands:
+                continue
+            scored = [(index.backward(c, block, j, lo, h_idx + h_len), c) for c in cands]
+            best = max(length for length, _ in scored)
+            winners = [c for length, c in scored if length == best]
+            nearest = winners[0]
+            near = (nearest + 1 - start) <= NEAREST_TAIL_SLACK * len(block)
+            if len(winners) > 1 and not near:
+                lines_txt = ", ".join(str(c + 1) for c in winners[:5])
+                raise EditError(
+                    f"edit block {b + 1} is ambiguous: its last line '{_describe(block[j])}' matches lines "
+                    f"{lines_txt}; include more unchanged lines after the change")
+            if best < 2 and not near:
+                # Una sola línea lejos de la cabeza puede ser una línea cambiada que casualmente
+                # existe más abajo: aceptarla borraría todo el código intermedio
+                raise EditError(
+                    f"could not anchor the end of edit block {b + 1}: its line '{_describe(block[j])}' only "
+                    f"matches line {nearest + 1}, far from the start of the block, with no unchanged lines "
+                    f"around it; include at least one unchanged line after the change")
+            end = nearest + 1
+            break
+        if end is None:
+            # Sin cola el bloque solo se insertaría tras la cabeza y duplicaría las líneas cambiadas
+            raise EditError(
+                f"could not anchor the end of edit block {b + 1}: none of its lines after "
+                f"'{_describe(block[h_idx + h_len - 1])}' exist in the file before the next marker; "
+                f"include at least one unchanged line after the change")
+        regions.append((start, end))
+
+    # 3. Construcción por list-join de los tramos conservados y los bloques
+    out: List[str] = []
+    cursor = 0
+    for (start, end), block in zip(regions, blocks):
+        if start < cursor:
+            raise EditError("edit blocks overlap; split the edit or include more context")
+        out.extend(original_lines[cursor:start])
+        out.extend(block)
+        cursor = end
+    out.extend(original_lines[cursor:])
+    return out, len(blocks)
+
+
+# --------------------------------------------------------------------------- #
+# Modo parche: hunks de diff unificado y bloques SEARCH/REPLACE
+# --------------------------------------------------------------------------- #
+_HUNK_HEADER_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+_SEARCH_START_RE = re.compile(r"^<{5,9} SEARCH\s*$")
+_SEARCH_DIVIDER_RE = re.compile(r"^={5,9}\s*$")
+_SEARCH_END_RE = re.compile(r"^>{5,9} REPLACE\s*$")
+# Cabeceras de diff entre archivos y hunks (git añade diff/index/mode...)
+_DIFF_FILE_HEADERS = ('--- ', '+++ ', 'diff ', 'index ', 'new file mode', 'deleted file mode',
+                      'old mode', 'new mode', 'similarity index', 'rename from', 'rename to')
+# Líneas de contexto que se pueden descartar en cada extremo si el hunk no casa (como `patch -F`)
+MAX_FUZZ = 2
+
+
+class _Hunk:
+    __slots__ = ("label", "old", "new", "expected")
+
+    def __init__(self, label: str, old: List[str], new: List[str], expected: Optional[int]):
+        self.label = label
+        self.old = old              # líneas a buscar en el original
+        self.new = new              # líneas que las sustituyen
+        self.expected = expected    # posición sugerida (0-based) o None si debe ser única
+
+
+def detect_edit_mode(code_edit: str) -> str:
+    """Devuelve 'search_replace', 'diff' o 'markers' según el formato de code_edit."""
+    lines = code_edit.split('\n')
+    if any(_SEARCH_START_RE.match(l) for l in lines):
+        return "search_replace"
+    if any(_HUNK_HEADER_RE.match(l) for l in lines):
+        return "diff"
+    return "markers"
+
+
+def _diff_target(line: str) -> Optional[str]:
+    """Ruta de una cabecera '+++ b/ruta' (None para /dev/null)."""
+    path = line[4:].split('\t')[0].strip()
+    if path == "/dev/null":
+        return None
+    return path[2:] if path.startswith(("a/", "b/")) else path
+
+
+def _parse_unified_diff(code_edit: str) -> List[_Hunk]:
+    hunks: List[_Hunk] = []
+    current: Optional[_Hunk] = None
+    targets: List[str] = []
+    old_left = new_left = 0
+    for line in code_edit.split('\n'):
+        header = _HUNK_HEADER_RE.match(line)
+        if header:
+            # Con recuento antiguo 0 (@@ -5,0 +6,1 @@) el número es la línea tras la que se inserta
+            start = int(header.group(1))
+            old_left = int(header.group(2)) if header.group(2) is not None else 1
+            new_left = int(header.group(4)) if header.group(4) is not None else 1
+            expected = start if old_left == 0 else start - 1
+            current = _Hunk(f"hunk {len(hunks) + 1} ({line.strip()})", [], [], expected)
+            hunks.append(current)
+            continue
+        if line.startswith('\\ No newline'):
+            continue
+        if old_left <= 0 and new_left <= 0 and line.startswith(_DIFF_FILE_HEADERS):
+            # Cabeceras de archivo solo fuera de las líneas contadas de un hunk: dentro,
+            # "--- x" es la línea "-- x" borrada y "+++ x" la línea "++ x" añadida
+            target = _diff_target(line) if line.startswith('+++ ') else None
+            if target and target not in targets:
+                targets.append(target)
+            continue
+        if current is None:
+            continue
+        tag, body = (line[:1], line[1:]) if line else (' ', '')
+        if tag == ' ':
+            current.old.append(body)
+            current.new.append(body)
+            old_left -= 1
+            new_left -= 1
+        elif tag == '-':
+            current.old.append(body)
+            old_left -= 1
+        elif tag == '+':
+            current.new.append(body)
+            new_left -= 1
+        else:
+            # Línea de contexto a la que el modelo le quitó el espacio inicial
+            current.old.append(line)
+            current.new.append(line)
+            old_left -= 1
+            new_left -= 1
+    if len(targets) > 1:
+        raise EditError(f"the diff changes {len(targets)} files ({', '.join(targets[:5])}); "
+                        f"send one edit per file")
+    # Las líneas vacías finales suelen ser el salto de línea del propio mensaje
+    for hunk in hunks:
+        while hunk.old and hunk.new and hunk.old[-1] == "" and hunk.new[-1] == "":
+            hunk.old.pop()
+            hunk.new.pop()
+        if hunk.expected is not None and hunk.expected < 0:
+            hunk.expected = 0
+    if not hunks:
+        raise EditError("no '@@ -a,b +c,d @@' hunk headers found in code_edit")
+    return hunks
+
+
+def _parse_search_replace(code_edit: str) -> List[_Hunk]:
+    hunks: List[_Hunk] = []
+    state, old, new = None, [], []
+    for line in code_edit.split('\n'):
+        if state is None:
+            if _SEARCH_START_RE.match(line):
+                state, old, new = "search", [], []
+        elif state == "search":
+            if _SEARCH_DIVIDER_RE.match(line):
+                state = "replace"
+            else:
+                old.append(line)
+        elif _SEARCH_END_RE.match(line):
+            hunks.append(_Hunk(f"block {len(hunks) + 1}", old, new, None))
+            state = None
+        else:
+            new.append(line)
+    if state is not None:
+        raise EditError(f"SEARCH/REPLACE block {len(hunks) + 1} is not terminated with '>>>>>>> REPLACE'")
+    if not hunks:
+        raise EditError("no '<<<<<<< SEARCH' blocks found in code_edit")
+    return hunks
+
+
+def _locate(index: _AnchorIndex, original_lines: List[str], old: List[str],
+            expected: Optional[int]) -> Tuple[List[int], bool]:
+    """
+    Posiciones donde `old` aparece completo en el original. Primero compara exacto y,
+    si no hay coincidencias, ignorando espacios en los extremos. Devuelve (posiciones, exacto).
+    """
+    keys = [l.strip() for l in old]
+    first = next((i for i, k in enumerate(keys) if k), None)
+    n = len(original_lines)
+    if first is None:
+        return [], True
+    candidates = [c - first for c in index.candidates(keys[first], first, n - (len(old) - first) + 1)]
+    exact = [c for c in candidates if original_lines[c:c + len(old)] == old]
+    if exact:
+        matches, is_exact = exact, True
+    else:
+        matches = [c for c in candidates if index.stripped[c:c + len(old)] == keys]
+        is_exact = False
+    if expected is not None:
+        matches.sort(key=lambda c: (abs(c - expected), c))
+    return matches, is_exact
+
+
+def apply_patch_edit(original_lines: List[str], hunks: List[_Hunk]) -> Tuple[List[str], List[str], bool]:
+    """
+    Resuelve cada hunk contra el original y, si todos se ubican sin solaparse,
+    construye el resultado. Devuelve (líneas_nuevas, informe_por_hunk, todo_ok).
+    Los hunks de diff se buscan desde la posición de su cabecera hacia afuera (offset);
+    los bloques SEARCH deben aparecer exactamente una vez.
+    """
+    index = _AnchorIndex(original_lines)
+    resolved: List[Tuple[int, int, List[str], int]] = []
+    report: List[str] = []
+    ok = True
+    drift = 0
+
+    for h_no, hunk in enumerate(hunks):
+        if not any(l.strip() for l in hunk.old):
+            # SEARCH vacío / hunk sin contexto: añadir al final (o crear el contenido si está vacío)
+            pos = len(original_lines) if hunk.expected is None else min(hunk.expected + drift, len(original_lines))
+            resolved.append((pos, pos, hunk.new, h_no))
+            report.append(f"{hunk.label}: inserted at line {pos + 1}")
+            continue
+
+        placed = False
+        for fuzz in range(0, MAX_FUZZ + 1 if hunk.expected is not None else 1):
+            expected = None if hunk.expected is None else hunk.expected + drift
+            old, new = hunk.old, hunk.new
+            if fuzz:
+                # Descarta contexto compartido en los extremos (líneas idénticas en old y new)
+                lead = 0
+                while lead < fuzz and lead < len(old) and lead < len(new) and old[lead] == new[lead]:
+                    lead += 1
+                trail = 0
+                while (trail < fuzz and trail < len(old) - lead and trail < len(new) - lead
+                       and old[-1 - trail] == new[-1 - trail]):
+                    trail += 1
+                if not lead and not trail:
+                    break
+                old = old[lead:len(old) - trail]
+                new = new[lead:len(new) - trail]
+                if expected is not None:
+                    expected += lead
+            matches, exact = _locate(index, original_lines, old, expected)
+            if not matches:
+                continue
+            if hunk.expected is None and len(matches) > 1:
+                lines_txt = ", ".join(str(m + 1) for m in matches[:5])
+                report.append(f"{hunk.label}: FAILED - SEARCH text matches {len(matches)} places "
+                              f"(lines {lines_txt}); include more surrounding lines")
+                ok = False
+                placed = True
+                break
+            pos = matches[0]
+            resolved.append((pos, pos + len(old), new, h_no))
+            notes = []
+            if expected is not None and pos != expected:
+                notes.append(f"offset {pos - expected:+d}")
+            if fuzz:
+                notes.append(f"fuzz {fuzz}")
+            if not exact:
+                notes.append("whitespace-insensitive match")
+            report.append(f"{hunk.label}: applied at line {pos + 1}" + (f" ({', '.join(notes)})" if notes else ""))
+            if expected is not None:
+                drift += pos - expected
+            placed = True
+            break
+        if not placed:
+            preview = _describe(next(l for l in hunk.old if l.strip()))
+            report.append(f"{hunk.label}: FAILED - context not found (first line: '{preview}')")
+            ok = False
+
+    resolved.sort(key=lambda r: (r[0], r[1]))
+    for prev, cur in zip(resolved, resolved[1:]):
+        if cur[0] < prev[1]:
+            report.append(f"{hunks[cur[3]].label}: FAILED - overlaps {hunks[prev[3]].label}")
+            ok = False
+    if not ok:
+        return original_lines, report, False
+
+    out: List[str] = []
+    cursor = 0
+    for start, end, new, _ in resolved:
+        out.extend(original_lines[cursor:start])
+        out.extend(new)
+        cursor = end
+    out.extend(original_lines[cursor:])
+    return out, report, True
+
+
+def _atomic_write(path: str, content: str) -> None:
+    """Escribe en un temporal del mismo directorio y lo renombra sobre el destino."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".edit_", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            shutil.copymode(path, tmp_path)
+        except OSError:
+            pass
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
 
 @tool
-def edit_file(target_file: str, instructions: str, code_edit: str, explanation: str = "") -> str:
+def edit_file(target_file: str, instructions: str, code_edit: str, explanation: str = "",
+              edit_mode: str = "auto") -> str:
     """
-    Apply edits to an existing file using the // ... existing code ... marker system.
-    
+    Apply edits to an existing file. Three formats are accepted in code_edit:
+    - markers: the changed code with // ... existing code ... markers for unchanged regions.
+      Each edit block must start and end with unchanged lines so it can be located.
+      Without any marker, code_edit must be the complete new content of the file.
+    - diff: unified diff hunks (@@ -start,count +start,count @@ with ' ', '-', '+' lines);
+      hunks are found near their header line even if the file has shifted.
+    - search_replace: one or more blocks of
+      <<<<<<< SEARCH / exact old lines / ======= / new lines / >>>>>>> REPLACE;
+      each SEARCH text must appear exactly once in the file.
+    Diff and search_replace only need the changed lines plus a little context, so prefer
+    them for small changes in large files. The edit is applied atomically: if any block
+    or hunk fails, the file is left untouched and a per-hunk report is returned.
+
     Parameters:
         target_file (str): Path to the file to be edited
         instructions (str): Description of the changes to be made
-        code_edit (str): The new code content with markers indicating where existing code should be preserved
+        code_edit (str): The edit in one of the formats above
         explanation (str): Optional explanation for the edit operation
-    
+        edit_mode (str): "auto" (detect from code_edit), "markers", "diff" or "search_replace"
+
     Returns:
         str: Success message with edit summary or error message if operation failed
     """
     try:
         # Read the current file
-        with open(target_file, 'r', encoding='utf-8') as f:
+        with open(target_file, 'r', encoding='utf-8', newline='') as f:
             original_content = f.read()
-        
-        # Parse the code_edit to find the edits and markers
-        lines = code_edit.split('\n')
-        new_content = ""
-        original_lines = original_content.split('\n')
-        current_line_index = 0
-        
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            
-            # Check if this is an "existing code" marker
-            if "... existing code ..." in line or "existing code" in line:
-                # Find the next non-marker line to determine how much to skip
-                next_edit_line = None
-                for j in range(i + 1, len(lines)):
-                    if "... existing code ..." not in lines[j] and lines[j].strip():
-                        next_edit_line = lines[j]
-                        break
-                
-                # If we have a next edit line, find it in the original content
-                if next_edit_line:
-                    # Look for the next edit line in the original content
-                    found_index = -1
-                    for k in range(current_line_index, len(original_lines)):
-                        if next_edit_line.strip() in original_lines[k] or original_lines[k].strip() == next_edit_line.strip():
-                            found_index = k
-                            break
-                    
-                    if found_index != -1:
-                        # Add the skipped original lines
-                        for k in range(current_line_index, found_index):
-                            new_content += original_lines[k] + '\n'
-                        current_line_index = found_index
-                    else:
-                        # If we can't find the next line, add some original content
-                        skip_lines = min(5, len(original_lines) - current_line_index)
-                        for k in range(current_line_index, current_line_index + skip_lines):
-                            if k < len(original_lines):
-                                new_content += original_lines[k] + '\n'
-                        current_line_index += skip_lines
-                else:
-                    # No next edit line found, skip to end or add remaining original content
-                    remaining_lines = min(10, len(original_lines) - current_line_index)
-                    for k in range(current_line_index, current_line_index + remaining_lines):
-                        if k < len(original_lines):
-                            new_content += original_lines[k] + '\n'
-                    current_line_index += remaining_lines
-                
-            elif line and not ("..." in line and "existing" in line):
-                # This is actual new/edited code
-                new_content += lines[i] + '\n'
-                current_line_index += 1
-            
-            i += 1
-        
-        # Add any remaining original content
-        while current_line_index < len(original_lines):
-            new_content += original_lines[current_line_index] + '\n'
-            current_line_index += 1
-        
-        
-        
-        # Write the new content
-        with open(target_file, 'w', encoding='utf-8') as f:
-            f.write(new_content.rstrip('\n') + '\n')
-        
-        return f"""
-Successfully edited file: {target_file}
-Instructions applied: {instructions}
-Original lines: {len(original_lines)}
-New lines: {len(new_content.split('\n'))}
-Changes applied successfully!
-        """
-        
+
+        newline = '\r\n' if '\r\n' in original_content else '\n'
+        original_lines = original_content.replace('\r\n', '\n').split('\n')
+        if original_lines and original_lines[-1] == "":
+            original_lines.pop()
+
+        mode = detect_edit_mode(code_edit) if edit_mode == "auto" else edit_mode
+        report: List[str] = []
+        if mode == "markers":
+            new_lines, n_blocks = apply_marker_edit(original_lines, code_edit)
+        elif mode in ("diff", "search_replace"):
+            hunks = (_parse_unified_diff(code_edit) if mode == "diff"
+                     else _parse_search_replace(code_edit.replace('\r\n', '\n')))
+            new_lines, report, ok = apply_patch_edit(original_lines, hunks)
+            if not ok:
+                return ("Edit rejected, file left unchanged:\n" + "\n".join(report))
+            n_blocks = len(hunks)
+        else:
+            return f"Error: unknown edit_mode '{edit_mode}' (use auto, markers, diff or search_replace)"
+
+        # Write the new content atomically
+        new_content = newline.join(new_lines).rstrip('\r\n') + newline
+        _atomic_write(target_file, new_content)
+        get_catalog().invalidate(target_file)
+
+        summary = (
+            f"Successfully edited file: {target_file}\n"
+            f"Instructions applied: {instructions}\n"
+            f"Edit mode: {mode}\n"
+            f"Edit blocks applied: {n_blocks}\n"
+            f"Original lines: {len(original_lines)}\n"
+            f"New lines: {len(new_lines)}\n"
+        )
+        if report:
+            summary += "\n".join(report) + "\n"
+        return summary + "Changes applied successfully!"
+
     except FileNotFoundError:
         return f"Error: File '{target_file}' not found"
+    except EditError as e:
+        return f"Edit rejected, file left unchanged: {e}"
     except Exception as e:
         return f"Error editing file: {str(e)}"
+
+
+# --------------------------------------------------------------------------- #
+# Benchmark: python edit_file.py [líneas]
+# --------------------------------------------------------------------------- #
+if __name__ == "__main__":
+    import sys
+    n_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    original = []
+    for i in range(n_lines // 5):
+        original += [f"def function_{i}(arg):", f"    value = arg * {i}", "    if value:",
+                     "        return value", ""]
+    edit_parts = ["# ... existing code ..."]
+    for i in range(0, n_lines // 5, max(1, n_lines // 5 // 100)):
+        edit_parts += [f"def function_{i}(arg):", f"    value = arg * {i} + 1",
+                       "    if value:", "# ... existing code ..."]
+    code_edit = "\n".join(edit_parts)
+
+    t0 = time.perf_counter()
+    result, blocks = apply_marker_edit(original, code_edit)
+    elapsed = time.perf_counter() - t0
+    changed = sum(1 for a, b in zip(original, result) if a != b)
+    print(f"{n_lines} lines, {blocks} edit blocks: {elapsed * 1000:.1f} ms ({changed} lines changed)")
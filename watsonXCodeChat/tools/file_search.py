@@ -2,6 +2,7 @@ import os
 
 # Importa el decorador de herramientas desde el ADK de watsonx Orchestrate
 from ibm_watsonx_orchestrate.agent_builder.tools import tool
+from workspace_catalog import KIND_FILE, get_catalog
 
 @tool
 def file_search(query: str, explanation: str = "") -> str:
@@ -17,15 +18,15 @@ def file_search(query: str, explanation: str = "") -> str:
     """
     try:
         matches = []
-        for root, dirs, files in os.walk("."):
-            for file in files:
-                file_path = os.path.join(root, file)
-                if query.lower() in file_path.lower():
-                    matches.append(file_path)
-                    if len(matches) >= 10:  # Cap at 10 results
-                        break
-            if len(matches) >= 10:
-                break
+        needle = query.lower()
+        for rel_path, kind, _, _ in get_catalog().iter_entries():
+            if kind != KIND_FILE:
+                continue
+            file_path = os.path.join(".", rel_path)
+            if needle in file_path.lower():
+                matches.append(file_path)
+                if len(matches) >= 10:  # Cap at 10 results
+                    break
         
         return f"File search results for '{query}':\n" + "\n".join(matches)
     except Exception as e:
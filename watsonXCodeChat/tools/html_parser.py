@@ -0,0 +1,287 @@
+"""
+Capa de parseo HTML intercambiable para los scrapers.
+
+Usa el parser más rápido disponible: selectolax (Lexbor), luego lxml y, como último
+recurso, BeautifulSoup con html.parser. Todos exponen la misma interfaz mínima basada en
+selectores CSS (select / select_one / text / attr / drop), así que los extractores no dependen
+del backend. Con lxml, los selectores se traducen con cssselect si está instalado o con
+un traductor propio para el subconjunto simple que usan los scrapers
+(tag, .clase, [atributo], descendiente y '>').
+"""
+import os
+import re
+from functools import lru_cache
+from typing import List, Optional, Union
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # selectolax es opcional
+    LexborHTMLParser = None
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # lxml es opcional
+    lxml = None
+
+try:
+    from cssselect import GenericTranslator
+    _CSS_TRANSLATOR = GenericTranslator()
+except ImportError:
+    _CSS_TRANSLATOR = None
+
+from bs4 import BeautifulSoup, UnicodeDammit
+
+# Orden de preferencia; HTML_PARSER_BACKEND fuerza uno concreto
+BACKENDS = ("selectolax", "lxml", "html.parser")
+
+
+def available_backends() -> List[str]:
+    found = []
+    if LexborHTMLParser is not None:
+        found.append("selectolax")
+    if lxml is not None:
+        found.append("lxml")
+    found.append("html.parser")
+    return found
+
+
+def default_backend() -> str:
+    forced = os.environ.get("HTML_PARSER_BACKEND", "")
+    available = available_backends()
+    return forced if forced in available else available[0]
+
+
+def _decode(html: Union[bytes, str]) -> str:
+    """UTF-8 estricto y, si falla, detección de encoding (páginas que declaran UTF-8 y no lo son)."""
+    if isinstance(html, str):
+        return html
+    try:
+        return html.decode("utf-8")
+    except UnicodeDecodeError:
+        return UnicodeDammit(html, ["utf-8", "windows-1252"]).unicode_markup or html.decode("utf-8", "replace")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+class Node:
+    """Interfaz común: un elemento (o el documento) con búsqueda CSS y extracción de texto."""
+
+    def select(self, css: str) -> List["Node"]:
+        raise NotImplementedError
+
+    def select_one(self, css: str) -> Optional["Node"]:
+        found = self.select(css)
+        return found[0] if found else None
+
+    def raw_text(self) -> str:
+        raise NotImplementedError
+
+    def text(self) -> str:
+        """Texto del nodo con los espacios normalizados."""
+        return _normalize(self.raw_text())
+
+    def attr(self, name: str, default: str = "") -> str:
+        raise NotImplementedError
+
+    def remove(self, css: str) -> None:
+        """Elimina del árbol los descendientes que casan con `css` (script, style, ...)."""
+        raise NotImplementedError
+
+    def drop(self) -> None:
+        """Elimina este nodo (y su contenido) del árbol."""
+        raise NotImplementedError
+
+
+# --------------------------------------------------------------------------- #
+# selectolax (Lexbor)
+# --------------------------------------------------------------------------- #
+class _LexborNode(Node):
+    __slots__ = ("_node",)
+
+    def __init__(self, node):
+        self._node = node
+
+    def select(self, css):
+        return [_LexborNode(n) for n in self._node.css(css)]
+
+    def select_one(self, css):
+        n = self._node.css_first(css)
+        return _LexborNode(n) if n is not None else None
+
+    def raw_text(self):
+        return self._node.text(deep=True, separator="", strip=False) or ""
+
+    def attr(self, name, default=""):
+        value = self._node.attributes.get(name)
+        return value if value is not None else default
+
+    def remove(self, css):
+        for n in self._node.css(css):
+            n.decompose()
+
+    def drop(self):
+        self._node.decompose()
+
+
+# --------------------------------------------------------------------------- #
+# lxml
+# --------------------------------------------------------------------------- #
+_SIMPLE_COMPOUND_RE = re.compile(r"^([a-zA-Z][\w-]*|\*)?((?:\.[\w-]+|\[[\w-]+(?:=[\"']?[^\]\"']*[\"']?)?\])*)$")
+_PART_RE = re.compile(r"\.([\w-]+)|\[([\w-]+)(?:=[\"']?([^\]\"']*)[\"']?)?\]")
+
+
+@lru_cache(maxsize=256)
+def _css_to_xpath(css: str) -> str:
+    if _CSS_TRANSLATOR is not None:
+        return _CSS_TRANSLATOR.css_to_xpath(css)
+    alternatives = []
+    for selector in css.split(","):
+        tokens = selector.replace(">", " > ").split()
+        xpath, axis = "descendant-or-self::", ""
+        parts = []
+        for token in tokens:
+            if token == ">":
+                axis = "/"
+                continue
+            m = _SIMPLE_COMPOUND_RE.match(token)
+            if not m:
+                raise ValueError(f"Unsupported CSS selector without cssselect: {css!r}")
+            conditions = []
+            for cls, attr, value in _PART_RE.findall(m.group(2) or ""):
+                if cls:
+                    conditions.append(f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')")
+                elif value:
+                    conditions.append(f"@{attr}='{value}'")
+                else:
+                    conditions.append(f"@{attr}")
+            step = (m.group(1) or "*") + "".join(f"[{c}]" for c in conditions)
+            parts.append(step if not parts else (axis or "//") + step)
+            axis = ""
+        alternatives.append(xpath + "".join(parts))
+    return " | ".join(alternatives)
+
+
+class _LxmlNode(Node):
+    __slots__ = ("_node",)
+
+    def __init__(self, node):
+        self._node = node
+
+    def select(self, css):
+        return [_LxmlNode(n) for n in self._node.xpath(_css_to_xpath(css)) if isinstance(n.tag, str)]
+
+    def raw_text(self):
+        return self._node.text_content()
+
+    def attr(self, name, default=""):
+        return self._node.get(name, default)
+
+    def remove(self, css):
+        for n in self._node.xpath(_css_to_xpath(css)):
+            n.drop_tree()
+
+    def drop(self):
+        if self._node.getparent() is not None:
+            self._node.drop_tree()
+
+
+# --------------------------------------------------------------------------- #
+# BeautifulSoup + html.parser (siempre disponible)
+# --------------------------------------------------------------------------- #
+class _SoupNode(Node):
+    __slots__ = ("_node",)
+
+    def __init__(self, node):
+        self._node = node
+
+    def select(self, css):
+        return [_SoupNode(n) for n in self._node.select(css)]
+
+    def select_one(self, css):
+        n = self._node.select_one(css)
+        return _SoupNode(n) if n is not None else None
+
+    def raw_text(self):
+        return self._node.get_text()
+
+    def attr(self, name, default=""):
+        value = self._node.get(name)
+        if isinstance(value, list):         # BeautifulSoup devuelve class como lista
+            value = " ".join(value)
+        return value if value is not None else default
+
+    def remove(self, css):
+        for n in self._node.select(css):
+            n.decompose()
+
+    def drop(self):
+        self._node.decompose()
+
+
+def parse_html(html: Union[bytes, str], backend: Optional[str] = None) -> Node:
+    """Parsea un documento HTML con el backend indicado (o el más rápido disponible)."""
+    backend = backend or default_backend()
+    if backend == "selectolax":
+        return _LexborNode(LexborHTMLParser(_decode(html)).root)
+    if backend == "lxml":
+        text = _decode(html)
+        if not text.strip():
+            text = "<html></html>"
+        # Se parsean bytes UTF-8 con el encoding fijado: lxml rechaza str con declaración <?xml encoding?>
+        parser = lxml.html.HTMLParser(encoding="utf-8")
+        try:
+            return _LxmlNode(lxml.html.document_fromstring(text.encode("utf-8"), parser=parser))
+        except etree.ParserError:
+            return _LxmlNode(lxml.html.document_fromstring(b"<html></html>", parser=parser))
+    return _SoupNode(BeautifulSoup(html, "html.parser"))
+
+
+if __name__ == "__main__":
+    # Benchmark: python html_parser.py [fixture.html]  (por defecto google.html del repo)
+    import sys
+    import time
+    from pathlib import Path
+
+    fixture = Path(sys.argv[1]) if len(sys.argv) > 1 else next(
+        p / "google.html" for p in Path(__file__).resolve().parents if (p / "google.html").exists())
+    html = fixture.read_bytes()
+
+    def extract(doc: Node):
+        out = []
+        for div in doc.select("div.g") or doc.select("div.ezO2md"):
+            title, link = div.select_one("h3") or div.select_one("span.CVA68e"), div.select_one("a")
+            if title and link:
+                out.append((title.text(), link.attr("href")))
+        return out
+
+    def baseline():
+        # Implementación anterior: BeautifulSoup + html.parser + find_all sobre todo el documento
+        soup = BeautifulSoup(html, "html.parser")
+        out = []
+        for div in soup.find_all("div", class_="g") or soup.find_all("div", class_="ezO2md"):
+            title, link = div.find("h3") or div.find("span", class_="CVA68e"), div.find("a")
+            if title and link:
+                out.append((_normalize(title.get_text()), link.get("href", "")))
+        return out
+
+    def timed(fn, n=50):
+        fn()
+        t0 = time.perf_counter()
+        for _ in range(n):
+            result = fn()
+        return (time.perf_counter() - t0) / n * 1000, result
+
+    base_ms, expected = timed(baseline)
+    print(f"{fixture.name} ({len(html)} bytes), {len(expected)} results")
+    print(f"  {'bs4 find_all (before)':24s} {base_ms:7.3f} ms")
+    for backend in available_backends():
+        ms, got = timed(lambda: extract(parse_html(html, backend)))
+        print(f"  {backend:24s} {ms:7.3f} ms  {base_ms / ms:5.1f}x  {'same results' if got == expected else 'DIFFERENT'}")
+    if lxml is not None and _CSS_TRANSLATOR is not None:
+        _CSS_TRANSLATOR, saved = None, _CSS_TRANSLATOR
+        _css_to_xpath.cache_clear()
+        ms, got = timed(lambda: extract(parse_html(html, "lxml")))
+        print(f"  {'lxml (no cssselect)':24s} {ms:7.3f} ms  {base_ms / ms:5.1f}x  {'same results' if got == expected else 'DIFFERENT'}")
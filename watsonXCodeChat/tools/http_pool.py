@@ -0,0 +1,132 @@
+"""
+Sesión HTTP compartida por las herramientas de red.
+
+Un único requests.Session por proceso reutiliza conexiones TCP/TLS (keep-alive) entre
+llamadas, limita las conexiones simultáneas por host, reintenta errores transitorios con
+backoff exponencial y negocia compresión gzip (y brotli si el paquete está instalado).
+"""
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:  # brotli es opcional: urllib3 solo lo decodifica si está instalado
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = "gzip, deflate, br"
+    except ImportError:
+        ACCEPT_ENCODING = "gzip, deflate"
+
+POOL_HOSTS = 16             # hosts distintos con conexiones en reposo
+POOL_PER_HOST = 8           # conexiones simultáneas por host
+RETRY_TOTAL = 2
+RETRY_BACKOFF = 0.3         # 0.3 s, 0.6 s, ...
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_MAX_WAIT = 10.0       # tope por espera, también para Retry-After (un 429 puede pedir horas)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+class _CappedRetry(Retry):
+    """Retry que nunca duerme más de RETRY_MAX_WAIT entre intentos, diga lo que diga el servidor."""
+
+    def get_backoff_time(self) -> float:
+        return min(super().get_backoff_time(), RETRY_MAX_WAIT)
+
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, RETRY_MAX_WAIT)
+
+
+def _build_session() -> requests.Session:
+    retry = _CappedRetry(
+        total=RETRY_TOTAL, connect=RETRY_TOTAL, read=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF, status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}), respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_PER_HOST,
+                          max_retries=retry, pool_block=True)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    return session
+
+
+def get_session() -> requests.Session:
+    """Sesión del proceso; se crea en el primer uso."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
+
+
+if __name__ == "__main__":
+    # Benchmark contra un servidor local HTTP/1.1: conexión nueva por petición vs sesión compartida
+    import statistics
+    import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    body = b"<html><body>" + b"<p>resultado</p>" * 500 + b"</body></html>"
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    def bench(fetch, url, n=200):
+        fetch(url)
+        samples = []
+        for _ in range(n):
+            t0 = time.perf_counter()
+            fetch(url).raise_for_status()
+            samples.append(time.perf_counter() - t0)
+        return statistics.median(samples) * 1000
+
+    def serve(tls_dir=None):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        scheme = "http"
+        if tls_dir:
+            # Certificado autofirmado: el handshake TLS es lo que la sesión compartida evita repetir
+            import ssl
+            import subprocess
+            cert, key = f"{tls_dir}/cert.pem", f"{tls_dir}/key.pem"
+            subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                            "-subj", "/CN=127.0.0.1", "-keyout", key, "-out", cert],
+                           check=True, capture_output=True)
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(cert, key)
+            server.socket = context.wrap_socket(server.socket, server_side=True)
+            scheme = "https"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server, f"{scheme}://127.0.0.1:{server.server_address[1]}/search?q=x"
+
+    import tempfile
+    import urllib3
+    urllib3.disable_warnings()
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, tls_dir in (("http ", None), ("https", tmp)):
+            server, url = serve(tls_dir)
+            cold = bench(lambda u: requests.get(u, timeout=5, verify=False), url)
+            pooled = bench(lambda u: get_session().get(u, timeout=5, verify=False), url)
+            print(f"{label} requests.get per call: {cold:7.3f} ms   pooled session: {pooled:7.3f} ms   "
+                  f"({cold / pooled:.1f}x, median of 200)")
+            server.shutdown()
+    print(f"Accept-Encoding: {ACCEPT_ENCODING}")
@@ -0,0 +1,27 @@
+# Importa el decorador de herramientas desde el ADK de watsonx Orchestrate
+from ibm_watsonx_orchestrate.agent_builder.tools import tool
+
+from terminal_jobs import get_job_manager, KILL_GRACE_SECONDS
+
+
+@tool
+def kill_job(job_id: str, explanation: str = "") -> str:
+    """
+    Stop a background job and all the processes it started (SIGTERM, then SIGKILL after a grace period).
+
+    Parameters:
+        job_id (str): The job ID returned by run_terminal_cmd
+        explanation (str): Optional explanation for stopping the job
+
+    Returns:
+        str: Final status of the job and the last lines of its output
+    """
+    try:
+        job = get_job_manager().get(job_id)
+        if not job.kill(KILL_GRACE_SECONDS):
+            return f"Job {job.job_id} had already finished.\n{job.summary()}"
+        return f"Job {job.job_id} stopped.\n{job.summary()}\n{job.tail(20)}"
+    except KeyError as e:
+        return f"Error: {e.args[0]}"
+    except Exception as e:
+        return f"Error killing job: {e}"
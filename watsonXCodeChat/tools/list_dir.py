@@ -4,6 +4,7 @@ from pathlib import Path
 
 # Importa el decorador de herramientas desde el ADK de watsonx Orchestrate
 from ibm_watsonx_orchestrate.agent_builder.tools import tool
+from workspace_catalog import KIND_DIR, KIND_FILE, get_catalog
 
 WORKSPACE = Path(r"/home/testagent/workspace").resolve()
 
@@ -49,29 +50,22 @@ def list_dir(relative_workspace_path: str, explanation: str = "") -> str:
         if not path.exists():
             return f"Directory '{relative_workspace_path}' does not exist"
         
-        def _get_all_items(current_path: Path, relative_to: Path) -> List[Tuple[str, bool, int]]:
-            """Obtiene todos los elementos recursivamente"""
+        def _get_all_items(current_path: Path) -> List[Tuple[str, bool, int]]:
+            """Obtiene todos los elementos recursivamente desde el catálogo compartido"""
             items = []
             
             try:
-                for item in current_path.rglob("*"):
-                    if item.is_file():
-                        try:
-                            size = item.stat().st_size
-                            rel_path = item.relative_to(relative_to)
-                            items.append((str(rel_path), False, size))
-                        except (OSError, PermissionError):
-                            rel_path = item.relative_to(relative_to)
-                            items.append((str(rel_path), False, -1))
-                    elif item.is_dir() and not item.name.startswith('.'):
-                        rel_path = item.relative_to(relative_to)
-                        items.append((str(rel_path), True, 0))
+                for rel_path, kind, size, _ in get_catalog().iter_entries(current_path):
+                    if kind == KIND_FILE:
+                        items.append((rel_path, False, size))
+                    elif kind == KIND_DIR and not rel_path.rsplit("/", 1)[-1].startswith('.'):
+                        items.append((rel_path, True, 0))
             except Exception:
                 pass
                 
             return sorted(items, key=lambda x: x[0].lower())
         
-        all_items = _get_all_items(path, path)
+        all_items = _get_all_items(path)
         
         result_lines = [f"Complete contents of '{relative_workspace_path}':"]
         
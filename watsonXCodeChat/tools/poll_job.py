@@ -0,0 +1,37 @@
+# Importa el decorador de herramientas desde el ADK de watsonx Orchestrate
+from ibm_watsonx_orchestrate.agent_builder.tools import tool
+
+from terminal_jobs import get_job_manager
+
+
+@tool
+def poll_job(job_id: str = "", explanation: str = "") -> str:
+    """
+    Check the status of a background command started with run_terminal_cmd(is_background=True).
+    Without a job_id, lists every known job.
+
+    Parameters:
+        job_id (str): The job ID returned by run_terminal_cmd (e.g. "job-3"); empty to list all jobs
+        explanation (str): Optional explanation for the check
+
+    Returns:
+        str: Status (running / exited (code) / killed), runtime and output size of the job(s)
+    """
+    manager = get_job_manager()
+    try:
+        if not job_id.strip():
+            jobs = manager.jobs()
+            if not jobs:
+                return "No background jobs."
+            return "\n".join(f"{job.job_id}: {job.status} after {job.runtime():.1f}s - {job.command}"
+                             for job in jobs)
+        job = manager.get(job_id)
+        last = job.stdout.tail_lines(1) or job.stderr.tail_lines(1)
+        result = job.summary()
+        if last:
+            result += f"\nLast line: {last[0]}"
+        return result
+    except KeyError as e:
+        return f"Error: {e.args[0]}"
+    except Exception as e:
+        return f"Error polling job: {e}"
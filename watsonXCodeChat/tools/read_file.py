@@ -1,5 +1,10 @@
 import os
-from typing import Union
+import mmap
+import threading
+from array import array
+from collections import OrderedDict
+from itertools import accumulate, islice
+from typing import Optional, Tuple, Union
 from pathlib import Path
 
 # Importa el decorador de herramientas desde el ADK de watsonx Orchestrate
@@ -30,6 +35,137 @@ def to_workspace_path(path_like: Union[str, Path]) -> Path:
         raise ValueError(f"Ruta fuera del workspace: {p}")
     return p
 
+# --------------------------------------------------------------------------- #
+# Índice de líneas (mmap) para leer rangos sin cargar el archivo entero
+# --------------------------------------------------------------------------- #
+LINE_INDEX_STRIDE = 1024              # se guarda el offset de 1 de cada N líneas
+INDEX_CHUNK_BYTES = 4 << 20           # bytes procesados por paso al construir el índice
+LINE_INDEX_CACHE_SIZE = 64            # índices recordados (path+mtime+size)
+MAX_ENTIRE_FILE_BYTES = 256 * 1024    # tope para should_read_entire_file (vista cabeza/cola)
+
+
+class _LineIndex:
+    """Offsets de inicio de las líneas 0, STRIDE, 2·STRIDE... y total de líneas del archivo."""
+    __slots__ = ("mtime_ns", "size", "checkpoints", "total_lines")
+
+    def __init__(self, mtime_ns: int, size: int, checkpoints: array, total_lines: int):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.checkpoints = checkpoints
+        self.total_lines = total_lines
+
+
+_LINE_INDEX_CACHE: "OrderedDict[str, _LineIndex]" = OrderedDict()
+_LINE_INDEX_LOCK = threading.Lock()
+
+
+def _build_line_index(mm: mmap.mmap, size: int) -> Tuple[array, int]:
+    """
+    Recorre el archivo por bloques (memoria O(bloque)) guardando un offset cada
+    LINE_INDEX_STRIDE líneas. split/accumulate/islice trabajan en C, sin bucle por línea.
+    """
+    checkpoints = array("Q", [0])
+    newlines = 0
+    for pos in range(0, size, INDEX_CHUNK_BYTES):
+        chunk = mm[pos:pos + INDEX_CHUNK_BYTES]
+        count = chunk.count(b"\n")
+        if count:
+            # Línea global que empieza tras el newline i-ésimo del bloque: newlines + i + 1
+            first = (-(newlines + 1)) % LINE_INDEX_STRIDE
+            if first < count:
+                starts = accumulate(len(part) + 1 for part in chunk.split(b"\n"))
+                checkpoints.extend(pos + off for off in islice(starts, first, count, LINE_INDEX_STRIDE))
+            newlines += count
+    total = newlines + (1 if size and mm[size - 1:size] != b"\n" else 0)
+    return checkpoints, total
+
+
+def _get_line_index(path: Path, mm: mmap.mmap, st: os.stat_result) -> _LineIndex:
+    key = str(path)
+    with _LINE_INDEX_LOCK:
+        index = _LINE_INDEX_CACHE.get(key)
+        if index is not None and index.mtime_ns == st.st_mtime_ns and index.size == st.st_size:
+            _LINE_INDEX_CACHE.move_to_end(key)
+            return index
+    checkpoints, total = _build_line_index(mm, st.st_size)
+    index = _LineIndex(st.st_mtime_ns, st.st_size, checkpoints, total)
+    with _LINE_INDEX_LOCK:
+        _LINE_INDEX_CACHE[key] = index
+        _LINE_INDEX_CACHE.move_to_end(key)
+        while len(_LINE_INDEX_CACHE) > LINE_INDEX_CACHE_SIZE:
+            _LINE_INDEX_CACHE.popitem(last=False)
+    return index
+
+
+def _line_offset(mm: mmap.mmap, index: _LineIndex, line: int) -> int:
+    """Offset en bytes del inicio de la línea (0-indexada), saltando desde el checkpoint previo."""
+    cp = min(line // LINE_INDEX_STRIDE, len(index.checkpoints) - 1)
+    pos = index.checkpoints[cp]
+    for _ in range(line - cp * LINE_INDEX_STRIDE):
+        nl = mm.find(b"\n", pos)
+        if nl == -1:
+            return index.size
+        pos = nl + 1
+    return pos
+
+
+def _decode(data: bytes) -> str:
+    """Igual que abrir en modo texto utf-8: normaliza los saltos de línea CRLF."""
+    return data.decode("utf-8").replace("\r\n", "\n")
+
+
+def _char_boundary(mm: mmap.mmap, pos: int, step: int) -> int:
+    """Desplaza `pos` en la dirección `step` hasta no caer dentro de un carácter UTF-8 multibyte."""
+    while 0 < pos < len(mm) and mm[pos] & 0xC0 == 0x80:
+        pos += step
+    return pos
+
+
+def _head_tail_view(mm: mmap.mmap, index: _LineIndex, budget: int) -> Tuple[str, int]:
+    """Primeras y últimas líneas completas que caben en `budget` bytes; devuelve (texto, líneas omitidas)."""
+    half = budget // 2
+    # Sin salto de línea en la mitad (línea enorme) el corte es por bytes y se ajusta al carácter
+    head_end = mm.rfind(b"\n", 0, half) + 1 or _char_boundary(mm, half, -1)
+    tail_start = mm.find(b"\n", index.size - half) + 1 or _char_boundary(mm, index.size - half, 1)
+    head = mm[:head_end]
+    tail = mm[tail_start:]
+    head_lines = head.count(b"\n")
+    tail_lines = tail.count(b"\n") + (1 if tail and not tail.endswith(b"\n") else 0)
+    omitted = index.total_lines - head_lines - tail_lines
+    return (_decode(head) + f"... {omitted} lines ({tail_start - head_end} bytes) not shown ...\n"
+            + _decode(tail)), omitted
+
+
+def read_line_span(path: Path, start_line_one_indexed: int, end_line_one_indexed_inclusive: int,
+                   max_bytes: Optional[int] = None) -> Tuple[str, int, int, int]:
+    """
+    Lee solo las líneas pedidas de un archivo ya resuelto dentro del WORKSPACE.
+    Devuelve (texto, inicio_0_indexado, fin_exclusivo, total_de_líneas), con el
+    rango recortado a los límites del archivo y, si se indica max_bytes, a las
+    líneas completas que caben en ese presupuesto (fin_exclusivo lo refleja).
+    """
+    st = os.stat(path)
+    if st.st_size == 0:
+        return "", 0, 0, 0
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        index = _get_line_index(path, mm, st)
+        total_lines = index.total_lines
+        
+        # Convert to 0-indexed for Python
+        start_idx = min(max(0, start_line_one_indexed - 1), total_lines)
+        end_idx = max(start_idx, min(total_lines, end_line_one_indexed_inclusive))
+        
+        # Solo se tocan los bytes del rango pedido
+        start_off = _line_offset(mm, index, start_idx)
+        end_off = _line_offset(mm, index, end_idx)
+        if max_bytes is not None and end_off - start_off > max_bytes:
+            # No se decodifica más de lo que cabe: hasta la última línea completa del presupuesto
+            end_off = mm.rfind(b"\n", start_off, start_off + max(0, max_bytes)) + 1 or start_off
+            data = mm[start_off:end_off]
+            return _decode(data), start_idx, start_idx + data.count(b"\n"), total_lines
+        return _decode(mm[start_off:end_off]), start_idx, end_idx, total_lines
+
+
 @tool
 def read_file(target_file: str, should_read_entire_file: bool, start_line_one_indexed: int, 
               end_line_one_indexed_inclusive: int, explanation: str = "") -> str:
@@ -43,31 +179,37 @@ def read_file(target_file: str, should_read_entire_file: bool, start_line_one_in
         end_line_one_indexed_inclusive (int): Ending line number (1-based, inclusive)
         explanation (str): Optional explanation for the read operation
     
+    Files larger than 256 KB requested in full are returned as a head/tail view;
+    request a line range to see the omitted part.
+    
     Returns:
         str: File contents with line range information, or error message if file not found
     """
     target_file = to_workspace_path(target_file) 
     try:
-        with open(target_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
         if should_read_entire_file:
-            return f"File: {target_file}\n" + "".join(lines)
+            st = os.stat(target_file)
+            if st.st_size == 0:
+                return f"File: {target_file}\n"
+            with open(target_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if st.st_size <= MAX_ENTIRE_FILE_BYTES:
+                    return f"File: {target_file}\n" + _decode(mm[:])
+                index = _get_line_index(target_file, mm, st)
+                view, _ = _head_tail_view(mm, index, MAX_ENTIRE_FILE_BYTES)
+                return (f"File: {target_file} ({index.total_lines} lines, {st.st_size} bytes; "
+                        f"showing head and tail, request a line range for the rest)\n" + view)
         
-        # Convert to 0-indexed for Python
-        start_idx = max(0, start_line_one_indexed - 1)
-        end_idx = min(len(lines), end_line_one_indexed_inclusive)
-        
-        selected_lines = lines[start_idx:end_idx]
+        selected, start_idx, end_idx, total_lines = read_line_span(
+            target_file, start_line_one_indexed, end_line_one_indexed_inclusive)
         
         result = f"File: {target_file} (lines {start_line_one_indexed}-{end_line_one_indexed_inclusive})\n"
         if start_idx > 0:
             result += f"... {start_idx} lines above not shown ...\n"
         
-        result += "".join(selected_lines)
+        result += selected
         
-        if end_idx < len(lines):
-            result += f"... {len(lines) - end_idx} lines below not shown ...\n"
+        if end_idx < total_lines:
+            result += f"... {total_lines - end_idx} lines below not shown ...\n"
         
         return result
         
@@ -75,5 +217,3 @@ def read_file(target_file: str, should_read_entire_file: bool, start_line_one_in
         return f"Error: File '{target_file}' not found"
     except Exception as e:
         return f"Error reading file: {str(e)}"
-    
-
@@ -0,0 +1,129 @@
+import concurrent.futures as cf
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+# Importa el decorador de herramientas desde el ADK de watsonx Orchestrate
+from ibm_watsonx_orchestrate.agent_builder.tools import tool
+from read_file import read_line_span, to_workspace_path
+
+MAX_TOTAL_BYTES = 200_000         # presupuesto por defecto de la respuesta combinada
+MAX_WORKERS = 8                   # lecturas concurrentes
+
+
+def _merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Une rangos 1-indexados solapados o contiguos: [(1, 20), (15, 30), (31, 40)] → [(1, 40)]."""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _read_ranges(path: Path, ranges: List[Tuple[int, int]],
+                 budget: int) -> List[Tuple[int, int, str, int, bool]]:
+    """
+    Lee los rangos ya fusionados de un archivo sin pasar de `budget` bytes:
+    [(inicio, fin, texto, total_líneas, recortado)].
+    """
+    out = []
+    for start, end in ranges:
+        text, start_idx, end_idx, total = read_line_span(path, start, end, max(0, budget))
+        clipped = end_idx < min(end, total)
+        out.append((start_idx + 1, end_idx, text, total, clipped))
+        budget -= len(text.encode("utf-8"))
+        if clipped or budget <= 0:
+            break
+    return out
+
+
+@tool
+def read_files(ranges: List[Dict[str, Any]], max_total_bytes: int = MAX_TOTAL_BYTES,
+               explanation: str = "") -> str:
+    """
+    Read several files or line ranges in a single call.
+    Prefer this over consecutive read_file calls when you already know which files you need.
+
+    Parameters:
+        ranges (list[dict]): Items with "target_file" (str) and optional "start_line_one_indexed"
+            and "end_line_one_indexed_inclusive" (int). Omitting the lines reads the whole file.
+            Overlapping ranges of the same file are merged.
+        max_total_bytes (int): Byte budget for the combined response (default: 200000)
+        explanation (str): Optional explanation for the read operation
+
+    Returns:
+        str: The requested ranges, one section per file, or an error line per file that could not be read
+    """
+    # Agrupar por archivo (en orden de aparición) y validar rutas
+    order: List[str] = []
+    requested: Dict[str, List[Tuple[int, int]]] = {}
+    errors: Dict[str, str] = {}
+    for item in ranges:
+        # Un elemento mal formado solo invalida su propia sección, no el lote
+        name = str(item.get("target_file", "") if isinstance(item, dict) else item)
+        try:
+            if not isinstance(item, dict):
+                raise ValueError("expected an object with 'target_file'")
+            path = str(to_workspace_path(name))
+            start = int(item.get("start_line_one_indexed") or 1)
+            end = item.get("end_line_one_indexed_inclusive")
+            end = int(end) if end is not None else 2 ** 62
+        except (TypeError, ValueError) as e:
+            if name not in errors:
+                order.append(name)
+            errors[name] = str(e)
+            continue
+        if path not in requested:
+            requested[path] = []
+            order.append(path)
+        requested[path].append((max(1, start), end))
+
+    # Leer en paralelo; cada archivo decodifica como mucho el presupuesto total (el reparto
+    # entre archivos se hace al ensamblar, en orden)
+    results: Dict[str, Any] = {}
+    with cf.ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = {path: pool.submit(_read_ranges, Path(path), _merge_ranges(spans), max_total_bytes)
+                   for path, spans in requested.items()}
+        for path, future in futures.items():
+            try:
+                results[path] = future.result()
+            except FileNotFoundError:
+                errors[path] = "File not found"
+            except Exception as e:
+                errors[path] = f"Error reading file: {e}"
+
+    # Ensamblar respetando el presupuesto total
+    budget = max_total_bytes
+    sections: List[str] = []
+    n_ranges = 0
+    n_files = 0
+    truncated = False
+    for path in order:
+        if path in errors:
+            sections.append(f"File: {path}\nError: {errors[path]}\n")
+            continue
+        n_files += 1
+        for start, end, text, total, clipped in results[path]:
+            data = text.encode("utf-8")
+            if len(data) > budget:
+                cut = data[:max(0, budget)].decode("utf-8", errors="ignore")
+                text = cut[:cut.rfind("\n") + 1]
+                clipped = True
+            if clipped:
+                shown = text.count("\n")
+                end = start + shown - 1
+                text += f"... truncated after {shown} lines: byte budget exhausted ...\n"
+                truncated = True
+            budget -= len(data)
+            sections.append(f"File: {path} (lines {start}-{end} of {total})\n" + text)
+            n_ranges += 1
+            if budget <= 0 or clipped:
+                break
+        if budget <= 0 or truncated:
+            break
+
+    summary = f"Read {n_ranges} range(s) from {n_files} file(s)"
+    if truncated or budget < 0:
+        summary += f"; output capped at {max_total_bytes} bytes, request the rest separately"
+    return summary + "\n\n" + "\n".join(sections)
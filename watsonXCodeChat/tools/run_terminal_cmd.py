@@ -1,25 +1,39 @@
-import subprocess
 from pathlib import Path
 
 # Importa el decorador de herramientas desde el ADK de watsonx Orchestrate
 from ibm_watsonx_orchestrate.agent_builder.tools import tool
 
+from command_output import DEFAULT_OUTPUT_BUDGET, format_result, run_captured
+from shell_sessions import SessionError, get_session_manager
+from terminal_jobs import get_job_manager
+from workspace_catalog import get_catalog
+
 WORKSPACE = Path(r"/home/testagent/workspace").resolve()
+MAX_TIMEOUT_SECONDS = 600               # mismo tope que wait_job; lo más largo, en segundo plano
 
 # Validación: la carpeta debe existir
 WORKSPACE.mkdir(parents=True, exist_ok=True)
 
 @tool
 def run_terminal_cmd(command: str, is_background: bool = False, require_user_approval: bool = True,
-                    explanation: str = "") -> str:
+                    explanation: str = "", timeout: float = 30,
+                    max_output_bytes: int = DEFAULT_OUTPUT_BUDGET, session: str = "default") -> str:
     """
     Execute a terminal command in the workspace with optional user approval for safety.
     
     Parameters:
         command (str): The shell command to execute
-        is_background (bool): Whether to run the command in background mode
+        is_background (bool): Whether to run the command in background mode. Background commands
+            return a job ID; use poll_job, tail_job, wait_job and kill_job to follow them
         require_user_approval (bool): Whether user approval is required before execution
         explanation (str): Optional explanation for the command execution
+        timeout (float): Seconds before a foreground command is killed (partial output is still returned;
+            capped at 600, run longer commands in the background)
+        max_output_bytes (int): Output budget; longer output keeps its beginning and end, repeated
+            lines are collapsed and error/warning lines are listed in a summary section
+        session (str): Name of the persistent shell that runs foreground commands; the working
+            directory, exported variables and activated environments carry over between calls
+            with the same name. Use "" to run in a fresh, isolated shell instead
     
     Returns:
         str: Command output and error information, or approval request message if user approval required
@@ -30,15 +44,26 @@ def run_terminal_cmd(command: str, is_background: bool = False, require_user_app
         return f"Command '{command}' submitted for user approval. Explanation: {explanation}"
     
     try:
+        timeout = min(max(0.0, float(timeout)), MAX_TIMEOUT_SECONDS)
         if is_background:
-            process = subprocess.Popen(command, shell=True, cwd=WORKSPACE,stdout=subprocess.PIPE, 
-                                     stderr=subprocess.PIPE, text=True)
-            return f"Background command started: {command}"
+            job = get_job_manager().start(command, cwd=WORKSPACE)
+            return (f"Background command started: {command}\n"
+                    f"Job ID: {job.job_id} (pid {job.process.pid})\n"
+                    f"Use poll_job / tail_job / wait_job / kill_job with this ID to follow it.")
+        elif session:
+            returncode, timed_out, elapsed, out, err = get_session_manager().run(
+                session, command, timeout, max_output_bytes, cwd=WORKSPACE)
+            get_catalog().invalidate()          # el comando pudo crear o modificar archivos
+            result = format_result(command, returncode, timed_out, elapsed, out, err, max_output_bytes)
+            if timed_out:
+                result += f"\nShell session '{session}' was reset; its working directory and variables were lost."
+            return result
         else:
-            result = subprocess.run(command, shell=True, capture_output=True,cwd=WORKSPACE, text=True, timeout=30)
-            return f"Command: {command}\nOutput:\n{result.stdout}\nErrors:\n{result.stderr}"
-    except subprocess.TimeoutExpired:
-        return f"Command timed out: {command}"
+            returncode, timed_out, elapsed, out, err = run_captured(command, WORKSPACE, timeout, max_output_bytes)
+            get_catalog().invalidate()
+            return format_result(command, returncode, timed_out, elapsed, out, err, max_output_bytes)
+    except SessionError as e:
+        return f"Error executing command: {e}"
     except Exception as e:
         return f"Error executing command: {str(e)}"
     
@@ -0,0 +1,128 @@
+"""
+Caché de resultados de web_search.
+
+Dos niveles: un LRU en memoria (por proceso) y, opcionalmente, una tabla SQLite en disco
+que sobrevive a reinicios del servidor de herramientas. Las consultas se normalizan
+(Unicode NFKC, minúsculas, espacios colapsados) para que variantes triviales compartan
+entrada. Los resultados vacíos también se guardan (caché negativa) con un TTL más corto.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+MEMORY_ENTRIES = 256
+POSITIVE_TTL_SECONDS = 6 * 60 * 60
+NEGATIVE_TTL_SECONDS = 10 * 60
+# Ruta de la base SQLite; vacía desactiva el nivel en disco
+DEFAULT_DB_PATH = os.environ.get(
+    "WEB_SEARCH_CACHE_DB", str(Path.home() / ".cache" / "ibm_agent" / "web_search.sqlite3"))
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Clave canónica de una consulta: NFKC, casefold y espacios colapsados."""
+    text = unicodedata.normalize("NFKC", query).casefold()
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+class SearchCache:
+    """LRU en memoria con TTL y respaldo opcional en SQLite. Thread-safe."""
+
+    def __init__(self, db_path: Optional[str] = DEFAULT_DB_PATH, max_entries: int = MEMORY_ENTRIES,
+                 positive_ttl: float = POSITIVE_TTL_SECONDS, negative_ttl: float = NEGATIVE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self._memory: "OrderedDict[str, Tuple[float, List[Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            try:
+                Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    " key TEXT PRIMARY KEY, expires_at REAL NOT NULL, payload TEXT NOT NULL)")
+            except (sqlite3.Error, OSError) as e:
+                # Directorio no creable o base inaccesible: solo queda el nivel en memoria
+                print(f"[web_search] disk cache disabled: {e}")
+                if self._db is not None:
+                    self._db.close()
+                self._db = None
+
+    @staticmethod
+    def make_key(query: str, max_results: int, namespace: str = "web") -> str:
+        return f"{namespace}|{max_results}|{normalize_query(query)}"
+
+    def get(self, key: str) -> Tuple[Optional[List[Dict]], str]:
+        """Devuelve (resultados, origen) con origen 'memory', 'disk' o 'miss'."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return entry[1], "memory"
+                del self._memory[key]
+            if self._db is not None:
+                try:
+                    row = self._db.execute("SELECT expires_at, payload FROM results WHERE key = ?",
+                                           (key,)).fetchone()
+                except sqlite3.Error:
+                    row = None
+                if row and row[0] > now:
+                    results = json.loads(row[1])
+                    self._remember(key, row[0], results)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return results, "disk"
+            self.misses += 1
+            return None, "miss"
+
+    def put(self, key: str, results: List[Dict]) -> None:
+        ttl = self.positive_ttl if results else self.negative_ttl
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._remember(key, expires_at, results)
+            if self._db is not None:
+                try:
+                    self._db.execute("INSERT OR REPLACE INTO results (key, expires_at, payload) VALUES (?, ?, ?)",
+                                     (key, expires_at, json.dumps(results, ensure_ascii=False)))
+                    self._db.execute("DELETE FROM results WHERE expires_at < ?", (time.time(),))
+                except sqlite3.Error as e:
+                    print(f"[web_search] disk cache write failed: {e}")
+
+    def _remember(self, key: str, expires_at: float, results: List[Dict]) -> None:
+        self._memory[key] = (expires_at, results)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> str:
+        return (f"hits={self.hits} (disk {self.disk_hits}) misses={self.misses} "
+                f"entries={len(self._memory)}{' +sqlite' if self._db is not None else ''}")
+
+
+_cache: Optional[SearchCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SearchCache()
+        return _cache
@@ -0,0 +1,249 @@
+"""
+Registro de procesos en segundo plano lanzados por run_terminal_cmd.
+
+Cada job conserva su Popen, dos hilos lectores que drenan stdout/stderr en buffers
+circulares (así el pipe nunca se llena y el proceso no se bloquea) y su estado final.
+El registro vive en el proceso del servidor de herramientas: run_terminal_cmd y las
+herramientas poll_job / tail_job / wait_job / kill_job comparten el mismo singleton.
+"""
+import itertools
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Union
+
+from workspace_catalog import get_catalog
+
+WORKSPACE = Path(r"/home/testagent/workspace").resolve()
+
+RING_BUFFER_BYTES = 256 * 1024      # por stream y por job
+READ_CHUNK_BYTES = 64 * 1024
+MAX_JOBS = 32                       # jobs terminados más antiguos se descartan por encima de esto
+KILL_GRACE_SECONDS = 5.0
+
+
+class RingBuffer:
+    """Buffer de bytes acotado: conserva los últimos `capacity` bytes y cuenta lo descartado."""
+
+    def __init__(self, capacity: int = RING_BUFFER_BYTES):
+        self.capacity = capacity
+        self._chunks: Deque[bytes] = deque()
+        self._size = 0
+        self.total_bytes = 0
+        self.dropped_bytes = 0
+        self._lock = threading.Lock()
+
+    def write(self, data: bytes) -> None:
+        with self._lock:
+            self.total_bytes += len(data)
+            if len(data) >= self.capacity:
+                self.dropped_bytes += self._size + len(data) - self.capacity
+                self._chunks.clear()
+                data = data[-self.capacity:]
+                self._size = 0
+            self._chunks.append(data)
+            self._size += len(data)
+            while self._size > self.capacity:
+                excess = self._size - self.capacity
+                head = self._chunks[0]
+                if len(head) <= excess:
+                    self._chunks.popleft()
+                    self._size -= len(head)
+                    self.dropped_bytes += len(head)
+                else:
+                    self._chunks[0] = head[excess:]
+                    self._size -= excess
+                    self.dropped_bytes += excess
+
+    def getvalue(self) -> bytes:
+        with self._lock:
+            return b"".join(self._chunks)
+
+    def text(self) -> str:
+        return self.getvalue().decode("utf-8", errors="replace")
+
+    def tail_lines(self, n_lines: int) -> List[str]:
+        lines = self.text().splitlines()
+        return lines[-n_lines:] if n_lines > 0 else []
+
+
+class Job:
+    """Un comando en segundo plano con sus buffers de salida."""
+
+    def __init__(self, job_id: str, command: str, cwd: Path, env: Optional[Dict[str, str]] = None):
+        self.job_id = job_id
+        self.command = command
+        self.cwd = cwd
+        self.stdout = RingBuffer()
+        self.stderr = RingBuffer()
+        self.started_at = time.time()
+        self.ended_at: Optional[float] = None
+        self.killed = False
+        # Nueva sesión → el job y sus hijos forman un grupo de procesos que se puede matar entero
+        self.process = subprocess.Popen(
+            command, shell=True, cwd=cwd, env=env,
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            start_new_session=True,
+        )
+        self._readers = [
+            threading.Thread(target=self._drain, args=(self.process.stdout, self.stdout),
+                             name=f"job-{job_id}-stdout", daemon=True),
+            threading.Thread(target=self._drain, args=(self.process.stderr, self.stderr),
+                             name=f"job-{job_id}-stderr", daemon=True),
+        ]
+        for reader in self._readers:
+            reader.start()
+
+    @staticmethod
+    def _drain(stream, buffer: RingBuffer) -> None:
+        fd = stream.fileno()
+        try:
+            while True:
+                data = os.read(fd, READ_CHUNK_BYTES)
+                if not data:
+                    break
+                buffer.write(data)
+        except OSError:
+            pass
+        finally:
+            stream.close()
+
+    @property
+    def returncode(self) -> Optional[int]:
+        rc = self.process.poll()
+        if rc is not None and self.ended_at is None:
+            self.ended_at = time.time()
+            get_catalog().invalidate()      # el job pudo crear o modificar archivos
+        return rc
+
+    @property
+    def status(self) -> str:
+        rc = self.returncode
+        if rc is None:
+            return "running"
+        return "killed" if self.killed else f"exited ({rc})"
+
+    def runtime(self) -> float:
+        return (self.ended_at or time.time()) - self.started_at
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """Espera a que termine (y a que los lectores vacíen los pipes). True si terminó."""
+        try:
+            self.process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return False
+        for reader in self._readers:
+            reader.join(timeout=1.0)
+        self.returncode
+        return True
+
+    def group_alive(self) -> bool:
+        """True mientras quede algún proceso del grupo (el shell o hijos que lo sobreviven)."""
+        self.returncode                         # recoge al shell si terminó: un zombi cuenta como vivo
+        try:
+            os.killpg(self.process.pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _wait_group(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        self.wait(timeout)
+        while self.group_alive():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def kill(self, grace: float = KILL_GRACE_SECONDS) -> bool:
+        """
+        SIGTERM al grupo, SIGKILL si no termina en `grace` segundos. Se señala el grupo aunque
+        el shell ya haya salido (servidores lanzados con `&` siguen vivos en él).
+        False si no quedaba ningún proceso del grupo.
+        """
+        if not self.group_alive():
+            return False
+        self.killed = True
+        for sig, wait_for in ((signal.SIGTERM, grace), (signal.SIGKILL, 1.0)):
+            try:
+                os.killpg(self.process.pid, sig)
+            except ProcessLookupError:
+                break
+            if self._wait_group(wait_for):
+                break
+        return True
+
+    def summary(self) -> str:
+        return (
+            f"Job {self.job_id}: {self.status}\n"
+            f"Command: {self.command}\n"
+            f"Runtime: {self.runtime():.1f}s\n"
+            f"Output: {self.stdout.total_bytes} bytes stdout, {self.stderr.total_bytes} bytes stderr"
+        )
+
+    def tail(self, n_lines: int = 50, stream: str = "both") -> str:
+        parts = []
+        for name, buffer in (("stdout", self.stdout), ("stderr", self.stderr)):
+            if stream not in ("both", name):
+                continue
+            lines = buffer.tail_lines(n_lines)
+            header = f"--- {name} (last {len(lines)} lines"
+            if buffer.dropped_bytes:
+                header += f", {buffer.dropped_bytes} older bytes discarded"
+            parts.append(header + ") ---")
+            parts.extend(lines)
+        return "\n".join(parts)
+
+
+class JobManager:
+    """Registro thread-safe de jobs con IDs cortos y secuenciales."""
+
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def start(self, command: str, cwd: Union[str, Path] = WORKSPACE,
+              env: Optional[Dict[str, str]] = None) -> Job:
+        with self._lock:
+            job_id = f"job-{next(self._counter)}"
+            job = Job(job_id, command, Path(cwd), env)
+            self._jobs[job_id] = job
+            self._prune()
+        return job
+
+    def _prune(self) -> None:
+        finished = [j for j in self._jobs.values() if j.returncode is not None]
+        excess = len(self._jobs) - MAX_JOBS
+        for job in sorted(finished, key=lambda j: j.started_at)[:max(0, excess)]:
+            del self._jobs[job.job_id]
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            job = self._jobs.get(job_id.strip())
+        if job is None:
+            raise KeyError(f"Unknown job id '{job_id}'. Known jobs: {', '.join(self._jobs) or 'none'}")
+        return job
+
+    def jobs(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
+
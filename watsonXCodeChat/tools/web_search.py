@@ -1,190 +1,322 @@
 import random
 import time
-import requests
-from urllib.parse import quote_plus
-from bs4 import BeautifulSoup
-from typing import List, Dict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import parse_qs, parse_qsl, quote_plus, urlencode, urlparse, urlsplit, urlunsplit
+from typing import Dict, List, Optional, Tuple
 
 # Importa el decorador de herramientas desde el ADK de watsonx Orchestrate
 from ibm_watsonx_orchestrate.agent_builder.tools import tool
 
+from html_parser import parse_html
+from http_pool import ACCEPT_ENCODING, get_session
+from search_cache import SearchCache, get_search_cache
+
+# Shared deadline for one web_search call and per-request cap
+SEARCH_DEADLINE_SECONDS = 8.0
+REQUEST_TIMEOUT_SECONDS = 10.0
+# Google is a fallback: it is only queried if nothing arrived after this delay
+GOOGLE_HEDGE_SECONDS = 1.5
+
+
 @tool
-def web_search(search_term: str, explanation: str = "", max_results: int = 5) -> str:
+def web_search(search_term: str, explanation: str = "", max_results: int = 5, use_cache: bool = True) -> str:
     """
     Search the web using web scraping from multiple search engines.
-    
+    Results are cached per normalized query (empty results for a shorter time).
+
     Parameters:
         search_term (str): The search query to look for on the web
         explanation (str): Optional explanation for the web search operation
         max_results (int): Maximum number of search results to return (default: 5)
-    
+        use_cache (bool): Set to False to force a fresh search (the new results still refresh the cache)
+
     Returns:
         str: Formatted search results with titles, URLs, and descriptions from multiple search engines
     """
     try:
-        results = []
-        
-        # User agents to rotate for avoiding detection
-        user_agents = [
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        ]
-        
-        headers = {
-            'User-Agent': random.choice(user_agents),
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-        }
-        
-        # Try DuckDuckGo first (more scraping-friendly)
-        try:
-            results.extend(_search_duckduckgo(search_term, headers, max_results // 2))
-        except Exception as e:
-            print(f"DuckDuckGo search failed: {e}")
-        
-        # Try Bing as backup
-        try:
-            results.extend(_search_bing(search_term, headers, max_results // 2))
-        except Exception as e:
-            print(f"Bing search failed: {e}")
-        
-        # If no results, try a simple Google search (be cautious with rate limiting)
-        if not results:
-            try:
-                results.extend(_search_google_simple(search_term, headers, max_results))
-            except Exception as e:
-                print(f"Google search failed: {e}")
-        
-        if not results:
-            return f"No search results found for '{search_term}'. Search engines may be blocking requests."
-        
-        # Format results
-        formatted_results = f"Web search results for: '{search_term}'\n"
-        formatted_results += f"Found {len(results)} results:\n\n"
-        
-        for i, result in enumerate(results[:max_results], 1):
-            formatted_results += f"{i}. **{result['title']}**\n"
-            formatted_results += f"   URL: {result['url']}\n"
-            formatted_results += f"   Snippet: {result['snippet'][:200]}{'...' if len(result['snippet']) > 200 else ''}\n\n"
-        
-        return formatted_results
-        
+        cache = get_search_cache()
+        key = SearchCache.make_key(search_term, max_results)
+        results, source = cache.get(key) if use_cache else (None, "bypass")
+        if results is None:
+            results, complete = _search_engines(search_term, max_results)
+            # Un vacío por errores o plazo agotado no es "sin resultados": no se guarda
+            if results or complete:
+                cache.put(key, results)
+            elif source != "bypass":
+                source = "not cached (engines failed or timed out)"
+        return _format_results(search_term, results, max_results) + f"\nCache: {source} | {cache.stats()}"
     except Exception as e:
         return f"Error in web search: {str(e)}"
 
-def _search_duckduckgo(query: str, headers: dict, max_results: int) -> List[Dict]:
+
+def _search_engines(search_term: str, max_results: int,
+                    deadline: Optional[float] = None) -> Tuple[List[Dict], bool]:
+    """
+    Query the search engines concurrently under a shared deadline.
+    Returns as soon as max_results unique URLs are collected; Google is only queried when the
+    primary engines have produced nothing after GOOGLE_HEDGE_SECONDS (or finished empty).
+    Returns (results, complete); complete is False if any engine failed or missed the deadline.
+    """
+    headers = _build_headers()
+    started = time.monotonic()
+    end = started + (SEARCH_DEADLINE_SECONDS if deadline is None else deadline)
+    merger = _ResultMerger(max_results)
+
+    # One thread per engine for this call: engines abandoned by earlier calls keep running
+    # (bounded by REQUEST_TIMEOUT_SECONDS) but can never queue this call's requests
+    pool = ThreadPoolExecutor(max_workers=len(PRIMARY_ENGINES) + 1, thread_name_prefix="web_search")
+
+    def submit(name, search_fn):
+        timeout = max(1.0, min(REQUEST_TIMEOUT_SECONDS, end - time.monotonic()))
+        return pool.submit(search_fn, search_term, headers, max_results, timeout)
+
+    pending = {submit(name, fn): name for name, fn in PRIMARY_ENGINES}
+    google_started = False
+    failed = False
+    while pending or not google_started:
+        now = time.monotonic()
+        if now >= end:
+            break
+        if not google_started and (not pending or (now >= started + GOOGLE_HEDGE_SECONDS and not merger.count)):
+            # If no results, try a simple Google search (be cautious with rate limiting)
+            google_started = True
+            pending[submit("google", _search_google_simple)] = "google"
+            continue
+        wait_for = end - now
+        if not google_started:
+            wait_for = min(wait_for, max(0.05, started + GOOGLE_HEDGE_SECONDS - now))
+        done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = pending.pop(future)
+            try:
+                merger.add(name, future.result())
+            except Exception as e:
+                failed = True
+                print(f"{name} search failed: {e}")
+        if merger.full:
+            break
+        if merger.count and not google_started and not pending:
+            break
+
+    # Engines still running finish in the background; their results are discarded
+    pool.shutdown(wait=False, cancel_futures=True)
+    # Sin resultados solo es una respuesta fiable si también se llegó a preguntar a Google
+    return merger.results(), not failed and not pending and (google_started or merger.count > 0)
+
+
+def _build_headers() -> Dict[str, str]:
+    # User agents to rotate for avoiding detection
+    user_agents = [
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    ]
+
+    return {
+        'User-Agent': random.choice(user_agents),
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.5',
+        'Accept-Encoding': ACCEPT_ENCODING,
+        'Connection': 'keep-alive',
+    }
+
+
+_TRACKING_PARAMS = {'sa', 'ved', 'usg', 'ei', 'opi', 'fbclid', 'gclid'}
+
+
+def _canonical_url(url: str) -> str:
+    """Key used to detect the same page returned by different engines"""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if not (k.lower().startswith('utm_') or k.lower() in _TRACKING_PARAMS)]
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit(('', host, path, urlencode(sorted(query)), ''))
+
+
+class _ResultMerger:
+    """Collects results from several engines, merging duplicates by canonical URL"""
+
+    def __init__(self, max_results: int):
+        self.max_results = max(1, max_results)
+        self._by_url: Dict[str, Dict] = {}
+        self._order: Dict[str, tuple] = {}
+
+    def add(self, engine: str, results: List[Dict]) -> None:
+        priority = ENGINE_PRIORITY.get(engine, len(ENGINE_PRIORITY))
+        for rank, result in enumerate(results):
+            key = _canonical_url(result['url'])
+            existing = self._by_url.get(key)
+            if existing is None:
+                self._by_url[key] = dict(result, engines=[engine])
+                self._order[key] = (rank, priority)
+            else:
+                existing['engines'].append(engine)
+                if len(result['snippet']) > len(existing['snippet']) and result['snippet'] != 'No snippet available':
+                    existing['snippet'] = result['snippet']
+                self._order[key] = min(self._order[key], (rank, priority))
+
+    @property
+    def count(self) -> int:
+        return len(self._by_url)
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.max_results
+
+    def results(self) -> List[Dict]:
+        # Interleave engines by rank: 1st of each engine, then 2nd of each, ...
+        keys = sorted(self._by_url, key=lambda k: self._order[k])
+        return [self._by_url[k] for k in keys]
+
+
+def _format_results(search_term: str, results: List[Dict], max_results: int) -> str:
+    if not results:
+        return f"No search results found for '{search_term}'. Search engines may be blocking requests.\n"
+
+    # Format results
+    formatted_results = f"Web search results for: '{search_term}'\n"
+    formatted_results += f"Found {len(results)} results:\n\n"
+
+    for i, result in enumerate(results[:max_results], 1):
+        formatted_results += f"{i}. **{result['title']}**\n"
+        formatted_results += f"   URL: {result['url']}\n"
+        formatted_results += f"   Snippet: {result['snippet'][:200]}{'...' if len(result['snippet']) > 200 else ''}\n\n"
+
+    return formatted_results
+
+def _search_duckduckgo(query: str, headers: dict, max_results: int, timeout: float = REQUEST_TIMEOUT_SECONDS) -> List[Dict]:
     """Search DuckDuckGo"""
-    results = []
-    
     # DuckDuckGo HTML search
     url = f"https://html.duckduckgo.com/html/?q={quote_plus(query)}"
-    
-    response = requests.get(url, headers=headers, timeout=10)
+
+    response = get_session().get(url, headers=headers, timeout=timeout)
     response.raise_for_status()
-    
-    soup = BeautifulSoup(response.content, 'html.parser')
-    
+
+    return _parse_duckduckgo(response.content, max_results)
+
+def _unwrap_duckduckgo_url(url: str) -> str:
+    """DuckDuckGo HTML links go through //duckduckgo.com/l/?uddg=<target>; return the target"""
+    if 'duckduckgo.com/l/' in url:
+        target = parse_qs(urlparse(url).query).get('uddg')
+        if target:
+            return target[0]
+    return url
+
+def _parse_duckduckgo(html: bytes, max_results: int) -> List[Dict]:
+    """Extract results from a DuckDuckGo HTML page"""
+    results = []
+    doc = parse_html(html)
+
     # Find search results
-    result_divs = soup.find_all('div', class_='result')
-    
-    for div in result_divs[:max_results]:
-        try:
-            title_elem = div.find('a', class_='result__a')
-            snippet_elem = div.find('a', class_='result__snippet')
-            
-            if title_elem and snippet_elem:
-                title = title_elem.get_text(strip=True)
-                url = title_elem.get('href', '')
-                snippet = snippet_elem.get_text(strip=True)
-                
-                if title and url:
-                    results.append({
-                        'title': title,
-                        'url': url,
-                        'snippet': snippet or 'No snippet available'
-                    })
-        except Exception as e:
-            continue
-    
+    for div in doc.select('div.result'):
+        if len(results) >= max_results:
+            break
+        title_elem = div.select_one('a.result__a')
+        snippet_elem = div.select_one('a.result__snippet')
+
+        if title_elem and snippet_elem:
+            title = title_elem.text()
+            url = _unwrap_duckduckgo_url(title_elem.attr('href'))
+            snippet = snippet_elem.text()
+
+            if title and url:
+                results.append({
+                    'title': title,
+                    'url': url,
+                    'snippet': snippet or 'No snippet available'
+                })
+
     return results
 
-def _search_bing(query: str, headers: dict, max_results: int) -> List[Dict]:
+def _search_bing(query: str, headers: dict, max_results: int, timeout: float = REQUEST_TIMEOUT_SECONDS) -> List[Dict]:
     """Search Bing"""
-    results = []
-    
     url = f"https://www.bing.com/search?q={quote_plus(query)}"
-    
-    response = requests.get(url, headers=headers, timeout=10)
+
+    response = get_session().get(url, headers=headers, timeout=timeout)
     response.raise_for_status()
-    
-    soup = BeautifulSoup(response.content, 'html.parser')
-    
+
+    return _parse_bing(response.content, max_results)
+
+def _parse_bing(html: bytes, max_results: int) -> List[Dict]:
+    """Extract results from a Bing results page"""
+    results = []
+    doc = parse_html(html)
+
     # Find search results
-    result_divs = soup.find_all('li', class_='b_algo')
-    
-    for div in result_divs[:max_results]:
-        try:
-            title_elem = div.find('h2')
-            if title_elem:
-                link_elem = title_elem.find('a')
-                if link_elem:
-                    title = link_elem.get_text(strip=True)
-                    url = link_elem.get('href', '')
-                    
-                    snippet_elem = div.find('p') or div.find('div', class_='b_caption')
-                    snippet = snippet_elem.get_text(strip=True) if snippet_elem else 'No snippet available'
-                    
-                    if title and url:
-                        results.append({
-                            'title': title,
-                            'url': url,
-                            'snippet': snippet
-                        })
-        except Exception as e:
-            continue
-    
+    for div in doc.select('li.b_algo'):
+        if len(results) >= max_results:
+            break
+        link_elem = div.select_one('h2 a')
+        if link_elem:
+            title = link_elem.text()
+            url = link_elem.attr('href')
+
+            snippet_elem = div.select_one('p') or div.select_one('div.b_caption')
+            snippet = snippet_elem.text() if snippet_elem else 'No snippet available'
+
+            if title and url:
+                results.append({
+                    'title': title,
+                    'url': url,
+                    'snippet': snippet
+                })
+
     return results
 
-def _search_google_simple(query: str, headers: dict, max_results: int) -> List[Dict]:
+def _search_google_simple(query: str, headers: dict, max_results: int, timeout: float = REQUEST_TIMEOUT_SECONDS) -> List[Dict]:
     """Simple Google search (use sparingly to avoid rate limiting)"""
-    results = []
-    
     url = f"https://www.google.com/search?q={quote_plus(query)}"
-    
-    # Add delay to be respectful
-    time.sleep(random.uniform(1, 3))
-    
-    response = requests.get(url, headers=headers, timeout=10)
+
+    response = get_session().get(url, headers=headers, timeout=timeout)
     response.raise_for_status()
-    
-    soup = BeautifulSoup(response.content, 'html.parser')
-    
+
+    return _parse_google(response.content, max_results)
+
+def _unwrap_google_url(url: str) -> str:
+    """Google wraps result links as /url?q=<target>&sa=...; return the target"""
+    if url.startswith('/url?'):
+        target = parse_qs(urlparse(url).query).get('q')
+        if target:
+            return target[0]
+    return url
+
+def _parse_google(html: bytes, max_results: int) -> List[Dict]:
+    """Extract results from a Google results page (desktop or basic/mobile layout)"""
+    results = []
+    doc = parse_html(html)
+
     # Find search results (Google's structure changes frequently)
-    result_divs = soup.find_all('div', class_='g')
-    
-    for div in result_divs[:max_results]:
-        try:
-            title_elem = div.find('h3')
-            link_elem = div.find('a')
-            
-            if title_elem and link_elem:
-                title = title_elem.get_text(strip=True)
-                url = link_elem.get('href', '')
-                
-                # Try to find snippet
-                snippet_elem = div.find('span', {'data-content-id': True}) or div.find('div', class_='VwiC3b')
-                snippet = snippet_elem.get_text(strip=True) if snippet_elem else 'No snippet available'
-                
-                if title and url and not url.startswith('/search'):
-                    results.append({
-                        'title': title,
-                        'url': url,
-                        'snippet': snippet
-                    })
-        except Exception as e:
-            continue
-    
+    result_divs = doc.select('div.g') or doc.select('div.ezO2md')
+
+    for div in result_divs:
+        if len(results) >= max_results:
+            break
+        title_elem = div.select_one('h3') or div.select_one('span.CVA68e')
+        link_elem = div.select_one('a')
+
+        if title_elem and link_elem:
+            title = title_elem.text()
+            url = _unwrap_google_url(link_elem.attr('href'))
+
+            # Try to find snippet
+            snippet_elem = (div.select_one('span[data-content-id]') or div.select_one('div.VwiC3b')
+                            or div.select_one('span.FrIlee'))
+            snippet = snippet_elem.text() if snippet_elem else 'No snippet available'
+
+            if title and url and not url.startswith('/search'):
+                results.append({
+                    'title': title,
+                    'url': url,
+                    'snippet': snippet
+                })
+
     return results
+
+
+# Primary engines run concurrently on every search; Google is the fallback
+PRIMARY_ENGINES = [("duckduckgo", _search_duckduckgo), ("bing", _search_bing)]
+ENGINE_PRIORITY = {"duckduckgo": 0, "bing": 1, "google": 2}
+
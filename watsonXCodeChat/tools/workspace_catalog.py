@@ -0,0 +1,432 @@
+"""
+Catálogo compartido del sistema de ficheros del WORKSPACE.
+
+list_dir, file_search, grep_search y codebase_search consultan este catálogo
+en lugar de recorrer el árbol cada uno por su cuenta. El snapshot se guarda
+por directorio en estructuras compactas (__slots__ + array) y se refresca de
+forma incremental:
+  • Linux: inotify (vía ctypes) marca los directorios modificados y solo esos
+    se vuelven a listar.
+  • Resto / sin watches disponibles: re-escaneo por diferencia de mtime, como
+    mucho una vez cada RESCAN_INTERVAL segundos, de modo que varias
+    herramientas dentro del mismo turno comparten un único recorrido.
+  • Las herramientas que escriben (edit_file, write_file, delete_file, comandos
+    de terminal) llaman a invalidate(): su cambio se ve en la siguiente consulta
+    aunque no haya pasado RESCAN_INTERVAL.
+
+Uso:
+    from workspace_catalog import get_catalog
+    for path, size, mtime_ns in get_catalog().iter_files(root):
+        ...
+
+Benchmark de recorrido en frío / en caliente:
+    python workspace_catalog.py [directorio]
+"""
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+WORKSPACE = Path(r"/home/testagent/workspace").resolve()
+
+EXCLUDED_DIRS = frozenset({".codebase_index"})   # cachés internas de las herramientas
+RESCAN_INTERVAL: float = 2.0                     # segundos entre re-escaneos sin inotify
+
+KIND_FILE, KIND_DIR, KIND_OTHER = 0, 1, 2
+
+
+class _DirNode:
+    """Contenido inmediato de un directorio: nombres, tipos, tamaños y mtimes."""
+    __slots__ = ("mtime_ns", "names", "kinds", "sizes", "mtimes")
+
+    def __init__(self, mtime_ns: int):
+        self.mtime_ns = mtime_ns
+        self.names: List[str] = []
+        self.kinds = bytearray()
+        self.sizes = array("q")
+        self.mtimes = array("q")
+
+
+# --------------------------------------------------------------------------- #
+# inotify (opcional, solo Linux)
+# --------------------------------------------------------------------------- #
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_WATCH_MASK = (_IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO
+               | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _InotifyWatcher:
+    """Watches por directorio; drain() devuelve los directorios (relativos) con cambios."""
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify solo está disponible en Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._rm = libc.inotify_rm_watch
+        self._rm.argtypes = (ctypes.c_int, ctypes.c_int)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falló")
+        self._wd_to_rel: Dict[int, str] = {}
+        self._rel_to_wd: Dict[str, int] = {}
+
+    def add(self, rel: str, path: str) -> None:
+        wd = self._add(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            # ENOSPC (max_user_watches) u otro error: el catálogo pasa a modo mtime
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch falló para {rel!r}")
+        self._wd_to_rel[wd] = rel
+        self._rel_to_wd[rel] = wd
+
+    def remove(self, rel: str) -> None:
+        wd = self._rel_to_wd.pop(rel, None)
+        if wd is not None:
+            self._wd_to_rel.pop(wd, None)
+            self._rm(self.fd, wd)
+
+    def drain(self) -> Optional[set]:
+        """Directorios sucios desde la última llamada; None si la cola desbordó."""
+        dirty: set = set()
+        while True:
+            try:
+                buf = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                return dirty
+            pos = 0
+            while pos < len(buf):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buf, pos)
+                pos += _EVENT_HEADER.size + length
+                if mask & _IN_Q_OVERFLOW:
+                    return None
+                rel = self._wd_to_rel.get(wd)
+                if rel is None:
+                    continue
+                if mask & _IN_IGNORED:
+                    self._wd_to_rel.pop(wd, None)
+                    self._rel_to_wd.pop(rel, None)
+                elif mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+                    dirty.add(os.path.dirname(rel) if rel else rel)
+                else:
+                    dirty.add(rel)
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+# --------------------------------------------------------------------------- #
+# Catálogo
+# --------------------------------------------------------------------------- #
+class WorkspaceCatalog:
+    """Snapshot incremental de paths, tamaños, mtimes y tipos bajo WORKSPACE."""
+
+    def __init__(self, root: Path = WORKSPACE, use_inotify: bool = True):
+        self.root = root
+        self._dirs: Dict[str, _DirNode] = {}
+        self._lock = threading.RLock()
+        self._last_scan = 0.0
+        self._dirty: set = set()                   # directorios tocados por escrituras propias
+        self._watcher: Optional[_InotifyWatcher] = None
+        self._want_inotify = use_inotify
+        self.last_refresh_seconds = 0.0
+        self.last_refresh_kind = "none"
+
+    # ------------------------------ escaneo -------------------------------- #
+    def _abs(self, rel: str) -> str:
+        return os.path.join(self.root, rel) if rel else str(self.root)
+
+    def _scan_dir(self, rel: str) -> Optional[_DirNode]:
+        """Lista un único directorio con os.scandir (un getdents + un stat por entrada)."""
+        path = self._abs(rel)
+        try:
+            node = _DirNode(os.stat(path).st_mtime_ns)
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            return None
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name in EXCLUDED_DIRS:
+                        continue
+                    kind, size, mtime = KIND_DIR, 0, 0
+                elif entry.is_file():
+                    st = entry.stat()
+                    kind, size, mtime = KIND_FILE, st.st_size, st.st_mtime_ns
+                else:
+                    kind, size, mtime = KIND_OTHER, -1, 0
+            except OSError:
+                kind, size, mtime = KIND_FILE, -1, 0
+            node.names.append(entry.name)
+            node.kinds.append(kind)
+            node.sizes.append(size)
+            node.mtimes.append(mtime)
+        return node
+
+    def _scan_tree(self, rel: str) -> None:
+        """Escanea rel y todos sus subdirectorios, registrando watches si hay inotify."""
+        stack = [rel]
+        while stack:
+            current = stack.pop()
+            node = self._scan_dir(current)
+            if node is None:
+                self._drop_tree(current)
+                continue
+            self._dirs[current] = node
+            self._watch(current)
+            for name, kind in zip(node.names, node.kinds):
+                if kind == KIND_DIR:
+                    stack.append(f"{current}/{name}" if current else name)
+
+    def _drop_tree(self, rel: str) -> None:
+        prefix = rel + "/"
+        for key in [k for k in self._dirs if k == rel or k.startswith(prefix) or not rel]:
+            del self._dirs[key]
+            if self._watcher is not None:
+                self._watcher.remove(key)
+
+    def _rescan_dir(self, rel: str) -> None:
+        """Vuelve a listar un directorio y reconcilia los subdirectorios añadidos o borrados."""
+        old = self._dirs.get(rel)
+        node = self._scan_dir(rel)
+        if node is None:
+            self._drop_tree(rel)
+            return
+        self._dirs[rel] = node
+        old_dirs = {n for n, k in zip(old.names, old.kinds) if k == KIND_DIR} if old else set()
+        new_dirs = {n for n, k in zip(node.names, node.kinds) if k == KIND_DIR}
+        for name in old_dirs - new_dirs:
+            self._drop_tree(f"{rel}/{name}" if rel else name)
+        for name in new_dirs - old_dirs:
+            self._scan_tree(f"{rel}/{name}" if rel else name)
+
+    def _watch(self, rel: str) -> None:
+        if self._watcher is None:
+            return
+        try:
+            self._watcher.add(rel, self._abs(rel))
+        except OSError as e:
+            print(f"[workspace_catalog] inotify disabled ({e}); falling back to mtime rescans")
+            self._watcher.close()
+            self._watcher = None
+
+    # ------------------------------ refresco ------------------------------- #
+    def invalidate(self, path: Union[str, Path, None] = None) -> None:
+        """
+        Avisa de una escritura hecha por las propias herramientas: el próximo refresh vuelve
+        a listar el directorio de `path` (o re-statea todo el árbol si path es None).
+        """
+        with self._lock:
+            if path is None:
+                self._last_scan = 0.0
+                return
+            rel = self._rel(os.path.dirname(os.path.abspath(path)))
+            if rel is not None:
+                self._dirty.add(rel)
+
+    def _rescan_dirty(self) -> int:
+        dirty, self._dirty = self._dirty, set()
+        for rel in sorted(dirty):
+            # Un directorio recién creado se descubre al re-listar el ancestro conocido más cercano
+            while rel and rel not in self._dirs:
+                rel = os.path.dirname(rel)
+            if rel in self._dirs:
+                self._rescan_dir(rel)
+        return len(dirty)
+
+    def refresh(self, force: bool = False) -> None:
+        """Pone el snapshot al día con el menor trabajo posible."""
+        with self._lock:
+            t0 = time.perf_counter()
+            if not self._dirs or force:
+                self._dirty.clear()
+                self._cold_scan()
+            elif self._watcher is not None:
+                dirty = self._watcher.drain()
+                if dirty is None:
+                    self._cold_scan()
+                else:
+                    for rel in sorted(dirty):
+                        if rel == "" or os.path.dirname(rel) in self._dirs or rel in self._dirs:
+                            self._rescan_dir(rel)
+                    self.last_refresh_kind = f"inotify ({len(dirty)} dir(s))"
+                self._rescan_dirty()
+            elif time.monotonic() - self._last_scan >= RESCAN_INTERVAL:
+                self._dirty.clear()
+                self._mtime_rescan()
+            elif self._dirty:
+                self.last_refresh_kind = f"invalidated ({self._rescan_dirty()} dir(s))"
+            else:
+                self.last_refresh_kind = "cached"
+            self.last_refresh_seconds = time.perf_counter() - t0
+
+    def _cold_scan(self) -> None:
+        if self._watcher is not None:
+            self._watcher.close()
+            self._watcher = None
+        if self._want_inotify:
+            try:
+                self._watcher = _InotifyWatcher()
+            except OSError:
+                self._watcher = None
+        self._dirs.clear()
+        self._scan_tree("")
+        self._last_scan = time.monotonic()
+        self.last_refresh_kind = "cold"
+
+    def _mtime_rescan(self) -> None:
+        """
+        Directorios con mtime distinto → se vuelven a listar.
+        Resto → solo se re-statean sus ficheros (cambios de contenido no tocan el mtime del dir).
+        Los nodos se sustituyen por copias actualizadas, nunca se modifican en sitio.
+        """
+        relisted = 0
+        for rel in list(self._dirs):
+            node = self._dirs.get(rel)
+            if node is None:
+                continue
+            base = self._abs(rel)
+            try:
+                mtime = os.stat(base).st_mtime_ns
+            except OSError:
+                self._drop_tree(rel)
+                continue
+            if mtime != node.mtime_ns:
+                self._rescan_dir(rel)
+                relisted += 1
+                continue
+            fresh = _DirNode(node.mtime_ns)
+            fresh.names, fresh.kinds = node.names, node.kinds
+            fresh.sizes, fresh.mtimes = array("q", node.sizes), array("q", node.mtimes)
+            for i, kind in enumerate(node.kinds):
+                if kind != KIND_FILE:
+                    continue
+                try:
+                    st = os.stat(os.path.join(base, node.names[i]))
+                    fresh.sizes[i], fresh.mtimes[i] = st.st_size, st.st_mtime_ns
+                except OSError:
+                    fresh.sizes[i], fresh.mtimes[i] = -1, 0
+            self._dirs[rel] = fresh
+        self._last_scan = time.monotonic()
+        self.last_refresh_kind = f"mtime rescan ({relisted} dir(s) relisted)"
+
+    # ------------------------------ consultas ------------------------------ #
+    def _rel(self, root: Union[str, Path, None]) -> Optional[str]:
+        p = Path(root or self.root)
+        if not p.is_absolute():
+            p = self.root / p
+        p = p.resolve()
+        if p == self.root:
+            return ""
+        if self.root not in p.parents:
+            return None
+        return p.relative_to(self.root).as_posix()
+
+    def covers(self, root: Union[str, Path, None]) -> bool:
+        """True si root está dentro del WORKSPACE (y por tanto en el catálogo)."""
+        return self._rel(root) is not None
+
+    def iter_entries(self, root: Union[str, Path, None] = None
+                     ) -> Iterator[Tuple[str, int, int, int]]:
+        """
+        Recorre recursivamente root produciendo (path_relativo_a_root, tipo, size, mtime_ns).
+        Recorrido en profundidad con los nombres en orden alfabético: cada directorio
+        va seguido inmediatamente de su contenido (el mismo orden que `rg --sort path`).
+        """
+        self.refresh()
+        base = self._rel(root)
+        if base is None:
+            raise ValueError(f"Ruta fuera del workspace: {root}")
+        with self._lock:
+            dirs = dict(self._dirs)     # los nodos se reemplazan, no se mutan: basta copiar el dict
+        node = dirs.get(base)
+        if node is None:
+            return
+        stack = [(base, "", zip(node.names, node.kinds, node.sizes, node.mtimes))]
+        while stack:
+            rel, prefix, entries = stack[-1]
+            item = next(entries, None)
+            if item is None:
+                stack.pop()
+                continue
+            name, kind, size, mtime = item
+            path = f"{prefix}/{name}" if prefix else name
+            yield path, kind, size, mtime
+            if kind == KIND_DIR:
+                child = f"{rel}/{name}" if rel else name
+                node = dirs.get(child)
+                if node is not None:
+                    stack.append((child, path, zip(node.names, node.kinds, node.sizes, node.mtimes)))
+
+    def iter_files(self, root: Union[str, Path, None] = None) -> Iterator[Tuple[str, int, int]]:
+        """(path_absoluto, size, mtime_ns) de cada fichero regular bajo root."""
+        base = self._rel(root)
+        base_abs = self._abs(base or "")
+        for rel, kind, size, mtime in self.iter_entries(root):
+            if kind == KIND_FILE:
+                yield os.path.join(base_abs, rel), size, mtime
+
+    def stats(self) -> Tuple[int, int]:
+        """(directorios, ficheros) actualmente en el snapshot."""
+        with self._lock:
+            files = sum(node.kinds.count(KIND_FILE) for node in self._dirs.values())
+            return len(self._dirs), files
+
+
+_CATALOG: List[WorkspaceCatalog] = []
+_CATALOG_LOCK = threading.Lock()
+
+
+def get_catalog() -> WorkspaceCatalog:
+    """Catálogo único por proceso, compartido por todas las herramientas."""
+    with _CATALOG_LOCK:
+        if not _CATALOG:
+            _CATALOG.append(WorkspaceCatalog())
+        return _CATALOG[0]
+
+
+# --------------------------------------------------------------------------- #
+# Benchmark: recorrido en frío / en caliente frente a rglob y os.walk
+# --------------------------------------------------------------------------- #
+def _benchmark(root: Path, rounds: int = 5) -> None:
+    def timed(label, fn):
+        t0 = time.perf_counter()
+        n = fn()
+        elapsed = time.perf_counter() - t0
+        print(f"{label() if callable(label) else label:<48} {elapsed:8.4f}s  ({n} entries)")
+
+    timed("Path.rglob('*') + is_file()", lambda: sum(1 for p in root.rglob("*") if p.is_file()))
+    timed("os.walk", lambda: sum(len(f) for _, _, f in os.walk(root)))
+
+    for use_inotify in (True, False):
+        label = "inotify" if use_inotify else "mtime"
+        catalog = WorkspaceCatalog(root, use_inotify=use_inotify)
+        timed(f"catalog cold ({label})", lambda: (catalog.refresh(), catalog.stats()[1])[1])
+        for i in range(rounds):
+            catalog._last_scan = 0.0   # fuerza el re-escaneo para medir el peor caso caliente
+            timed(lambda: f"catalog warm #{i + 1} ({catalog.last_refresh_kind})",
+                  lambda: (catalog.refresh(), catalog.stats()[1])[1])
+        timed(f"catalog iter_files ({label})", lambda: sum(1 for _ in catalog.iter_files()))
+
+
+if __name__ == "__main__":
+    _benchmark(Path(sys.argv[1]).resolve() if len(sys.argv) > 1 else WORKSPACE)
@@ -0,0 +1,250 @@
+"""
+Captura incremental de la salida de comandos con presupuesto de bytes.
+
+En lugar de acumular toda la salida (un `mvn install` puede producir megas), cada
+stream pasa por un OutputCapture que conserva el principio y el final, colapsa líneas
+repetidas consecutivas y extrae las líneas de error/aviso (compiladores, pytest,
+Maven, trazas de Python/Java) a un resumen. El resumen también se descuenta del
+presupuesto (hasta SUMMARY_BUDGET_SHARE), de modo que el informe completo no lo supera.
+"""
+import os
+import re
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, List, Optional, Tuple, Union
+
+DEFAULT_OUTPUT_BUDGET = 16 * 1024       # bytes de salida devueltos al LLM por llamada
+MAX_SUMMARY_LINES = 40
+SUMMARY_BUDGET_SHARE = 0.25             # fracción máxima del presupuesto para el resumen de errores
+MAX_LINE_CHARS = 2000                   # líneas más largas se recortan (minificados, barras de progreso)
+READ_CHUNK_BYTES = 64 * 1024
+
+# Patrones de errores y avisos de las herramientas que usan los agentes
+_SUMMARY_PATTERNS = [
+    re.compile(r"^\S[^:\n]*:\d+(?::\d+)?:\s*(?:fatal\s+)?(?:error|warning)\b", re.IGNORECASE),  # gcc/javac/tsc/flake8
+    re.compile(r"^\[(?:ERROR|WARNING|FATAL)\]"),                                               # Maven
+    re.compile(r"\bBUILD (?:FAILURE|FAILED)\b"),                                                # Maven / Gradle
+    re.compile(r"^(?:FAILED|ERROR)\s+\S+"),                                                     # pytest -rA / short summary
+    re.compile(r"^E\s{3}"),                                                                      # pytest assertion detail
+    re.compile(r"^=+ .*\b(?:failed|error|errors)\b.* =+$"),                                      # pytest final line
+    re.compile(r"^Traceback \(most recent call last\)"),                                         # Python
+    re.compile(r"^\s*(?:[\w.]+\.)?\w*(?:Error|Exception)\b(?::|$)"),                            # Python / Java exception line
+    re.compile(r"^Exception in thread "),                                                        # Java
+    re.compile(r"^(?:npm ERR!|error(?:\[\w+\])?:|warning:)", re.IGNORECASE),                     # npm / rustc / genérico
+]
+
+
+def _is_summary_line(line: str) -> bool:
+    return any(p.search(line) for p in _SUMMARY_PATTERNS)
+
+
+class OutputCapture:
+    """
+    Procesa un stream línea a línea con memoria acotada.
+    `budget` es el número de bytes conservados: la mitad para las primeras líneas y la
+    otra mitad para las últimas (deque circular).
+    """
+
+    def __init__(self, budget: int = DEFAULT_OUTPUT_BUDGET):
+        self.budget = max(256, budget)
+        self.head: List[str] = []
+        self.head_bytes = 0
+        self.tail: Deque[str] = deque()
+        self.tail_bytes = 0
+        self.omitted_lines = 0
+        self.omitted_bytes = 0
+        self.total_bytes = 0
+        self.total_lines = 0
+        self.summary: List[str] = []
+        self._summary_seen = set()
+        self._summary_dropped = 0
+        self._pending = b""
+        self._last: Optional[str] = None
+        self._repeat = 0
+
+    # -- entrada ------------------------------------------------------------ #
+    def feed(self, data: bytes) -> None:
+        self.total_bytes += len(data)
+        data = self._pending + data
+        lines = data.split(b"\n")
+        self._pending = lines.pop()
+        if len(self._pending) > MAX_LINE_CHARS * 4:
+            # Línea sin salto interminable (barra de progreso con \r): se emite por trozos
+            lines.append(self._pending)
+            self._pending = b""
+        for raw in lines:
+            self._line(raw.decode("utf-8", errors="replace"))
+
+    def close(self) -> None:
+        if self._pending:
+            self._line(self._pending.decode("utf-8", errors="replace"))
+            self._pending = b""
+        self._flush_repeat()
+
+    def _line(self, line: str) -> None:
+        line = line.rstrip("\r")
+        if "\r" in line:
+            line = line.rsplit("\r", 1)[-1]       # solo el estado final de las barras de progreso
+        if len(line) > MAX_LINE_CHARS:
+            line = line[:MAX_LINE_CHARS] + f" ... [{len(line) - MAX_LINE_CHARS} chars cut]"
+        self.total_lines += 1
+        if line == self._last:
+            self._repeat += 1
+            return
+        self._flush_repeat()
+        self._last = line
+        self._keep(line)
+        if line.strip() and _is_summary_line(line):
+            key = line.strip()
+            if key not in self._summary_seen:
+                self._summary_seen.add(key)
+                if len(self.summary) < MAX_SUMMARY_LINES:
+                    self.summary.append(line)
+                else:
+                    self._summary_dropped += 1
+
+    def _flush_repeat(self) -> None:
+        if self._repeat:
+            self._keep(f"... [previous line repeated {self._repeat} more times]")
+            self._repeat = 0
+
+    def _keep(self, line: str) -> None:
+        size = len(line.encode("utf-8", errors="replace")) + 1
+        half = self.budget // 2
+        if self.head_bytes + size <= half and not self.tail:
+            self.head.append(line)
+            self.head_bytes += size
+            return
+        self.tail.append(line)
+        self.tail_bytes += size
+        while self.tail_bytes > half and len(self.tail) > 1:
+            dropped = self.tail.popleft()
+            self.tail_bytes -= len(dropped.encode("utf-8", errors="replace")) + 1
+            self.omitted_lines += 1
+            self.omitted_bytes += len(dropped.encode("utf-8", errors="replace")) + 1
+
+    # -- salida ------------------------------------------------------------- #
+    @property
+    def truncated(self) -> bool:
+        return self.omitted_lines > 0
+
+    def render(self, limit: Optional[int] = None) -> str:
+        """Texto conservado, recortado a `limit` bytes (mitad principio, mitad final)."""
+        head, tail = list(self.head), list(self.tail)
+        omitted_lines, omitted_bytes = self.omitted_lines, self.omitted_bytes
+        if limit is not None and self.head_bytes + self.tail_bytes > limit:
+            half = max(0, limit // 2)
+            head, extra_h = _take(head, half, from_end=False)
+            tail, extra_t = _take(tail, half, from_end=True)
+            omitted_lines += extra_h[0] + extra_t[0]
+            omitted_bytes += extra_h[1] + extra_t[1]
+        parts = head
+        if omitted_lines:
+            parts = parts + [f"... [{omitted_lines} lines / {omitted_bytes} bytes omitted] ..."]
+        return "\n".join(parts + tail)
+
+    def render_summary(self, limit: Optional[int] = None) -> str:
+        """Líneas de error/aviso, las primeras que quepan en `limit` bytes."""
+        lines, dropped = list(self.summary), self._summary_dropped
+        if limit is not None:
+            lines, (extra, _) = _take(lines, limit, from_end=False)
+            dropped += extra
+        if dropped:
+            lines.append(f"... [{dropped} more error/warning lines]")
+        return "\n".join(lines)
+
+
+def _take(lines: List[str], budget: int, from_end: bool) -> Tuple[List[str], Tuple[int, int]]:
+    """Primeras (o últimas) líneas que caben en `budget` bytes y (líneas, bytes) descartados."""
+    kept: List[str] = []
+    used = 0
+    seq = reversed(lines) if from_end else iter(lines)
+    for line in seq:
+        size = len(line.encode("utf-8", errors="replace")) + 1
+        if used + size > budget:
+            break
+        kept.append(line)
+        used += size
+    dropped = lines[:len(lines) - len(kept)] if from_end else lines[len(kept):]
+    if from_end:
+        kept.reverse()
+    return kept, (len(dropped), sum(len(l.encode("utf-8", errors="replace")) + 1 for l in dropped))
+
+
+def _drain(stream, capture: OutputCapture) -> None:
+    fd = stream.fileno()
+    try:
+        while True:
+            data = os.read(fd, READ_CHUNK_BYTES)
+            if not data:
+                break
+            capture.feed(data)
+    except OSError:
+        pass
+    finally:
+        stream.close()
+        capture.close()
+
+
+def run_captured(command: str, cwd: Union[str, Path], timeout: float,
+                 budget: int = DEFAULT_OUTPUT_BUDGET) -> Tuple[Optional[int], bool, float, OutputCapture, OutputCapture]:
+    """
+    Ejecuta `command` en un shell leyendo stdout/stderr de forma incremental.
+    Si supera `timeout`, mata el grupo de procesos y devuelve la salida parcial.
+    Devuelve (returncode, timed_out, segundos, captura_stdout, captura_stderr).
+    """
+    out, err = OutputCapture(budget), OutputCapture(budget)
+    started = time.perf_counter()
+    process = subprocess.Popen(command, shell=True, cwd=cwd, stdin=subprocess.DEVNULL,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True)
+    readers = [threading.Thread(target=_drain, args=(process.stdout, out), daemon=True),
+               threading.Thread(target=_drain, args=(process.stderr, err), daemon=True)]
+    for reader in readers:
+        reader.start()
+    timed_out = False
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        timed_out = True
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            try:
+                os.killpg(process.pid, sig)
+            except ProcessLookupError:
+                break
+            try:
+                process.wait(timeout=2)
+                break
+            except subprocess.TimeoutExpired:
+                continue
+    for reader in readers:
+        reader.join(timeout=2)
+    return process.returncode, timed_out, time.perf_counter() - started, out, err
+
+
+def format_result(command: str, returncode: Optional[int], timed_out: bool, elapsed: float,
+                  out: OutputCapture, err: OutputCapture, budget: int = DEFAULT_OUTPUT_BUDGET) -> str:
+    """
+    Informe para el LLM: estado, stdout y stderr dentro del presupuesto y resumen de errores.
+    El resumen se cobra primero (hasta SUMMARY_BUDGET_SHARE del presupuesto, repartido entre
+    stdout y stderr); del resto, stderr recibe hasta un tercio y lo que no use pasa a stdout.
+    """
+    summary_limit = int(budget * SUMMARY_BUDGET_SHARE)
+    out_summary = out.render_summary(summary_limit // 2 if err.summary else summary_limit)
+    err_summary = err.render_summary(summary_limit - len(out_summary.encode("utf-8", errors="replace")))
+    summary = "\n".join(s for s in (out_summary, err_summary) if s)
+    remaining = max(0, budget - len(summary.encode("utf-8", errors="replace")))
+    err_limit = min(err.head_bytes + err.tail_bytes, remaining // 3)
+    out_limit = remaining - err_limit
+    status = (f"timed out after {elapsed:.1f}s (process killed, partial output below)" if timed_out
+              else f"exit code {returncode} in {elapsed:.1f}s")
+    sizes = f"{out.total_bytes} bytes stdout, {err.total_bytes} bytes stderr"
+    result = (f"Command: {command}\nStatus: {status} ({sizes})\n"
+              f"Output:\n{out.render(out_limit)}\nErrors:\n{err.render(err_limit)}")
+    if summary:
+        result += f"\nSummary of errors/warnings:\n{summary}"
+    return result
+
@@ -2,6 +2,7 @@ import os
 
 # Importa el decorador de herramientas desde el ADK de watsonx Orchestrate
 from ibm_watsonx_orchestrate.agent_builder.tools import tool
+from workspace_catalog import get_catalog
 
 @tool
 def delete_file(target_file: str, explanation: str = "") -> str:
@@ -18,6 +19,7 @@ def delete_file(target_file: str, explanation: str = "") -> str:
     try:
         if os.path.exists(target_file):
             os.remove(target_file)
+            get_catalog().invalidate(target_file)
             return f"Successfully deleted file: {target_file}"
         else:
             return f"File not found: {target_file}"
@@ -1,74 +1,437 @@
 import re
-import glob
 import os
-import fnmatch
+import json
+import base64
+import shutil
+import subprocess
+import threading
+import concurrent.futures as cf
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from itertools import islice
 
 # Importa el decorador de herramientas desde el ADK de watsonx Orchestrate
 from ibm_watsonx_orchestrate.agent_builder.tools import tool
+from workspace_catalog import EXCLUDED_DIRS, KIND_FILE, WORKSPACE, get_catalog
+
+# Configuración del motor
+MAX_RESULTS = 50                  # tope por defecto (el prompt del agente promete 50)
+BINARY_SNIFF_BYTES = 8192         # bytes inspeccionados para detectar binarios
+PARALLEL_MIN_FILES = 2000         # a partir de aquí se reparte en un ProcessPool
+PARALLEL_BATCH_FILES = 256        # archivos por tarea enviada al pool
+POOL_WORKERS = os.cpu_count() or 1
+ALWAYS_SKIPPED_DIRS = frozenset({".git", ".hg", ".svn"})
+USE_RIPGREP = True                # delegar en `rg` cuando esté instalado
+
+
+@lru_cache(maxsize=64)
+def _glob_regex(pattern):
+    return _gitignore_regex(pattern.removeprefix("./"))
+
+
+def _glob_match(rel_path, pattern, is_dir=False):
+    """
+    Patrones con la semántica de `rg --glob` (la de .gitignore): sin '/' se comparan
+    con el nombre en cualquier subdirectorio ('*.py'); con '/' con la ruta relativa.
+    """
+    if pattern.endswith("/") and not is_dir:
+        return False
+    return _glob_regex(pattern).match(rel_path) is not None
+
+
+# --------------------------------------------------------------------------- #
+# .gitignore
+# --------------------------------------------------------------------------- #
+def _gitignore_regex(pattern):
+    """Traduce un patrón de .gitignore a regex sobre rutas relativas al directorio del .gitignore."""
+    anchored = "/" in pattern.rstrip("/")
+    pattern = pattern.strip("/")
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            out.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                out.append(re.escape(pattern[i]))
+                i += 1
+            else:
+                body = pattern[i + 1:end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end + 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    prefix = "" if anchored else "(?:.*/)?"
+    return re.compile(prefix + "".join(out) + r"\Z", re.DOTALL)
+
+
+class _GitIgnore:
+    """Reglas de los .gitignore del workspace, cargadas bajo demanda por directorio."""
+
+    def __init__(self, root):
+        self.root = root
+        self._rules = {}
+
+    def _load(self, rel_dir):
+        rules = self._rules.get(rel_dir)
+        if rules is None:
+            rules = []
+            try:
+                with open(os.path.join(self.root, rel_dir, ".gitignore"), encoding="utf-8", errors="ignore") as f:
+                    for raw in f:
+                        line = raw.rstrip("\n").rstrip()
+                        if not line or line.startswith("#"):
+                            continue
+                        negate = line.startswith("!")
+                        if negate or line.startswith("\\!") or line.startswith("\\#"):
+                            line = line[1:]
+                        rules.append((_gitignore_regex(line), negate, line.endswith("/")))
+            except OSError:
+                pass
+            self._rules[rel_dir] = rules
+        return rules
+
+    def ignored(self, rel_path, is_dir):
+        """La última regla que coincide gana; se consultan los .gitignore de la raíz hacia abajo."""
+        parts = rel_path.split("/")
+        result = False
+        for depth in range(len(parts)):
+            rel_dir = "/".join(parts[:depth])
+            sub = "/".join(parts[depth:])
+            for regex, negate, dir_only in self._load(rel_dir):
+                if dir_only and not is_dir:
+                    continue
+                if regex.match(sub):
+                    result = not negate
+        return result
+
+
+class _PathFilter:
+    """Decide qué rutas se buscan: VCS, .gitignore y filtros include/exclude."""
+
+    def __init__(self, include_pattern=None, exclude_pattern=None):
+        self.include_pattern = include_pattern
+        self.exclude_pattern = exclude_pattern
+        self.gitignore = _GitIgnore(str(WORKSPACE))
+        self._dirs = {"": True}
+
+    def dir_allowed(self, rel_dir):
+        allowed = self._dirs.get(rel_dir)
+        if allowed is None:
+            parent, _, name = rel_dir.rpartition("/")
+            allowed = (self.dir_allowed(parent)
+                       and name not in ALWAYS_SKIPPED_DIRS
+                       and not self.gitignore.ignored(rel_dir, True)
+                       and not (self.exclude_pattern and _glob_match(rel_dir, self.exclude_pattern, True)))
+            self._dirs[rel_dir] = allowed
+        return allowed
+
+    def file_allowed(self, rel_path):
+        if not self.dir_allowed(rel_path.rpartition("/")[0]) or self.gitignore.ignored(rel_path, False):
+            return False
+        if self.include_pattern and not _glob_match(rel_path, self.include_pattern):
+            return False
+        return not (self.exclude_pattern and _glob_match(rel_path, self.exclude_pattern))
+
+
+def _iter_candidate_files(path_filter):
+    """Archivos del workspace (ruta relativa, ruta absoluta) que pasan el filtro, en orden de ruta."""
+    for rel_path, kind, _, _ in get_catalog().iter_entries():
+        if kind == KIND_FILE and path_filter.file_allowed(rel_path):
+            yield rel_path, os.path.join(WORKSPACE, rel_path)
+
+
+# --------------------------------------------------------------------------- #
+# Motor de búsqueda
+# --------------------------------------------------------------------------- #
+def _is_binary(handle):
+    """Heurística de git/ripgrep: un byte NUL en el primer bloque implica binario."""
+    return b"\0" in handle.read(BINARY_SNIFF_BYTES)
+
+
+def _grep_file(pattern, rel_path, abs_path, limit):
+    """Genera los resultados de un archivo (como mucho `limit`)."""
+    try:
+        with open(abs_path, "rb") as raw:
+            if _is_binary(raw):
+                return
+        with open(abs_path, 'r', encoding='utf-8', errors='ignore') as file:
+            for line_num, line in enumerate(file, 1):
+                # Como ripgrep, el regex se aplica a la línea sin su salto de línea
+                line = line.rstrip('\n')
+                for match in pattern.finditer(line):
+                    yield {
+                        "file": rel_path,
+                        "line_number": line_num,
+                        "line_content": line,
+                        "match": match.group(),
+                        "start_pos": match.start(),
+                        "end_pos": match.end()
+                    }
+                    limit -= 1
+                    if limit <= 0:
+                        return
+    except (IOError, UnicodeDecodeError) as e:
+        yield {
+            "file": rel_path,
+            "error": f"Error al leer archivo: {e}"
+        }
+
+
+def _grep_batch(query, flags, batch, limit):
+    """Tarea del ProcessPool: busca en un lote de archivos con un tope local."""
+    pattern = re.compile(query, flags)
+    results = []
+    for rel_path, abs_path in batch:
+        results.extend(_grep_file(pattern, rel_path, abs_path, limit - len(results)))
+        if len(results) >= limit:
+            break
+    return results
+
+
+def _chain(head, rest):
+    yield from head
+    yield from rest
+
+
+def _batched(iterable, size):
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def _get_pool():
+    """ProcessPool compartido por las búsquedas del proceso (crear uno por llamada cuesta más que buscar)."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = cf.ProcessPoolExecutor(max_workers=POOL_WORKERS)
+        return _POOL
+
+
+def _reset_pool(pool):
+    """Descarta un pool roto (un worker murió) para que la próxima búsqueda cree otro."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is pool:
+            _POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _iter_python_matches(query, flags, path_filter, max_results):
+    """
+    Motor en Python puro. Árboles pequeños se recorren en serie; los grandes se
+    reparten por lotes en un ProcessPool con un número acotado de lotes en vuelo,
+    así la memoria no crece con el tamaño del repositorio.
+    """
+    pattern = re.compile(query, flags)
+    files = _iter_candidate_files(path_filter)
+
+    head = list(islice(files, PARALLEL_MIN_FILES))
+    emitted = 0
+    if len(head) < PARALLEL_MIN_FILES:
+        for rel_path, abs_path in head:
+            for result in _grep_file(pattern, rel_path, abs_path, max_results - emitted):
+                yield result
+                emitted += 1
+            if emitted >= max_results:
+                return
+        return
+
+    batches = _batched(_chain(head, files), PARALLEL_BATCH_FILES)
+    pool = _get_pool()
+    in_flight = []
+    try:
+        max_in_flight = 2 * POOL_WORKERS
+        for batch in islice(batches, max_in_flight):
+            in_flight.append(pool.submit(_grep_batch, query, flags, batch, max_results))
+        # Se consumen en orden de envío para que la salida sea determinista
+        while in_flight:
+            future = in_flight.pop(0)
+            next_batch = next(batches, None)
+            if next_batch is not None:
+                in_flight.append(pool.submit(_grep_batch, query, flags, next_batch, max_results))
+            for result in future.result():
+                yield result
+                emitted += 1
+                if emitted >= max_results:
+                    return
+    except BrokenProcessPool:
+        _reset_pool(pool)
+        raise
+    finally:
+        # El pool se reutiliza: solo se cancelan los lotes pendientes de esta búsqueda
+        for future in in_flight:
+            future.cancel()
+
+
+# --------------------------------------------------------------------------- #
+# Backend opcional: ripgrep
+# --------------------------------------------------------------------------- #
+class _RipgrepFailed(Exception):
+    """rg no pudo ejecutar la búsqueda (p. ej. sintaxis regex que Rust no soporta)."""
+
+
+def _ripgrep_binary():
+    return shutil.which("rg") if USE_RIPGREP else None
+
+
+def _rg_text(field):
+    """Campos de `rg --json`: {"text": ...} o {"bytes": base64} si no es UTF-8 válido."""
+    if "text" in field:
+        return field["text"]
+    return base64.b64decode(field["bytes"]).decode("utf-8", errors="ignore")
+
+
+def _iter_rg_matches(rg, query, flags, case_sensitive, path_filter, max_results):
+    """
+    Delega la búsqueda en ripgrep. rg solo preselecciona las líneas: el filtro de
+    rutas, la detección de binarios y el propio regex de Python se vuelven a aplicar
+    sobre su salida, de modo que los resultados coinciden con el motor en Python.
+    Sin `--sort` (que obliga a rg a usar un solo hilo): los resultados llegan en el orden
+    en que terminan sus hilos y se ordenan aquí como el recorrido del catálogo. Si se alcanza
+    max_results, el subconjunto devuelto depende de ese orden.
+    """
+    pattern = re.compile(query, flags)
+    cmd = [rg, "--json", "--no-config", "--hidden", "--text", "--crlf",
+           "--no-require-git", "--no-ignore-dot", "--no-ignore-global",
+           "--no-ignore-exclude", "--no-ignore-parent",
+           "--ignore-case" if not case_sensitive else "--case-sensitive"]
+    for name in sorted(ALWAYS_SKIPPED_DIRS | EXCLUDED_DIRS):
+        cmd += ["--glob", f"!{name}"]
+    if path_filter.include_pattern:
+        cmd += ["--glob", path_filter.include_pattern.removeprefix("./")]
+    if path_filter.exclude_pattern:
+        cmd += ["--glob", "!" + path_filter.exclude_pattern.removeprefix("./")]
+    cmd += ["--regexp", query]
+
+    proc = subprocess.Popen(cmd, cwd=WORKSPACE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            stdin=subprocess.DEVNULL)
+    results = []
+    checked = {}
+    try:
+        for raw in proc.stdout:
+            event = json.loads(raw)
+            if event.get("type") != "match":
+                continue
+            data = event["data"]
+            rel_path = _rg_text(data["path"]).removeprefix("./")
+            allowed = checked.get(rel_path)
+            if allowed is None:
+                # Las globs de rg anulan .gitignore y --text no descarta binarios: se revisa aquí
+                allowed = path_filter.file_allowed(rel_path)
+                if allowed:
+                    try:
+                        with open(os.path.join(WORKSPACE, rel_path), "rb") as raw_file:
+                            allowed = not _is_binary(raw_file)
+                    except OSError:
+                        allowed = False
+                checked[rel_path] = allowed
+            if not allowed:
+                continue
+            line = _rg_text(data["lines"]).removesuffix("\n").removesuffix("\r")
+            for match in pattern.finditer(line):
+                results.append({
+                    "file": rel_path,
+                    "line_number": data["line_number"],
+                    "line_content": line,
+                    "match": match.group(),
+                    "start_pos": match.start(),
+                    "end_pos": match.end()
+                })
+                if len(results) >= max_results:
+                    break
+            if len(results) >= max_results:
+                break
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        stderr = proc.stderr.read().decode("utf-8", errors="ignore")
+        proc.stderr.close()
+        returncode = proc.wait()
+    # 1 = sin coincidencias; 2 = error (con --json también por archivos ilegibles)
+    if returncode == 2 and not results and "regex" in stderr:
+        raise _RipgrepFailed(stderr.strip())
+    # Orden del catálogo: preorden con los nombres ordenados en cada directorio
+    results.sort(key=lambda r: (r["file"].split("/"), r["line_number"], r["start_pos"]))
+    yield from results
+
+
+def iter_grep_matches(query, case_sensitive=True, include_pattern=None, exclude_pattern=None,
+                      max_results=MAX_RESULTS, engine="auto"):
+    """
+    Generador de resultados (mismo formato de dict que grep_search) que se detiene
+    en cuanto se alcanzan max_results. engine: "auto" usa ripgrep si está instalado
+    y el motor en Python si no (o si rg rechaza el patrón); "python"/"rg" fuerzan uno.
+    Lanza re.error si el patrón no es válido.
+    """
+    flags = 0 if case_sensitive else re.IGNORECASE
+    re.compile(query, flags)
+    path_filter = _PathFilter(include_pattern, exclude_pattern)
+
+    rg = _ripgrep_binary() if engine in ("auto", "rg") else None
+    if rg:
+        try:
+            yield from _iter_rg_matches(rg, query, flags, case_sensitive, path_filter, max_results)
+            return
+        except _RipgrepFailed as e:
+            if engine == "rg":
+                raise
+            print(f"[grep_search] ripgrep failed ({e}); using the Python engine")
+    elif engine == "rg":
+        raise _RipgrepFailed("rg not found in PATH")
+    yield from _iter_python_matches(query, flags, path_filter, max_results)
+
 
 @tool
-def grep_search(query, case_sensitive=True, include_pattern=None, exclude_pattern=None, explanation=None):
+def grep_search(query, case_sensitive=True, include_pattern=None, exclude_pattern=None, explanation=None,
+                max_results=MAX_RESULTS):
     """
     Search for a regex pattern in files using inclusion and exclusion filters.
-    
+    Binary files, version-control folders and paths listed in .gitignore are skipped.
+
     Parameters:
         query (str): The regex pattern to search for
         case_sensitive (bool): Whether the search should be case-sensitive
         include_pattern (str): Glob pattern for files to include (e.g., '*.py')
         exclude_pattern (str): Glob pattern for files to exclude
         explanation (str): One-sentence explanation of the search purpose
-    
+        max_results (int): Maximum number of matches to return (default: 50)
+
     Returns:
         list: List of dictionaries with search results including file path, line number, and matches
     """
-    results = []
-    
-    # Configurar flags para regex
-    flags = 0 if case_sensitive else re.IGNORECASE
-    
     try:
-        # Compilar el patrón regex
-        pattern = re.compile(query, flags)
+        return list(iter_grep_matches(query, case_sensitive, include_pattern, exclude_pattern,
+                                      max_results))
     except re.error as e:
         return [{"error": f"Patrón regex inválido: {e}"}]
-    
-    # Obtener lista de archivos a procesar
-    files_to_search = []
-    
-    if include_pattern:
-        # Usar el patrón de inclusión
-        files_to_search = glob.glob(include_pattern, recursive=True)
-    else:
-        # Buscar todos los archivos en el directorio actual
-        files_to_search = glob.glob("**/*", recursive=True)
-    
-    # Filtrar solo archivos (no directorios)
-    files_to_search = [f for f in files_to_search if os.path.isfile(f)]
-    
-    # Aplicar patrón de exclusión si existe
-    if exclude_pattern:
-        files_to_search = [f for f in files_to_search 
-                          if not fnmatch.fnmatch(f, exclude_pattern)]
-    
-    # Buscar en cada archivo
-    for file_path in files_to_search:
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-                for line_num, line in enumerate(file, 1):
-                    matches = pattern.finditer(line)
-                    for match in matches:
-                        results.append({
-                            "file": file_path,
-                            "line_number": line_num,
-                            "line_content": line.rstrip('\n'),
-                            "match": match.group(),
-                            "start_pos": match.start(),
-                            "end_pos": match.end()
-                        })
-        except (IOError, UnicodeDecodeError) as e:
-            results.append({
-                "file": file_path,
-                "error": f"Error al leer archivo: {e}"
-            })
-    
-    return results
+
@@ -0,0 +1,303 @@
+"""
+Sesiones de shell persistentes ("calientes") para run_terminal_cmd.
+
+Cada sesión es un bash de larga vida: los comandos se escriben por su stdin y la salida
+llega por dos pseudoterminales (stdout y stderr), así los programas ven un TTY y vuelcan
+línea a línea. El final de cada comando se detecta con un centinela único impreso en
+ambos streams junto con el código de salida. `cd`, variables exportadas, virtualenvs
+activados, etc. se conservan entre llamadas a la misma sesión.
+"""
+import os
+import pty
+import select
+import shlex
+import signal
+import subprocess
+import threading
+import time
+import tty
+import uuid
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+from command_output import DEFAULT_OUTPUT_BUDGET, OutputCapture
+
+WORKSPACE = Path(r"/home/testagent/workspace").resolve()
+
+MAX_SESSIONS = 4
+IDLE_TIMEOUT_SECONDS = 15 * 60
+READ_CHUNK_BYTES = 64 * 1024
+SESSION_ENV = {"TERM": "dumb", "PAGER": "cat", "GIT_PAGER": "cat", "PYTHONUNBUFFERED": "1"}
+
+
+class SessionError(RuntimeError):
+    """La sesión no está disponible (cerrada, ocupada o se alcanzó el máximo)."""
+
+
+class _SentinelStream:
+    """Lee un pty y reenvía a la captura todo lo anterior al centinela del comando actual."""
+
+    def __init__(self, fd: int):
+        self.fd = fd
+        self.buffer = b""
+        self.marker = b""
+        self.capture: Optional[OutputCapture] = None
+        self.done = False
+        self.status_line = b""
+
+    def begin(self, marker: bytes, capture: OutputCapture) -> None:
+        self.marker, self.capture, self.done, self.status_line = marker, capture, False, b""
+
+    def feed(self, data: bytes) -> None:
+        self.buffer += data
+        if self.done:
+            return
+        idx = self.buffer.find(self.marker)
+        if idx >= 0:
+            after = self.buffer[idx + len(self.marker):]
+            if b"\n" not in after:
+                return                                  # falta el resto de la línea del centinela
+            self.capture.feed(self.buffer[:idx])
+            self.status_line, self.buffer = after.split(b"\n", 1)
+            self.done = True
+        elif len(self.buffer) > len(self.marker):
+            keep = len(self.marker)
+            self.capture.feed(self.buffer[:-keep])
+            self.buffer = self.buffer[-keep:]
+
+
+class ShellSession:
+    """Un bash persistente con stdin por pipe y stdout/stderr por pty."""
+
+    def __init__(self, name: str, cwd: Union[str, Path] = WORKSPACE):
+        self.name = name
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self.commands_run = 0
+        self.lock = threading.Lock()
+        out_master, out_slave = pty.openpty()
+        err_master, err_slave = pty.openpty()
+        for fd in (out_slave, err_slave):
+            tty.setraw(fd)                               # sin eco, sin \r\n, sin señales
+        env = dict(os.environ, **SESSION_ENV)
+        self.process = subprocess.Popen(
+            ["bash", "--noprofile", "--norc"], cwd=cwd, env=env,
+            stdin=subprocess.PIPE, stdout=out_slave, stderr=err_slave, start_new_session=True,
+        )
+        os.close(out_slave)
+        os.close(err_slave)
+        self.stdout = _SentinelStream(out_master)
+        self.stderr = _SentinelStream(err_master)
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def run(self, command: str, timeout: float,
+            budget: int = DEFAULT_OUTPUT_BUDGET) -> Tuple[Optional[int], bool, float, OutputCapture, OutputCapture]:
+        """
+        Ejecuta `command` en la sesión. Devuelve (returncode, timed_out, segundos, stdout, stderr).
+        Si vence el timeout, la sesión se cierra (su estado se pierde) y se devuelve la salida parcial.
+        """
+        if not self.alive:
+            raise SessionError(f"session '{self.name}' has exited")
+        out, err = OutputCapture(budget), OutputCapture(budget)
+        sentinel = f"__RUN_TERMINAL_CMD_DONE_{uuid.uuid4().hex}__"
+        marker = ("\n" + sentinel + " ").encode()
+        self.stdout.begin(marker, out)
+        self.stderr.begin(marker, err)
+        # El grupo { } corre en el shell actual (conserva cd/env); stdin se aísla para que
+        # un programa interactivo no consuma las líneas siguientes. El comando va como literal
+        # de eval: un error de sintaxis (comillas sin cerrar...) falla dentro de eval y los
+        # centinelas se imprimen igualmente
+        script = (f"{{ eval {shlex.quote(command)}\n}} </dev/null\n"
+                  f"__rc=$?; printf '\\n%s %d\\n' '{sentinel}' \"$__rc\"; "
+                  f"printf '\\n%s %d\\n' '{sentinel}' \"$__rc\" >&2\n")
+        started = time.perf_counter()
+        deadline = started + timeout
+        self.last_used = time.time()
+        self.commands_run += 1
+        try:
+            self.process.stdin.write(script.encode())
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            self.close()
+            raise SessionError(f"session '{self.name}' is not accepting commands: {e}")
+
+        timed_out = False
+        streams = {self.stdout.fd: self.stdout, self.stderr.fd: self.stderr}
+        while not (self.stdout.done and self.stderr.done):
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                timed_out = True
+                break
+            ready, _, _ = select.select([fd for fd, s in streams.items() if not s.done], [], [], remaining)
+            for fd in ready:
+                try:
+                    data = os.read(fd, READ_CHUNK_BYTES)
+                except OSError:
+                    data = b""
+                if not data:
+                    # El shell terminó (p. ej. `exit`): se entrega lo leído y la sesión se cierra
+                    self.close()
+                    for stream in streams.values():
+                        if not stream.done:
+                            stream.capture.feed(stream.buffer)
+                            stream.buffer, stream.done = b"", True
+                    break
+                streams[fd].feed(data)
+        elapsed = time.perf_counter() - started
+        self.last_used = time.time()
+
+        if timed_out:
+            for stream in streams.values():
+                if not stream.done:
+                    stream.capture.feed(stream.buffer)
+            self.close()
+        out.close()
+        err.close()
+        returncode = None
+        status = self.stdout.status_line.strip()
+        if status.lstrip(b"-").isdigit():
+            returncode = int(status)
+        elif not timed_out and self.process.poll() is not None:
+            returncode = self.process.returncode
+        return returncode, timed_out, elapsed, out, err
+
+    def close(self) -> None:
+        if self.process.poll() is None:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            self.process.wait(timeout=5)
+        for fd in (self.stdout.fd, self.stderr.fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        if self.process.stdin:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+
+
+class SessionManager:
+    """Sesiones con nombre, con expulsión por inactividad y un máximo simultáneo."""
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, idle_timeout: float = IDLE_TIMEOUT_SECONDS):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions: Dict[str, ShellSession] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _close_if_unused(session: ShellSession) -> bool:
+        """Cierra `session` solo si nadie la usa; tiene su lock mientras tanto para que run() no la tome a medias."""
+        if not session.lock.acquire(blocking=False):
+            return False
+        try:
+            session.close()
+        finally:
+            session.lock.release()
+        return True
+
+    def _evict(self) -> None:
+        now = time.time()
+        for name, session in list(self._sessions.items()):
+            idle = now - session.last_used > self.idle_timeout
+            if (not session.alive or idle) and self._close_if_unused(session):
+                del self._sessions[name]
+
+    def acquire(self, name: str, cwd: Union[str, Path] = WORKSPACE) -> ShellSession:
+        """
+        Sesión `name` (creándola si hace falta). Puede expulsarse antes de que el llamador tome
+        `session.lock`; quien la use debe comprobar `alive` con el lock tomado (como hace run()).
+        """
+        with self._lock:
+            self._evict()
+            session = self._sessions.get(name)
+            if session is not None:
+                session.last_used = time.time()
+                return session
+            if len(self._sessions) >= self.max_sessions:
+                for lru in sorted(self._sessions.values(), key=lambda s: s.last_used):
+                    if self._close_if_unused(lru):
+                        del self._sessions[lru.name]
+                        break
+                else:
+                    raise SessionError(f"all {self.max_sessions} shell sessions are busy")
+            session = ShellSession(name, cwd)
+            self._sessions[name] = session
+            return session
+
+    def _discard(self, name: str, session: ShellSession) -> None:
+        with self._lock:
+            if self._sessions.get(name) is session:
+                del self._sessions[name]
+
+    def run(self, name: str, command: str, timeout: float, budget: int = DEFAULT_OUTPUT_BUDGET,
+            cwd: Union[str, Path] = WORKSPACE):
+        deadline = time.monotonic() + timeout
+        while True:
+            session = self.acquire(name, cwd)
+            if not session.lock.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                raise SessionError(f"session '{name}' is busy with another command")
+            if session.alive:
+                break
+            # Expulsada (o muerta) entre acquire() y el lock: se descarta y se pide otra
+            session.lock.release()
+            self._discard(name, session)
+        try:
+            result = session.run(command, timeout, budget)
+        finally:
+            session.lock.release()
+        if not session.alive:
+            self._discard(name, session)
+        return result
+
+    def close(self, name: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(name, None)
+        if session is None:
+            return False
+        session.close()
+        return True
+
+    def names(self):
+        with self._lock:
+            return list(self._sessions)
+
+
+_manager: Optional[SessionManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_session_manager() -> SessionManager:
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = SessionManager()
+        return _manager
+
+
+if __name__ == "__main__":
+    import statistics
+    from command_output import run_captured
+
+    manager = get_session_manager()
+    cwd = Path.cwd()
+    print(manager.run("demo", "cd /tmp && export GREETING=hola", 5, cwd=cwd)[0],
+          manager.run("demo", "pwd; echo $GREETING; echo to-stderr >&2; false", 5, cwd=cwd)[3].render())
+
+    # Latencia por llamada: bash nuevo por comando vs sesión caliente
+    for label, command in (("echo", "echo hi"), ("python3", "python3 -c 'print(1)'")):
+        cold, warm = [], []
+        for _ in range(30):
+            cold.append(run_captured(command, cwd, 10)[2])
+            warm.append(manager.run("bench", command, 10, cwd=cwd)[2])
+        print(f"{label:8s} cold spawn: {statistics.median(cold) * 1000:6.2f} ms   "
+              f"warm session: {statistics.median(warm) * 1000:6.2f} ms (median of 30)")
+    rc, timed_out, elapsed, out, err = manager.run("demo", "echo partial; sleep 5", 0.5, cwd=cwd)
+    print("timeout:", timed_out, repr(out.render()), "sessions:", manager.names())
@@ -0,0 +1,29 @@
+# Importa el decorador de herramientas desde el ADK de watsonx Orchestrate
+from ibm_watsonx_orchestrate.agent_builder.tools import tool
+
+from terminal_jobs import get_job_manager
+
+
+@tool
+def tail_job(job_id: str, n_lines: int = 50, stream: str = "both", explanation: str = "") -> str:
+    """
+    Show the latest output lines of a background job without waiting for it to finish.
+
+    Parameters:
+        job_id (str): The job ID returned by run_terminal_cmd
+        n_lines (int): Number of trailing lines to return per stream
+        stream (str): "stdout", "stderr" or "both"
+        explanation (str): Optional explanation for the request
+
+    Returns:
+        str: Job status followed by the last lines of its output
+    """
+    if stream not in ("stdout", "stderr", "both"):
+        return f"Error: stream must be 'stdout', 'stderr' or 'both', got '{stream}'"
+    try:
+        job = get_job_manager().get(job_id)
+        return f"{job.summary()}\n{job.tail(max(0, n_lines), stream)}"
+    except KeyError as e:
+        return f"Error: {e.args[0]}"
+    except Exception as e:
+        return f"Error reading job output: {e}"
@@ -0,0 +1,32 @@
+# Importa el decorador de herramientas desde el ADK de watsonx Orchestrate
+from ibm_watsonx_orchestrate.agent_builder.tools import tool
+
+from terminal_jobs import get_job_manager
+
+MAX_WAIT_SECONDS = 600
+
+
+@tool
+def wait_job(job_id: str, timeout: float = 60, n_lines: int = 50, explanation: str = "") -> str:
+    """
+    Wait for a background job to finish, up to `timeout` seconds, then show its status and output tail.
+    If the job is still running when the timeout expires it keeps running; call wait_job again or kill_job.
+
+    Parameters:
+        job_id (str): The job ID returned by run_terminal_cmd
+        timeout (float): Maximum seconds to wait (capped at 600)
+        n_lines (int): Number of trailing output lines to include per stream
+        explanation (str): Optional explanation for the wait
+
+    Returns:
+        str: Whether the job finished, its status and the last lines of its output
+    """
+    try:
+        job = get_job_manager().get(job_id)
+        finished = job.wait(min(max(0.0, float(timeout)), MAX_WAIT_SECONDS))
+        header = "Job finished." if finished else f"Job still running after waiting {timeout}s."
+        return f"{header}\n{job.summary()}\n{job.tail(max(0, n_lines))}"
+    except KeyError as e:
+        return f"Error: {e.args[0]}"
+    except Exception as e:
+        return f"Error waiting for job: {e}"
@@ -4,6 +4,7 @@ from pathlib import Path
 
 # Importa el decorador de herramientas desde el ADK de watsonx Orchestrate
 from ibm_watsonx_orchestrate.agent_builder.tools import tool
+from workspace_catalog import get_catalog
 
 WORKSPACE = Path(r"/home/testagent/workspace").resolve()
 
@@ -47,6 +48,7 @@ def write_file(file_path: str, content: str, explanation: str = "") -> str:
         abs_path = to_workspace_path(file_path)        # <<<<<<
         abs_path.parent.mkdir(parents=True, exist_ok=True)
         abs_path.write_text(content, encoding="utf-8")
+        get_catalog().invalidate(abs_path)
         return f"Archivo guardado en {abs_path}"
     except Exception as e:
         return f"Error escribiendo archivo: {e}"
\ No newline at end of file